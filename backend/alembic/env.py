@@ -7,11 +7,20 @@ from app.core.config import settings
 from app.core.database import Base
 from app.models.user import (  # noqa: F401 - ensure models are imported
     ActivityLog,
+    BadgeCounts,
     ContactRequest,
+    Conversation,
     GarminCredentials,
+    ImportJob,
+    ImportJobItem,
+    Message,
     SharedWorkout,
     User,
     Workout,
+    WorkoutPayload,
+    WorkoutSegment,
+    WorkoutStep,
+    WorkoutUpload,
 )
 
 config = context.config
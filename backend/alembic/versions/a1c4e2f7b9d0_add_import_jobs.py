@@ -0,0 +1,65 @@
+"""add_import_jobs
+
+Revision ID: a1c4e2f7b9d0
+Revises: 5356f2c46c43
+Create Date: 2026-10-16 09:12:41.208113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e2f7b9d0'
+down_revision: Union[str, None] = '5356f2c46c43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('athlete_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('lease_owner', sa.String(length=255), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['athlete_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_import_jobs_id', 'import_jobs', ['id'])
+    op.create_index('ix_import_jobs_athlete_id', 'import_jobs', ['athlete_id'])
+    op.create_index('ix_import_jobs_status_next_run_at', 'import_jobs', ['status', 'next_run_at'])
+
+    op.create_table(
+        'import_job_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('shared_workout_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('message', sa.Text(), nullable=True),
+        sa.Column('garmin_import_id', sa.String(length=100), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['import_jobs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['shared_workout_id'], ['shared_workouts.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_import_job_items_id', 'import_job_items', ['id'])
+    op.create_index('ix_import_job_items_job_id', 'import_job_items', ['job_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_job_items_job_id', table_name='import_job_items')
+    op.drop_index('ix_import_job_items_id', table_name='import_job_items')
+    op.drop_table('import_job_items')
+    op.drop_index('ix_import_jobs_status_next_run_at', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_athlete_id', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_id', table_name='import_jobs')
+    op.drop_table('import_jobs')
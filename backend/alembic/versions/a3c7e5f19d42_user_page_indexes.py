@@ -0,0 +1,36 @@
+"""user_page_indexes
+
+Revision ID: a3c7e5f19d42
+Revises: f6d2a9c41b87
+Create Date: 2026-10-16 18:47:12.550381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c7e5f19d42'
+down_revision: Union[str, None] = 'f6d2a9c41b87'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('ix_users_full_name_id', 'users', ['full_name', 'id'], unique=False)
+    # The athlete's list shows several statuses, so it pages on shared_at alone
+    op.create_index(
+        'ix_shared_workouts_athlete_id_shared_at_id',
+        'shared_workouts',
+        ['athlete_id', 'shared_at', 'id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_shared_workouts_athlete_id_shared_at_id', table_name='shared_workouts')
+    op.drop_index('ix_users_full_name_id', table_name='users')
+    op.drop_index('ix_users_created_at_id', table_name='users')
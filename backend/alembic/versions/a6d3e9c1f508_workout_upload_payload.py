@@ -0,0 +1,62 @@
+"""workout_upload_payload
+
+Revision ID: a6d3e9c1f508
+Revises: f2b8d6a41c07
+Create Date: 2026-10-16 14:48:03.117254
+
+"""
+import hashlib
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d3e9c1f508'
+down_revision: Union[str, None] = 'f2b8d6a41c07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in step with GarminService.canonical_json
+VOLATILE_WORKOUT_FIELDS = ("workoutId", "ownerId", "createdDate", "updatedDate")
+
+
+def upgrade() -> None:
+    op.add_column('workouts', sa.Column('upload_payload', sa.LargeBinary(), nullable=True))
+
+    workouts = sa.table(
+        'workouts',
+        sa.column('id', sa.Integer()),
+        sa.column('workout_data', sa.Text()),
+        sa.column('content_hash', sa.String()),
+        sa.column('upload_payload', sa.LargeBinary()),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(workouts.c.id, workouts.c.workout_data)).all()
+    for row in rows:
+        try:
+            data = json.loads(row.workout_data)
+        except (TypeError, ValueError):
+            continue
+        if not isinstance(data, dict):
+            continue
+        canonical = json.dumps(
+            {k: v for k, v in data.items() if k not in VOLATILE_WORKOUT_FIELDS},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        conn.execute(
+            workouts.update()
+            .where(workouts.c.id == row.id)
+            .values(
+                upload_payload=zlib.compress(canonical.encode()),
+                content_hash=hashlib.sha256(canonical.encode()).hexdigest(),
+            )
+        )
+
+
+def downgrade() -> None:
+    op.drop_column('workouts', 'upload_payload')
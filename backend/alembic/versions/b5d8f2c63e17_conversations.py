@@ -0,0 +1,104 @@
+"""conversations
+
+Revision ID: b5d8f2c63e17
+Revises: a3c7e5f19d42
+Create Date: 2026-10-16 19:24:37.108256
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d8f2c63e17'
+down_revision: Union[str, None] = 'a3c7e5f19d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LOW = 'CASE WHEN m.sender_id < m.recipient_id THEN m.sender_id ELSE m.recipient_id END'
+HIGH = 'CASE WHEN m.sender_id < m.recipient_id THEN m.recipient_id ELSE m.sender_id END'
+
+
+def upgrade() -> None:
+    op.create_table(
+        'conversations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_low_id', sa.Integer(), nullable=False),
+        sa.Column('user_high_id', sa.Integer(), nullable=False),
+        sa.Column('last_message_id', sa.Integer(), nullable=True),
+        sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('low_unread_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('high_unread_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_low_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_high_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_conversations_id', 'conversations', ['id'])
+    op.create_index(
+        'uq_conversations_user_low_id_user_high_id',
+        'conversations',
+        ['user_low_id', 'user_high_id'],
+        unique=True,
+    )
+    op.create_index(
+        'ix_conversations_user_low_id_last_message_at_id',
+        'conversations',
+        ['user_low_id', 'last_message_at', 'id'],
+    )
+    op.create_index(
+        'ix_conversations_user_high_id_last_message_at_id',
+        'conversations',
+        ['user_high_id', 'last_message_at', 'id'],
+    )
+
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.add_column(sa.Column('conversation_id', sa.Integer(), nullable=True))
+        batch_op.create_foreign_key(
+            'fk_messages_conversation_id_conversations',
+            'conversations',
+            ['conversation_id'],
+            ['id'],
+            ondelete='CASCADE',
+        )
+    op.create_index(
+        'ix_messages_conversation_id_created_at_id', 'messages', ['conversation_id', 'created_at', 'id']
+    )
+
+    # One conversation per pair that has exchanged messages
+    op.execute(f"""
+        INSERT INTO conversations
+            (user_low_id, user_high_id, last_message_at, low_unread_count, high_unread_count, created_at)
+        SELECT {LOW}, {HIGH},
+            COALESCE(MAX(m.created_at), CURRENT_TIMESTAMP),
+            SUM(CASE WHEN NOT m.is_read AND m.recipient_id = {LOW} THEN 1 ELSE 0 END),
+            SUM(CASE WHEN NOT m.is_read AND m.recipient_id <> {LOW} THEN 1 ELSE 0 END),
+            MIN(m.created_at)
+        FROM messages m
+        GROUP BY {LOW}, {HIGH}
+    """)
+    op.execute(f"""
+        UPDATE messages SET conversation_id = (
+            SELECT c.id FROM conversations c, messages m
+            WHERE m.id = messages.id AND c.user_low_id = {LOW} AND c.user_high_id = {HIGH}
+        )
+    """)
+    op.execute("""
+        UPDATE conversations SET last_message_id = (
+            SELECT MAX(m.id) FROM messages m WHERE m.conversation_id = conversations.id
+        )
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_conversation_id_created_at_id', table_name='messages')
+    with op.batch_alter_table('messages') as batch_op:
+        batch_op.drop_constraint('fk_messages_conversation_id_conversations', type_='foreignkey')
+        batch_op.drop_column('conversation_id')
+    op.drop_index('ix_conversations_user_high_id_last_message_at_id', table_name='conversations')
+    op.drop_index('ix_conversations_user_low_id_last_message_at_id', table_name='conversations')
+    op.drop_index('uq_conversations_user_low_id_user_high_id', table_name='conversations')
+    op.drop_index('ix_conversations_id', table_name='conversations')
+    op.drop_table('conversations')
@@ -0,0 +1,52 @@
+"""unique_coach_garmin_workout
+
+Revision ID: b7d2f0c3e815
+Revises: a1c4e2f7b9d0
+Create Date: 2026-10-16 10:03:27.551920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2f0c3e815'
+down_revision: Union[str, None] = 'a1c4e2f7b9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Collapse any duplicate rows left by the old row-by-row sync onto the
+    # oldest copy before enforcing uniqueness.
+    op.execute(
+        """
+        UPDATE shared_workouts SET workout_id = (
+            SELECT MIN(w2.id) FROM workouts w1
+            JOIN workouts w2
+              ON w2.coach_id = w1.coach_id AND w2.garmin_workout_id = w1.garmin_workout_id
+            WHERE w1.id = shared_workouts.workout_id
+        )
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM workouts WHERE id NOT IN (
+            SELECT keep_id FROM (
+                SELECT MIN(id) AS keep_id FROM workouts GROUP BY coach_id, garmin_workout_id
+            ) AS keepers
+        )
+        """
+    )
+    op.create_index(
+        'uq_workouts_coach_id_garmin_workout_id',
+        'workouts',
+        ['coach_id', 'garmin_workout_id'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_workouts_coach_id_garmin_workout_id', table_name='workouts')
@@ -0,0 +1,67 @@
+"""compress_workout_data
+
+Revision ID: b9e4f1a27d63
+Revises: a6d3e9c1f508
+Create Date: 2026-10-16 15:20:41.902315
+
+"""
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9e4f1a27d63'
+down_revision: Union[str, None] = 'a6d3e9c1f508'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _convert(source: str, target: str, transform) -> None:
+    workouts = sa.table(
+        'workouts',
+        sa.column('id', sa.Integer()),
+        sa.column(source),
+        sa.column(target),
+    )
+    conn = op.get_bind()
+    for row in conn.execute(sa.select(workouts.c.id, workouts.c[source])).all():
+        conn.execute(
+            workouts.update()
+            .where(workouts.c.id == row.id)
+            .values({target: transform(row[1])})
+        )
+
+
+def upgrade() -> None:
+    op.add_column('workouts', sa.Column('workout_data_compressed', sa.LargeBinary(), nullable=True))
+    _convert('workout_data', 'workout_data_compressed', lambda text: zlib.compress(text.encode()))
+    with op.batch_alter_table('workouts') as batch_op:
+        batch_op.drop_column('workout_data')
+        batch_op.alter_column(
+            'workout_data_compressed',
+            new_column_name='workout_data',
+            existing_type=sa.LargeBinary(),
+            nullable=False,
+        )
+    if op.get_bind().dialect.name == 'postgresql':
+        # Values are already compressed; keep them out of line without recompressing
+        op.execute('ALTER TABLE workouts ALTER COLUMN workout_data SET STORAGE EXTERNAL')
+        op.execute('ALTER TABLE workouts ALTER COLUMN upload_payload SET STORAGE EXTERNAL')
+
+
+def downgrade() -> None:
+    op.add_column('workouts', sa.Column('workout_data_text', sa.Text(), nullable=True))
+    _convert('workout_data', 'workout_data_text', lambda blob: zlib.decompress(blob).decode())
+    with op.batch_alter_table('workouts') as batch_op:
+        batch_op.drop_column('workout_data')
+        batch_op.alter_column(
+            'workout_data_text',
+            new_column_name='workout_data',
+            existing_type=sa.Text(),
+            nullable=False,
+        )
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('ALTER TABLE workouts ALTER COLUMN upload_payload SET STORAGE EXTENDED')
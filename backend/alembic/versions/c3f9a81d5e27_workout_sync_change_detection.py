@@ -0,0 +1,30 @@
+"""workout_sync_change_detection
+
+Revision ID: c3f9a81d5e27
+Revises: b7d2f0c3e815
+Create Date: 2026-10-16 11:20:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f9a81d5e27'
+down_revision: Union[str, None] = 'b7d2f0c3e815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('workouts', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('workouts', sa.Column('garmin_updated_date', sa.String(length=50), nullable=True))
+    op.add_column('workouts', sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('workouts', 'deleted_at')
+    op.drop_column('workouts', 'garmin_updated_date')
+    op.drop_column('workouts', 'content_hash')
@@ -0,0 +1,138 @@
+"""workout_payloads
+
+Revision ID: c4a8e2f61d39
+Revises: b9e4f1a27d63
+Create Date: 2026-10-16 16:05:12.448190
+
+"""
+import hashlib
+import json
+import zlib
+from collections import Counter
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e2f61d39'
+down_revision: Union[str, None] = 'b9e4f1a27d63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Kept in step with GarminService.canonical_json
+VOLATILE_WORKOUT_FIELDS = ("workoutId", "ownerId", "createdDate", "updatedDate")
+
+payloads_table = sa.table(
+    'workout_payloads',
+    sa.column('content_hash', sa.String()),
+    sa.column('payload', sa.LargeBinary()),
+    sa.column('ref_count', sa.Integer()),
+)
+
+
+def _canonical(upload_payload, workout_data):
+    """The upload-ready JSON of a row, or None if it cannot be recovered."""
+    if upload_payload is not None:
+        return zlib.decompress(upload_payload).decode()
+    try:
+        data = json.loads(zlib.decompress(workout_data).decode())
+    except (TypeError, ValueError, zlib.error):
+        return None
+    if not isinstance(data, dict):
+        return None
+    return json.dumps(
+        {k: v for k, v in data.items() if k not in VOLATILE_WORKOUT_FIELDS},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+
+def upgrade() -> None:
+    op.create_table(
+        'workout_payloads',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+
+    workouts = sa.table(
+        'workouts',
+        sa.column('id', sa.Integer()),
+        sa.column('workout_data', sa.LargeBinary()),
+        sa.column('upload_payload', sa.LargeBinary()),
+        sa.column('content_hash', sa.String()),
+    )
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.select(workouts.c.id, workouts.c.upload_payload, workouts.c.workout_data)
+    ).all()
+    payloads = {}
+    counts = Counter()
+    for row in rows:
+        canonical = _canonical(row.upload_payload, row.workout_data)
+        content_hash = None
+        if canonical is not None:
+            content_hash = hashlib.sha256(canonical.encode()).hexdigest()
+            payloads[content_hash] = canonical
+            counts[content_hash] += 1
+        conn.execute(
+            workouts.update().where(workouts.c.id == row.id).values(content_hash=content_hash)
+        )
+    if payloads:
+        op.bulk_insert(
+            payloads_table,
+            [
+                {'content_hash': h, 'payload': zlib.compress(p.encode()), 'ref_count': counts[h]}
+                for h, p in payloads.items()
+            ],
+        )
+
+    with op.batch_alter_table('workouts') as batch_op:
+        batch_op.drop_column('workout_data')
+        batch_op.drop_column('upload_payload')
+        batch_op.create_foreign_key(
+            'fk_workouts_content_hash_workout_payloads',
+            'workout_payloads',
+            ['content_hash'],
+            ['content_hash'],
+        )
+    if conn.dialect.name == 'postgresql':
+        # Values are already compressed; keep them out of line without recompressing
+        op.execute('ALTER TABLE workout_payloads ALTER COLUMN payload SET STORAGE EXTERNAL')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('workouts') as batch_op:
+        batch_op.drop_constraint('fk_workouts_content_hash_workout_payloads', type_='foreignkey')
+        batch_op.add_column(sa.Column('workout_data', sa.LargeBinary(), nullable=True))
+        batch_op.add_column(sa.Column('upload_payload', sa.LargeBinary(), nullable=True))
+
+    workouts = sa.table(
+        'workouts',
+        sa.column('id', sa.Integer()),
+        sa.column('content_hash', sa.String()),
+        sa.column('workout_data', sa.LargeBinary()),
+        sa.column('upload_payload', sa.LargeBinary()),
+    )
+    conn = op.get_bind()
+    payloads = dict(
+        conn.execute(sa.select(payloads_table.c.content_hash, payloads_table.c.payload)).all()
+    )
+    for row in conn.execute(sa.select(workouts.c.id, workouts.c.content_hash)).all():
+        blob = payloads.get(row.content_hash)
+        conn.execute(
+            workouts.update()
+            .where(workouts.c.id == row.id)
+            .values(workout_data=blob or zlib.compress(b'{}'), upload_payload=blob)
+        )
+
+    with op.batch_alter_table('workouts') as batch_op:
+        batch_op.alter_column('workout_data', existing_type=sa.LargeBinary(), nullable=False)
+    if conn.dialect.name == 'postgresql':
+        op.execute('ALTER TABLE workouts ALTER COLUMN workout_data SET STORAGE EXTERNAL')
+        op.execute('ALTER TABLE workouts ALTER COLUMN upload_payload SET STORAGE EXTERNAL')
+    op.drop_table('workout_payloads')
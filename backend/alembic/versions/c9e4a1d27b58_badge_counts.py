@@ -0,0 +1,36 @@
+"""badge_counts
+
+Revision ID: c9e4a1d27b58
+Revises: b5d8f2c63e17
+Create Date: 2026-10-16 21:07:52.493118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9e4a1d27b58'
+down_revision: Union[str, None] = 'b5d8f2c63e17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Rows are built on each user's first read, or by rebuild_badges.py
+    op.create_table(
+        'badge_counts',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('unread_messages', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('pending_workouts', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('unread_contacts', sa.Integer(), nullable=False, server_default=sa.text('0')),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('badge_counts')
@@ -0,0 +1,98 @@
+"""workout_structure
+
+Revision ID: d1f7b3a95e24
+Revises: c4a8e2f61d39
+Create Date: 2026-10-16 16:52:30.915604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd1f7b3a95e24'
+down_revision: Union[str, None] = 'c4a8e2f61d39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing workouts are indexed by reindex_workout_structures.py
+    op.add_column('workouts', sa.Column('sport_type_key', sa.String(length=50), nullable=True))
+    op.add_column('workouts', sa.Column('estimated_duration_seconds', sa.Integer(), nullable=True))
+    op.add_column('workouts', sa.Column('estimated_distance_meters', sa.Float(), nullable=True))
+    op.add_column('workouts', sa.Column('step_count', sa.Integer(), nullable=True))
+    op.add_column('workouts', sa.Column('max_zone', sa.Integer(), nullable=True))
+    op.create_index(
+        'ix_workouts_coach_id_estimated_duration_seconds',
+        'workouts',
+        ['coach_id', 'estimated_duration_seconds'],
+    )
+    op.create_index(
+        'ix_workouts_coach_id_estimated_distance_meters',
+        'workouts',
+        ['coach_id', 'estimated_distance_meters'],
+    )
+
+    op.create_table(
+        'workout_segments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('segment_order', sa.Integer(), nullable=False),
+        sa.Column('sport_type_key', sa.String(length=50), nullable=True),
+        sa.Column('estimated_duration_seconds', sa.Integer(), nullable=True),
+        sa.Column('estimated_distance_meters', sa.Float(), nullable=True),
+        sa.Column('step_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['content_hash'], ['workout_payloads.content_hash'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'uq_workout_segments_content_hash_segment_order',
+        'workout_segments',
+        ['content_hash', 'segment_order'],
+        unique=True,
+    )
+
+    op.create_table(
+        'workout_steps',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('segment_order', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('parent_position', sa.Integer(), nullable=True),
+        sa.Column('step_order', sa.Integer(), nullable=True),
+        sa.Column('step_type', sa.String(length=30), nullable=False),
+        sa.Column('iterations', sa.Integer(), nullable=True),
+        sa.Column('end_condition', sa.String(length=30), nullable=True),
+        sa.Column('end_condition_value', sa.Float(), nullable=True),
+        sa.Column('target_type', sa.String(length=30), nullable=True),
+        sa.Column('zone_number', sa.Integer(), nullable=True),
+        sa.Column('target_value_low', sa.Float(), nullable=True),
+        sa.Column('target_value_high', sa.Float(), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['content_hash'], ['workout_payloads.content_hash'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'uq_workout_steps_content_hash_position',
+        'workout_steps',
+        ['content_hash', 'position'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_workout_steps_content_hash_position', table_name='workout_steps')
+    op.drop_table('workout_steps')
+    op.drop_index('uq_workout_segments_content_hash_segment_order', table_name='workout_segments')
+    op.drop_table('workout_segments')
+    op.drop_index('ix_workouts_coach_id_estimated_distance_meters', table_name='workouts')
+    op.drop_index('ix_workouts_coach_id_estimated_duration_seconds', table_name='workouts')
+    with op.batch_alter_table('workouts') as batch_op:
+        batch_op.drop_column('max_zone')
+        batch_op.drop_column('step_count')
+        batch_op.drop_column('estimated_distance_meters')
+        batch_op.drop_column('estimated_duration_seconds')
+        batch_op.drop_column('sport_type_key')
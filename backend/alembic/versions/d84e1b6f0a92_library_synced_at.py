@@ -0,0 +1,26 @@
+"""library_synced_at
+
+Revision ID: d84e1b6f0a92
+Revises: c3f9a81d5e27
+Create Date: 2026-10-16 12:02:15.904337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd84e1b6f0a92'
+down_revision: Union[str, None] = 'c3f9a81d5e27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('garmin_credentials', sa.Column('library_synced_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('garmin_credentials', 'library_synced_at')
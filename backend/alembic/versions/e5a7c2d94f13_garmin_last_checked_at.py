@@ -0,0 +1,26 @@
+"""garmin_last_checked_at
+
+Revision ID: e5a7c2d94f13
+Revises: d84e1b6f0a92
+Create Date: 2026-10-16 13:11:52.620184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c2d94f13'
+down_revision: Union[str, None] = 'd84e1b6f0a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('garmin_credentials', sa.Column('last_checked_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('garmin_credentials', 'last_checked_at')
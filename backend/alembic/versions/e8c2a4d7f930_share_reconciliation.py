@@ -0,0 +1,35 @@
+"""share_reconciliation
+
+Revision ID: e8c2a4d7f930
+Revises: d1f7b3a95e24
+Create Date: 2026-10-16 17:31:08.264017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8c2a4d7f930'
+down_revision: Union[str, None] = 'd1f7b3a95e24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('garmin_credentials', sa.Column('reconciled_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        'shared_workouts',
+        sa.Column('retry_count', sa.Integer(), nullable=False, server_default=sa.text('0')),
+    )
+    op.add_column('shared_workouts', sa.Column('next_retry_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('shared_workouts') as batch_op:
+        batch_op.drop_column('next_retry_at')
+        batch_op.drop_column('retry_count')
+    with op.batch_alter_table('garmin_credentials') as batch_op:
+        batch_op.drop_column('reconciled_at')
@@ -0,0 +1,51 @@
+"""add_workout_uploads
+
+Revision ID: f2b8d6a41c07
+Revises: e5a7c2d94f13
+Create Date: 2026-10-16 14:02:17.483920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b8d6a41c07'
+down_revision: Union[str, None] = 'e5a7c2d94f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'workout_uploads',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('shared_workout_id', sa.Integer(), nullable=False),
+        sa.Column('athlete_id', sa.Integer(), nullable=False),
+        sa.Column('payload_hash', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=False),
+        sa.Column('garmin_workout_id', sa.String(length=100), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('attempted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['shared_workout_id'], ['shared_workouts.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['athlete_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_workout_uploads_id', 'workout_uploads', ['id'])
+    op.create_index('ix_workout_uploads_athlete_id', 'workout_uploads', ['athlete_id'])
+    op.create_index(
+        'uq_workout_uploads_shared_workout_id_payload_hash',
+        'workout_uploads',
+        ['shared_workout_id', 'payload_hash'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_workout_uploads_shared_workout_id_payload_hash', table_name='workout_uploads')
+    op.drop_index('ix_workout_uploads_athlete_id', table_name='workout_uploads')
+    op.drop_index('ix_workout_uploads_id', table_name='workout_uploads')
+    op.drop_table('workout_uploads')
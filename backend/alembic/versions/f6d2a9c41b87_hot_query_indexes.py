@@ -0,0 +1,67 @@
+"""hot_query_indexes
+
+Revision ID: f6d2a9c41b87
+Revises: e8c2a4d7f930
+Create Date: 2026-10-16 18:02:44.917305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6d2a9c41b87'
+down_revision: Union[str, None] = 'e8c2a4d7f930'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_coach_id_role_full_name', 'users', ['coach_id', 'role', 'full_name'], unique=False)
+    op.create_index('ix_users_role_is_active_full_name', 'users', ['role', 'is_active', 'full_name'], unique=False)
+    # Indexes of keyset-paged lists end with id, the page key's tie-breaker
+    op.create_index(
+        'ix_shared_workouts_athlete_id_status_shared_at_id',
+        'shared_workouts',
+        ['athlete_id', 'status', 'shared_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_shared_workouts_coach_id_shared_at_id',
+        'shared_workouts',
+        ['coach_id', 'shared_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_activity_logs_user_id_created_at', 'activity_logs', ['user_id', 'created_at'], unique=False
+    )
+    op.create_index(
+        'ix_messages_recipient_id_created_at_id',
+        'messages',
+        ['recipient_id', 'created_at', 'id'],
+        unique=False,
+    )
+    op.create_index(
+        'ix_messages_recipient_id_created_at_id_unread',
+        'messages',
+        ['recipient_id', 'created_at', 'id'],
+        unique=False,
+        postgresql_where=sa.text('is_read = false'),
+        sqlite_where=sa.text('is_read = 0'),
+    )
+    op.create_index(
+        'ix_messages_sender_id_created_at_id', 'messages', ['sender_id', 'created_at', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_messages_sender_id_created_at_id', table_name='messages')
+    op.drop_index('ix_messages_recipient_id_created_at_id_unread', table_name='messages')
+    op.drop_index('ix_messages_recipient_id_created_at_id', table_name='messages')
+    op.drop_index('ix_activity_logs_user_id_created_at', table_name='activity_logs')
+    op.drop_index('ix_shared_workouts_coach_id_shared_at_id', table_name='shared_workouts')
+    op.drop_index('ix_shared_workouts_athlete_id_status_shared_at_id', table_name='shared_workouts')
+    op.drop_index('ix_users_role_is_active_full_name', table_name='users')
+    op.drop_index('ix_users_coach_id_role_full_name', table_name='users')
@@ -5,11 +5,12 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
-from sqlalchemy import func, select, text
+from sqlalchemy import func, select, text, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_current_admin
+from app.api.pagination import keyset_page, page_of
 from app.api.schemas import (
     AdminStats,
     ContactRequestResponse,
@@ -29,10 +30,14 @@ from app.models.user import (
     User,
     UserRole,
     Workout,
+    WorkoutPayload,
 )
+from app.services import badges
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+USER_PAGE_KEY = (User.created_at, User.id)
+
 
 @router.get("/stats", response_model=AdminStats)
 async def get_admin_stats(
@@ -97,30 +102,35 @@ async def get_admin_stats(
 async def list_users(
     role: Optional[str] = Query(None, pattern="^(admin|coach|athlete)$"),
     search: Optional[str] = None,
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
+    include_total: bool = Query(False),
     admin: User = Depends(get_current_admin),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all users with optional filtering."""
-    query = select(User).options(selectinload(User.garmin_credentials))
-    count_query = select(func.count(User.id))
+    """List all users with optional filtering, newest first.
 
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    filters = []
     if role:
-        query = query.where(User.role == UserRole(role))
-        count_query = count_query.where(User.role == UserRole(role))
+        filters.append(User.role == UserRole(role))
     if search:
-        search_filter = (
-            User.email.ilike(f"%{search}%") | User.full_name.ilike(f"%{search}%")
-        )
-        query = query.where(search_filter)
-        count_query = count_query.where(search_filter)
+        filters.append(User.email.ilike(f"%{search}%") | User.full_name.ilike(f"%{search}%"))
 
-    total = (await db.execute(count_query)).scalar() or 0
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count(User.id)).where(*filters))).scalar() or 0
     result = await db.execute(
-        query.order_by(User.created_at.desc()).offset(skip).limit(limit)
+        keyset_page(
+            select(User).options(selectinload(User.garmin_credentials)).where(*filters),
+            USER_PAGE_KEY,
+            cursor,
+            limit,
+            descending=True,
+        )
     )
-    users = result.scalars().all()
+    users, next_cursor = page_of(result.scalars().all(), USER_PAGE_KEY, limit)
 
     return UserListResponse(
         users=[
@@ -141,6 +151,7 @@ async def list_users(
             for u in users
         ],
         total=total,
+        next_cursor=next_cursor,
     )
 
 
@@ -201,6 +212,7 @@ async def update_user(
         user.full_name = data.full_name
     if data.is_active is not None:
         user.is_active = data.is_active
+    role_changed = data.role is not None and user.role != UserRole(data.role)
     if data.role is not None:
         user.role = UserRole(data.role)
     if data.coach_id is not None:
@@ -215,6 +227,9 @@ async def update_user(
             user.coach_id = data.coach_id
 
     await db.flush()
+    if role_changed:
+        # Contact request counts only apply to admins
+        await badges.rebuild_badges(db, [user.id])
 
     return UserResponse(
         id=user.id,
@@ -246,8 +261,28 @@ async def delete_user(
     if user.id == admin.id:
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
 
+    # Their messages and shares go with them, so other users' badges change too
+    affected = set(
+        (
+            await db.execute(
+                select(Message.recipient_id).where(Message.sender_id == user.id, Message.is_read == False)
+            )
+        ).scalars()
+    )
+    affected.update(
+        (
+            await db.execute(
+                select(SharedWorkout.athlete_id).where(
+                    SharedWorkout.coach_id == user.id, SharedWorkout.status == "pending"
+                )
+            )
+        ).scalars()
+    )
     await db.delete(user)
     await db.flush()
+    affected.discard(user.id)
+    if affected:
+        await badges.rebuild_badges(db, affected)
 
 
 @router.get("/contacts", response_model=list[ContactRequestResponse])
@@ -277,8 +312,13 @@ async def mark_contact_read(
     contact = result.scalar_one_or_none()
     if not contact:
         raise HTTPException(status_code=404, detail="Contact request not found")
-    contact.is_read = True
-    await db.flush()
+    marked = await db.execute(
+        update(ContactRequest)
+        .where(ContactRequest.id == contact.id, ContactRequest.is_read.is_not(True))
+        .values(is_read=True)
+    )
+    if marked.rowcount == 1:
+        await badges.adjust_admins(db, "unread_contacts", -1)
     return {"status": "ok"}
 
 
@@ -320,11 +360,19 @@ async def download_database_backup(
             "workout_name": w.workout_name,
             "workout_type": w.workout_type,
             "description": w.description,
+            "content_hash": w.content_hash,
             "created_at": w.created_at.isoformat() if w.created_at else None,
         }
         for w in workouts
     ]
 
+    # Export workout content, once per distinct workout
+    payloads_result = await db.execute(select(WorkoutPayload).order_by(WorkoutPayload.content_hash))
+    backup["data"]["workout_payloads"] = [
+        {"content_hash": p.content_hash, "payload": p.payload}
+        for p in payloads_result.scalars().all()
+    ]
+
     # Export shared workouts
     shared_result = await db.execute(select(SharedWorkout).order_by(SharedWorkout.id))
     shared = shared_result.scalars().all()
@@ -1,14 +1,17 @@
-import json
 from datetime import datetime, timezone
+from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.api.deps import get_current_athlete, get_current_user
+from app.api.pagination import keyset_page, page_of
 from app.api.schemas import (
     CoachResponse,
+    ImportJobItemResponse,
+    ImportJobResponse,
     ImportWorkoutRequest,
     ImportWorkoutResult,
     SharedWorkoutListResponse,
@@ -16,11 +19,21 @@ from app.api.schemas import (
     UserUpdate,
 )
 from app.core.database import get_db
-from app.models.user import GarminCredentials, SharedWorkout, User, UserRole
-from app.services.garmin_service import GarminService
+from app.models.user import (
+    GarminCredentials,
+    ImportJob,
+    ImportJobItem,
+    SharedWorkout,
+    User,
+    UserRole,
+)
+from app.services import badges
+from app.services.import_jobs import import_worker
 
 router = APIRouter(prefix="/athlete", tags=["athlete"])
 
+SHARED_WORKOUT_PAGE_KEY = (SharedWorkout.shared_at, SharedWorkout.id)
+
 
 @router.get("/coaches", response_model=list[CoachResponse])
 async def list_available_coaches(
@@ -64,23 +77,36 @@ async def select_coach(
 
 @router.get("/workouts", response_model=SharedWorkoutListResponse)
 async def get_my_shared_workouts(
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    include_total: bool = Query(False),
     current_user: User = Depends(get_current_athlete),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get all workouts shared with this athlete."""
+    """Get workouts shared with this athlete, most recent first."""
+    filters = [
+        SharedWorkout.athlete_id == current_user.id,
+        SharedWorkout.status.in_(["pending", "imported", "failed"]),
+    ]
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count(SharedWorkout.id)).where(*filters))).scalar() or 0
     result = await db.execute(
-        select(SharedWorkout)
-        .options(
-            selectinload(SharedWorkout.workout),
-            selectinload(SharedWorkout.coach),
-        )
-        .where(
-            SharedWorkout.athlete_id == current_user.id,
-            SharedWorkout.status.in_(["pending", "imported", "failed"]),
+        keyset_page(
+            select(SharedWorkout).options(selectinload(SharedWorkout.workout)).where(*filters),
+            SHARED_WORKOUT_PAGE_KEY,
+            cursor,
+            limit,
+            descending=True,
         )
-        .order_by(SharedWorkout.shared_at.desc())
     )
-    shared = result.scalars().all()
+    shared, next_cursor = page_of(result.scalars().all(), SHARED_WORKOUT_PAGE_KEY, limit)
+    coach_names = {}
+    if shared:
+        result = await db.execute(
+            select(User.id, User.full_name).where(User.id.in_({s.coach_id for s in shared}))
+        )
+        coach_names = dict(result.all())
 
     return SharedWorkoutListResponse(
         workouts=[
@@ -89,7 +115,7 @@ async def get_my_shared_workouts(
                 workout_name=s.workout.workout_name,
                 workout_type=s.workout.workout_type,
                 description=s.workout.description,
-                coach_name=s.coach.full_name,
+                coach_name=coach_names.get(s.coach_id) or "Unknown",
                 status=s.status,
                 shared_at=s.shared_at,
                 imported_at=s.imported_at,
@@ -97,17 +123,50 @@ async def get_my_shared_workouts(
             )
             for s in shared
         ],
-        total=len(shared),
+        total=total,
+        next_cursor=next_cursor,
     )
 
 
-@router.post("/workouts/import", response_model=list[ImportWorkoutResult])
+def _import_job_response(
+    job: ImportJob, rejected: Optional[list[ImportWorkoutResult]] = None
+) -> ImportJobResponse:
+    return ImportJobResponse(
+        job_id=job.id,
+        status=job.status,
+        attempts=job.attempts,
+        next_run_at=job.next_run_at if job.status == "queued" else None,
+        last_error=job.last_error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        items=[
+            ImportJobItemResponse(
+                shared_workout_id=i.shared_workout_id,
+                status=i.status,
+                message=i.message,
+                garmin_import_id=i.garmin_import_id,
+            )
+            for i in job.items
+        ],
+        rejected=rejected or [],
+    )
+
+
+@router.post(
+    "/workouts/import",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
 async def import_workouts(
     data: ImportWorkoutRequest,
     current_user: User = Depends(get_current_athlete),
     db: AsyncSession = Depends(get_db),
 ):
-    """Import shared workouts into the athlete's Garmin Connect account."""
+    """Queue shared workouts for import into the athlete's Garmin Connect account.
+
+    Returns immediately with a job id; poll ``/athlete/import-jobs/{job_id}``
+    for per-workout progress.
+    """
     # Check Garmin credentials
     creds_result = await db.execute(
         select(GarminCredentials).where(GarminCredentials.user_id == current_user.id)
@@ -119,73 +178,62 @@ async def import_workouts(
             detail="Please connect your Garmin account first (Settings > Garmin Connect)",
         )
 
-    results = []
-    for sw_id in data.shared_workout_ids:
-        sw_result = await db.execute(
-            select(SharedWorkout)
-            .options(selectinload(SharedWorkout.workout))
-            .where(
-                SharedWorkout.id == sw_id,
-                SharedWorkout.athlete_id == current_user.id,
-            )
+    requested_ids = list(dict.fromkeys(data.shared_workout_ids))
+    sw_result = await db.execute(
+        select(SharedWorkout.id, SharedWorkout.status).where(
+            SharedWorkout.id.in_(requested_ids),
+            SharedWorkout.athlete_id == current_user.id,
         )
-        shared = sw_result.scalar_one_or_none()
-        if not shared:
-            results.append(ImportWorkoutResult(
+    )
+    status_by_id = dict(sw_result.all())
+
+    job = ImportJob(athlete_id=current_user.id, status="queued", attempts=0)
+    rejected = []
+    for sw_id in requested_ids:
+        if sw_id not in status_by_id:
+            rejected.append(ImportWorkoutResult(
                 shared_workout_id=sw_id,
                 success=False,
                 message="Shared workout not found or does not belong to you",
             ))
-            continue
-
-        if shared.status == "imported":
-            results.append(ImportWorkoutResult(
+        elif status_by_id[sw_id] == "imported":
+            job.items.append(ImportJobItem(
                 shared_workout_id=sw_id,
-                success=False,
+                status="skipped",
                 message="This workout has already been imported",
             ))
-            continue
-
-        # Parse workout data and import
-        try:
-            workout_data = json.loads(shared.workout.workout_data)
-        except json.JSONDecodeError:
-            results.append(ImportWorkoutResult(
-                shared_workout_id=sw_id,
-                success=False,
-                message="Workout data is corrupted. Ask your coach to re-share this workout.",
-            ))
-            shared.status = "failed"
-            shared.import_error = "Corrupted workout data"
-            continue
-
-        success, message, garmin_id = await GarminService.import_workout(
-            creds.garmin_email_encrypted,
-            creds.garmin_password_encrypted,
-            workout_data,
-        )
-
-        if success:
-            shared.status = "imported"
-            shared.imported_at = datetime.now(timezone.utc)
-            shared.garmin_import_id = garmin_id
-            results.append(ImportWorkoutResult(
-                shared_workout_id=sw_id,
-                success=True,
-                message=f"'{shared.workout.workout_name}' imported successfully to your Garmin account",
-                garmin_import_id=garmin_id,
-            ))
         else:
-            shared.status = "failed"
-            shared.import_error = message
-            results.append(ImportWorkoutResult(
-                shared_workout_id=sw_id,
-                success=False,
-                message=message,
-            ))
+            job.items.append(ImportJobItem(shared_workout_id=sw_id, status="queued"))
+
+    if not any(i.status == "queued" for i in job.items):
+        job.status = "completed"
+        job.finished_at = datetime.now(timezone.utc)
 
+    db.add(job)
     await db.flush()
-    return results
+    if job.status == "queued":
+        # Commit before waking the worker so it can see the new job
+        await db.commit()
+        import_worker.notify()
+    return _import_job_response(job, rejected)
+
+
+@router.get("/import-jobs/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: int,
+    current_user: User = Depends(get_current_athlete),
+    db: AsyncSession = Depends(get_db),
+):
+    """Report the progress of a queued workout import."""
+    result = await db.execute(
+        select(ImportJob)
+        .options(selectinload(ImportJob.items))
+        .where(ImportJob.id == job_id, ImportJob.athlete_id == current_user.id)
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return _import_job_response(job)
 
 
 @router.delete("/workouts/{shared_workout_id}")
@@ -207,4 +255,5 @@ async def remove_shared_workout(
 
     shared.status = "removed"
     await db.flush()
+    await badges.refresh_pending_workouts(db, [current_user.id])
     return {"status": "ok", "message": "Workout removed from your list"}
@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user
 from app.api.schemas import (
+    BadgeCountsResponse,
     GoogleAuthCallback,
     LoginRequest,
     RegisterRequest,
@@ -25,6 +26,7 @@ from app.core.security import (
     verify_password,
 )
 from app.models.user import ActivityLog, User, UserRole
+from app.services import badges
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -287,6 +289,15 @@ async def get_me(
     )
 
 
+@router.get("/me/badges", response_model=BadgeCountsResponse)
+async def get_my_badges(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Unread and pending counts for the dashboard badges, in one lookup."""
+    return BadgeCountsResponse(**await badges.get_badges(db, current_user.id))
+
+
 @router.put("/me", response_model=UserResponse)
 async def update_my_profile(
     data: UserUpdate,
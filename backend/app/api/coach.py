@@ -1,28 +1,50 @@
-import json
+import asyncio
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 
 from app.api.deps import get_current_coach
+from app.api.pagination import keyset_page, page_of
 from app.api.schemas import (
     AthleteConnectionCheck,
     GarminWorkoutListResponse,
     GarminWorkoutResponse,
+    PushAthleteResult,
+    PushWorkoutCell,
+    PushWorkoutsRequest,
+    PushWorkoutsResponse,
     ShareWorkoutFromGarminRequest,
     SharedWorkoutListResponse,
     SharedWorkoutResponse,
     UserListResponse,
     UserResponse,
 )
+from app.core.config import settings
 from app.core.database import get_db
-from app.models.user import GarminCredentials, SharedWorkout, User, UserRole, Workout
+from app.core.security import decrypt_value
+from app.models.user import GarminCredentials, ImportJobItem, SharedWorkout, User, UserRole, Workout
+from app.services import badges
+from app.services.connection_sweeper import connection_sweeper
 from app.services.garmin_service import GarminService
+from app.services.upload_idempotency import (
+    UploadRequest,
+    begin_uploads,
+    finish_uploads,
+    load_upload_payloads,
+    upload_for_account,
+)
+from app.services.workout_sync import library_refresher
 
 router = APIRouter(prefix="/coach", tags=["coach"])
 
+USER_PAGE_KEY = (User.full_name, User.id)
+SHARED_WORKOUT_PAGE_KEY = (SharedWorkout.shared_at, SharedWorkout.id)
+
 
 @router.get("/athletes", response_model=list[UserResponse])
 async def list_my_athletes(
@@ -61,34 +83,33 @@ async def list_all_users(
     role: Optional[str] = Query(None, pattern="^(coach|athlete)$"),
     search: Optional[str] = None,
     only_unlinked: Optional[bool] = Query(False),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
+    include_total: bool = Query(False),
     coach: User = Depends(get_current_coach),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all users (athletes and coaches) for linking purposes."""
-    query = select(User).options(selectinload(User.garmin_credentials))
-    count_query = select(func.count(User.id))
-
-    # Apply filters
+    """List all users (athletes and coaches) for linking purposes, by name."""
+    filters = []
     if role:
-        query = query.where(User.role == UserRole(role))
-        count_query = count_query.where(User.role == UserRole(role))
+        filters.append(User.role == UserRole(role))
     if search:
-        search_filter = (
-            User.email.ilike(f"%{search}%") | User.full_name.ilike(f"%{search}%")
-        )
-        query = query.where(search_filter)
-        count_query = count_query.where(search_filter)
+        filters.append(User.email.ilike(f"%{search}%") | User.full_name.ilike(f"%{search}%"))
     if only_unlinked:
-        query = query.where(User.coach_id.is_(None))
-        count_query = count_query.where(User.coach_id.is_(None))
+        filters.append(User.coach_id.is_(None))
 
-    total = (await db.execute(count_query)).scalar() or 0
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count(User.id)).where(*filters))).scalar() or 0
     result = await db.execute(
-        query.order_by(User.full_name).offset(skip).limit(limit)
+        keyset_page(
+            select(User).options(selectinload(User.garmin_credentials)).where(*filters),
+            USER_PAGE_KEY,
+            cursor,
+            limit,
+        )
     )
-    users = result.scalars().all()
+    users, next_cursor = page_of(result.scalars().all(), USER_PAGE_KEY, limit)
 
     return UserListResponse(
         users=[
@@ -109,6 +130,7 @@ async def list_all_users(
             for u in users
         ],
         total=total,
+        next_cursor=next_cursor,
     )
 
 
@@ -162,23 +184,16 @@ async def unlink_athlete(
     return {"status": "ok", "message": f"{athlete.full_name} has been unlinked"}
 
 
-@router.get("/athletes/{athlete_id}/check-connection", response_model=AthleteConnectionCheck)
-async def check_athlete_garmin_connection(
-    athlete_id: int,
-    coach: User = Depends(get_current_coach),
-    db: AsyncSession = Depends(get_db),
-):
-    """Check if an athlete's Garmin Connect account is accessible for workout sync."""
-    result = await db.execute(
-        select(User)
-        .options(selectinload(User.garmin_credentials))
-        .where(User.id == athlete_id, User.role == UserRole.ATHLETE)
-    )
-    athlete = result.scalar_one_or_none()
-    if not athlete:
-        raise HTTPException(status_code=404, detail="Athlete not found")
+def _decrypted_email(creds: GarminCredentials) -> Optional[str]:
+    try:
+        return decrypt_value(creds.garmin_email_encrypted)
+    except Exception:
+        return None
 
-    if not athlete.garmin_credentials:
+
+def _cached_connection_check(athlete: User, creds: Optional[GarminCredentials]) -> AthleteConnectionCheck:
+    """Connection status from the state kept by the background health sweeper."""
+    if creds is None:
         return AthleteConnectionCheck(
             athlete_id=athlete.id,
             is_connected=False,
@@ -190,50 +205,179 @@ async def check_athlete_garmin_connection(
                 "Once connected, you can share workouts with them",
             ],
         )
-
-    creds = athlete.garmin_credentials
     if not creds.is_connected:
         return AthleteConnectionCheck(
             athlete_id=athlete.id,
             is_connected=False,
             athlete_name=athlete.full_name,
+            garmin_email=_decrypted_email(creds),
             error_message=creds.connection_error or "Garmin account is not connected.",
             recommendations=[
                 "The athlete's Garmin credentials may be invalid",
                 "Ask the athlete to re-enter their Garmin Connect credentials",
                 "The athlete should verify they can log in at connect.garmin.com",
             ],
+            last_checked_at=creds.last_checked_at,
         )
-
-    status_info = await GarminService.check_athlete_connection(
-        creds.garmin_email_encrypted, creds.garmin_password_encrypted
+    availability = GarminService.availability(creds.garmin_email_encrypted)
+    return AthleteConnectionCheck(
+        athlete_id=athlete.id,
+        is_connected=True,
+        athlete_name=athlete.full_name,
+        garmin_email=_decrypted_email(creds),
+        error_message=creds.connection_error,
+        retry_after=availability["retry_after"],
+        last_checked_at=creds.last_checked_at,
     )
 
-    from app.core.security import decrypt_value
-
-    garmin_email = None
-    try:
-        garmin_email = decrypt_value(creds.garmin_email_encrypted)
-    except Exception:
-        pass
 
+def _live_connection_check(
+    athlete: User, creds: GarminCredentials, status_info: dict, checked_at: Optional[datetime]
+) -> AthleteConnectionCheck:
+    """Connection status from a check just made with Garmin."""
     return AthleteConnectionCheck(
         athlete_id=athlete.id,
         is_connected=status_info["is_connected"],
         athlete_name=athlete.full_name,
-        garmin_email=garmin_email,
+        garmin_email=_decrypted_email(creds),
         error_message=None if status_info["is_connected"] else status_info["message"],
         recommendations=status_info.get("recommendations", []),
+        retry_after=status_info.get("retry_after"),
+        last_checked_at=checked_at,
+    )
+
+
+@router.get("/athletes/connection-status")
+async def stream_roster_connection_status(
+    live: bool = Query(False),
+    coach: User = Depends(get_current_coach),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream the Garmin connection status of every linked athlete as NDJSON.
+
+    Athletes whose status is fresh are answered from the stored state right
+    away. Stale accounts (or all of them with ``live=true``) are checked with
+    Garmin concurrently, and each result is written out as soon as it
+    completes, one JSON object per line.
+    """
+    result = await db.execute(
+        select(User)
+        .options(joinedload(User.garmin_credentials))
+        .where(User.coach_id == coach.id, User.role == UserRole.ATHLETE)
+        .order_by(User.full_name)
+    )
+    athletes = result.unique().scalars().all()
+
+    now = datetime.now(timezone.utc)
+    cutoff = now if live else now - timedelta(seconds=settings.CONNECTION_SWEEP_INTERVAL_SECONDS)
+    fresh, stale = [], []
+    for athlete in athletes:
+        creds = athlete.garmin_credentials
+        checked_at = creds.last_checked_at if creds else None
+        if checked_at is not None and checked_at.tzinfo is None:
+            checked_at = checked_at.replace(tzinfo=timezone.utc)
+        if creds and (live or creds.is_connected) and (checked_at is None or checked_at < cutoff):
+            stale.append((athlete, creds))
+        else:
+            fresh.append(_cached_connection_check(athlete, creds))
+
+    async def check(athlete: User, creds: GarminCredentials, slots: asyncio.Semaphore) -> AthleteConnectionCheck:
+        try:
+            async with slots:
+                # Shielded so a client leaving mid-stream does not cut a check
+                # off between asking Garmin and recording the answer
+                status_info = await asyncio.shield(connection_sweeper.check(creds.id, cutoff))
+        except Exception:
+            status_info = None
+        if status_info is None:
+            # Checked by someone else in the meantime, or the check failed
+            return _cached_connection_check(athlete, creds)
+        return _live_connection_check(athlete, creds, status_info, datetime.now(timezone.utc))
+
+    async def lines():
+        for entry in fresh:
+            yield entry.model_dump_json() + "\n"
+        slots = asyncio.Semaphore(settings.ROSTER_CHECK_CONCURRENCY)
+        tasks = [asyncio.ensure_future(check(athlete, creds, slots)) for athlete, creds in stale]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield (await next_done).model_dump_json() + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/athletes/{athlete_id}/check-connection", response_model=AthleteConnectionCheck)
+async def check_athlete_garmin_connection(
+    athlete_id: int,
+    live: bool = Query(False),
+    coach: User = Depends(get_current_coach),
+    db: AsyncSession = Depends(get_db),
+):
+    """Check if an athlete's Garmin Connect account is accessible for workout sync.
+
+    Answers from the connection state kept by the background health sweeper;
+    pass ``live=true`` to check with Garmin now.
+    """
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.garmin_credentials))
+        .where(User.id == athlete_id, User.role == UserRole.ATHLETE)
     )
+    athlete = result.scalar_one_or_none()
+    if not athlete:
+        raise HTTPException(status_code=404, detail="Athlete not found")
+
+    creds = athlete.garmin_credentials
+    if creds and (live or (creds.is_connected and creds.last_checked_at is None)):
+        status_info = await GarminService.check_athlete_connection(
+            creds.garmin_email_encrypted,
+            creds.garmin_password_encrypted,
+            creds.oauth_token_encrypted,
+        )
+        GarminService.record_check(creds, status_info)
+        await db.flush()
+        return _live_connection_check(athlete, creds, status_info, creds.last_checked_at)
+
+    return _cached_connection_check(athlete, creds)
+
+
+WORKOUT_SORT_COLUMNS = {
+    "name": Workout.workout_name,
+    "duration": Workout.estimated_duration_seconds,
+    "distance": Workout.estimated_distance_meters,
+    "steps": Workout.step_count,
+}
 
 
 @router.get("/workouts", response_model=GarminWorkoutListResponse)
 async def get_my_garmin_workouts(
     workout_type: Optional[str] = Query(None, pattern="^(running|cycling|swimming|strength|other)$"),
+    search: Optional[str] = None,
+    sport_type_key: Optional[str] = None,
+    min_duration_seconds: Optional[int] = Query(None, ge=0),
+    max_duration_seconds: Optional[int] = Query(None, ge=0),
+    min_distance_meters: Optional[float] = Query(None, ge=0),
+    max_distance_meters: Optional[float] = Query(None, ge=0),
+    sort: str = Query("name", pattern="^(name|duration|distance|steps)$"),
+    descending: bool = Query(False),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    refresh: bool = Query(False),
     coach: User = Depends(get_current_coach),
     db: AsyncSession = Depends(get_db),
 ):
-    """Fetch workouts from the coach's Garmin Connect account."""
+    """List the coach's Garmin workouts from the stored library.
+
+    The list is answered from the database. When the stored copy is older
+    than the configured TTL, or ``refresh`` is set, a sync with Garmin runs
+    in the background and ``refreshing`` is returned as true; the client can
+    poll until it clears. Duration, distance and step filters and sorts use
+    the summary columns computed at sync time; workouts without a value
+    sort last.
+    """
     result = await db.execute(
         select(GarminCredentials).where(GarminCredentials.user_id == coach.id)
     )
@@ -244,54 +388,76 @@ async def get_my_garmin_workouts(
             detail="Please connect your Garmin account first (Settings > Garmin Connect)",
         )
 
-    success, message, workouts = await GarminService.get_workouts(
-        creds.garmin_email_encrypted, creds.garmin_password_encrypted
+    refreshing = library_refresher.is_refreshing(coach.id)
+    if refresh or library_refresher.is_stale(creds.library_synced_at):
+        refreshing = library_refresher.schedule(coach.id, force=refresh)
+
+    query = select(
+        Workout.garmin_workout_id,
+        Workout.workout_name,
+        Workout.workout_type,
+        Workout.description,
+        Workout.sport_type_key,
+        Workout.estimated_duration_seconds,
+        Workout.estimated_distance_meters,
+        Workout.step_count,
+        Workout.max_zone,
+    ).where(Workout.coach_id == coach.id, Workout.deleted_at.is_(None))
+    count_query = select(func.count(Workout.id)).where(
+        Workout.coach_id == coach.id, Workout.deleted_at.is_(None)
     )
-    if not success:
-        raise HTTPException(status_code=502, detail=message)
 
-    # Store/update workouts in DB
-    for w in workouts:
-        existing = await db.execute(
-            select(Workout).where(
-                Workout.garmin_workout_id == w["garmin_workout_id"],
-                Workout.coach_id == coach.id,
-            )
+    # Apply filters
+    filters = []
+    if workout_type:
+        filters.append(Workout.workout_type == workout_type)
+    if search:
+        filters.append(
+            Workout.workout_name.ilike(f"%{search}%") | Workout.description.ilike(f"%{search}%")
         )
-        db_workout = existing.scalar_one_or_none()
-        if db_workout:
-            db_workout.workout_name = w["workout_name"]
-            db_workout.workout_type = w["workout_type"]
-            db_workout.workout_data = w["workout_data"]
-            db_workout.description = w["description"]
-        else:
-            db_workout = Workout(
-                garmin_workout_id=w["garmin_workout_id"],
-                coach_id=coach.id,
-                workout_name=w["workout_name"],
-                workout_type=w["workout_type"],
-                workout_data=w["workout_data"],
-                description=w["description"],
-            )
-            db.add(db_workout)
-    await db.flush()
+    if sport_type_key:
+        filters.append(Workout.sport_type_key == sport_type_key.lower())
+    if min_duration_seconds is not None:
+        filters.append(Workout.estimated_duration_seconds >= min_duration_seconds)
+    if max_duration_seconds is not None:
+        filters.append(Workout.estimated_duration_seconds <= max_duration_seconds)
+    if min_distance_meters is not None:
+        filters.append(Workout.estimated_distance_meters >= min_distance_meters)
+    if max_distance_meters is not None:
+        filters.append(Workout.estimated_distance_meters <= max_distance_meters)
+    if filters:
+        query = query.where(*filters)
+        count_query = count_query.where(*filters)
+
+    sort_column = WORKOUT_SORT_COLUMNS[sort]
+    sort_key = sort_column.desc() if descending else sort_column.asc()
+    if sort != "name":
+        sort_key = sort_key.nulls_last()
 
-    # Filter if requested
-    filtered = workouts
-    if workout_type:
-        filtered = [w for w in workouts if w["workout_type"] == workout_type]
+    total = (await db.execute(count_query)).scalar() or 0
+    rows = await db.execute(
+        query.order_by(sort_key, Workout.workout_name, Workout.id).offset(skip).limit(limit)
+    )
 
     return GarminWorkoutListResponse(
         workouts=[
             GarminWorkoutResponse(
-                garmin_workout_id=w["garmin_workout_id"],
-                workout_name=w["workout_name"],
-                workout_type=w["workout_type"],
-                description=w["description"],
+                garmin_workout_id=w.garmin_workout_id,
+                workout_name=w.workout_name,
+                workout_type=w.workout_type,
+                description=w.description,
+                sport_type_key=w.sport_type_key,
+                estimated_duration_seconds=w.estimated_duration_seconds,
+                estimated_distance_meters=w.estimated_distance_meters,
+                step_count=w.step_count,
+                max_zone=w.max_zone,
             )
-            for w in filtered
+            for w in rows.all()
         ],
-        total=len(filtered),
+        total=total,
+        last_synced_at=creds.library_synced_at,
+        refreshing=refreshing,
+        refresh_error=library_refresher.last_error(coach.id),
     )
 
 
@@ -323,6 +489,7 @@ async def share_workouts_with_athlete(
             select(Workout).where(
                 Workout.garmin_workout_id == gw_id,
                 Workout.coach_id == coach.id,
+                Workout.deleted_at.is_(None),
             )
         )
         workout = w_result.scalar_one_or_none()
@@ -352,6 +519,7 @@ async def share_workouts_with_athlete(
         shared_count += 1
 
     await db.flush()
+    await badges.refresh_pending_workouts(db, [data.athlete_id])
 
     return {
         "status": "ok",
@@ -361,24 +529,248 @@ async def share_workouts_with_athlete(
     }
 
 
+@router.post("/push-workouts", response_model=PushWorkoutsResponse)
+async def push_workouts_to_athletes(
+    data: PushWorkoutsRequest,
+    coach: User = Depends(get_current_coach),
+    db: AsyncSession = Depends(get_db),
+):
+    """Share workouts with many athletes and import them into their Garmin accounts.
+
+    Share rows are created in one set-based insert. Uploads then run in
+    parallel across connected athletes, with a cap on accounts in flight and
+    on uploads per account. Athletes without a Garmin connection keep the
+    workouts as pending for manual import. Re-pushing after a failed or
+    timed-out upload checks the athlete's library before uploading again.
+    Shares with an import job already queued are left to that job.
+    """
+    garmin_ids = list(dict.fromkeys(data.garmin_workout_ids))
+    athlete_ids = list(dict.fromkeys(data.athlete_ids))
+    errors = []
+
+    w_result = await db.execute(
+        select(Workout)
+        .where(
+            Workout.coach_id == coach.id,
+            Workout.garmin_workout_id.in_(garmin_ids),
+            Workout.deleted_at.is_(None),
+        )
+    )
+    workouts = {w.garmin_workout_id: w for w in w_result.scalars().all()}
+    for gw_id in garmin_ids:
+        if gw_id not in workouts:
+            errors.append(f"Workout {gw_id} not found. Refresh your workout list first.")
+
+    a_result = await db.execute(
+        select(User)
+        .options(selectinload(User.garmin_credentials))
+        .where(
+            User.id.in_(athlete_ids),
+            User.role == UserRole.ATHLETE,
+            User.coach_id == coach.id,
+        )
+    )
+    athletes = {a.id: a for a in a_result.scalars().all()}
+    for athlete_id in athlete_ids:
+        if athlete_id not in athletes:
+            errors.append(f"Athlete {athlete_id} not found or not linked to you")
+
+    if not workouts or not athletes:
+        return PushWorkoutsResponse(
+            athletes=[], imported_count=0, failed_count=0, pending_count=0, errors=errors
+        )
+
+    # Existing shares, so nothing is duplicated
+    workout_ids = [w.id for w in workouts.values()]
+    existing_result = await db.execute(
+        select(
+            SharedWorkout.id,
+            SharedWorkout.workout_id,
+            SharedWorkout.athlete_id,
+            SharedWorkout.status,
+            SharedWorkout.import_error,
+        )
+        .where(
+            SharedWorkout.workout_id.in_(workout_ids),
+            SharedWorkout.athlete_id.in_(list(athletes)),
+            SharedWorkout.status.in_(["pending", "imported", "failed"]),
+        )
+        .order_by(SharedWorkout.id)
+    )
+    shares = {
+        (r.workout_id, r.athlete_id): (r.id, r.status, r.import_error) for r in existing_result.all()
+    }
+
+    new_rows = [
+        {
+            "workout_id": w.id,
+            "coach_id": coach.id,
+            "athlete_id": athlete_id,
+            "status": "pending",
+        }
+        for athlete_id in athletes
+        for w in workouts.values()
+        if (w.id, athlete_id) not in shares
+    ]
+    if new_rows:
+        inserted = await db.execute(
+            insert(SharedWorkout).returning(
+                SharedWorkout.id, SharedWorkout.workout_id, SharedWorkout.athlete_id
+            ),
+            new_rows,
+        )
+        for row in inserted.all():
+            shares[(row.workout_id, row.athlete_id)] = (row.id, "pending", None)
+
+    # Uploading next to a queued import job would race the import worker
+    queued = set(
+        (
+            await db.execute(
+                select(ImportJobItem.shared_workout_id).where(
+                    ImportJobItem.shared_workout_id.in_([share[0] for share in shares.values()]),
+                    ImportJobItem.status == "queued",
+                )
+            )
+        ).scalars()
+    )
+
+    # Upload-ready payloads are stored at sync time; load each once, not per athlete
+    payloads = await load_upload_payloads(db, workouts.values())
+    for w in workouts.values():
+        if w.id not in payloads:
+            errors.append(f"Workout '{w.workout_name}' has no stored workout data and was not pushed")
+
+    cells: dict[tuple[int, int], PushWorkoutCell] = {}
+    pushes: dict[int, list[Workout]] = {}
+    for athlete_id, athlete in athletes.items():
+        connected = athlete.garmin_credentials is not None and athlete.garmin_credentials.is_connected
+        for gw_id, w in workouts.items():
+            shared_id, share_status, import_error = shares[(w.id, athlete_id)]
+            cell = PushWorkoutCell(
+                garmin_workout_id=gw_id,
+                status="pending",
+                message="Shared. The athlete has not connected Garmin yet and can import it later.",
+                shared_workout_id=shared_id,
+            )
+            if share_status == "imported":
+                cell.status = "already_imported"
+                cell.message = "Already imported to this athlete's Garmin account"
+            elif shared_id in queued:
+                cell.message = "An import of this workout to the athlete's Garmin account is already queued"
+            elif connected and w.id in payloads:
+                pushes.setdefault(athlete_id, []).append(w)
+            elif connected:
+                cell.status = "failed"
+                cell.message = "Workout data is missing"
+            elif share_status == "failed":
+                # Not retried until the athlete reconnects; report the last attempt
+                cell.status = "failed"
+                cell.message = import_error or "Import to Garmin failed"
+            cells[(athlete_id, w.id)] = cell
+
+    uploads = {
+        athlete_id: [
+            UploadRequest.for_workout(shares[(w.id, athlete_id)][0], athlete_id, w, payloads[w.id])
+            for w in to_push
+        ]
+        for athlete_id, to_push in pushes.items()
+    }
+    if uploads:
+        # The upload records refer to the shares, so save those first
+        await db.commit()
+    await begin_uploads(db, [r for requests in uploads.values() for r in requests])
+
+    account_slots = asyncio.Semaphore(settings.GARMIN_PUSH_ACCOUNT_CONCURRENCY)
+
+    async def push(athlete_id: int, to_push: list[Workout]):
+        creds = athletes[athlete_id].garmin_credentials
+        async with account_slots:
+            await upload_for_account(creds, uploads[athlete_id])
+        GarminService.persist_session(creds)
+        return athlete_id, to_push, [r.outcome for r in uploads[athlete_id]]
+
+    pushed = await asyncio.gather(*(push(a_id, ws) for a_id, ws in pushes.items()))
+    await finish_uploads(db, [r for requests in uploads.values() for r in requests])
+
+    now = datetime.now(timezone.utc)
+    updates = []
+    for athlete_id, to_push, outcomes in pushed:
+        for w, (success, message, garmin_id) in zip(to_push, outcomes):
+            cell = cells[(athlete_id, w.id)]
+            if success:
+                cell.status = "imported"
+                cell.message = f"'{w.workout_name}' imported to Garmin"
+                cell.garmin_import_id = garmin_id
+                updates.append({
+                    "id": cell.shared_workout_id,
+                    "status": "imported",
+                    "imported_at": now,
+                    "garmin_import_id": garmin_id,
+                    "import_error": None,
+                    "retry_count": 0,
+                    "next_retry_at": None,
+                })
+            else:
+                cell.status = "failed"
+                cell.message = message
+                updates.append({
+                    "id": cell.shared_workout_id,
+                    "status": "failed",
+                    "import_error": message,
+                })
+    for status_value in ("imported", "failed"):
+        batch = [u for u in updates if u["status"] == status_value]
+        if batch:
+            await db.execute(update(SharedWorkout), batch)
+    await db.flush()
+    await badges.refresh_pending_workouts(db, athlete_ids)
+
+    all_cells = list(cells.values())
+    return PushWorkoutsResponse(
+        athletes=[
+            PushAthleteResult(
+                athlete_id=athlete.id,
+                athlete_name=athlete.full_name,
+                garmin_connected=athlete.garmin_credentials is not None
+                and athlete.garmin_credentials.is_connected,
+                results=[cells[(athlete.id, w.id)] for w in workouts.values()],
+            )
+            for athlete in athletes.values()
+        ],
+        imported_count=sum(1 for c in all_cells if c.status == "imported"),
+        failed_count=sum(1 for c in all_cells if c.status == "failed"),
+        pending_count=sum(1 for c in all_cells if c.status == "pending"),
+        errors=errors,
+    )
+
+
 @router.get("/shared-workouts", response_model=SharedWorkoutListResponse)
 async def list_shared_workouts(
     athlete_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    include_total: bool = Query(False),
     coach: User = Depends(get_current_coach),
     db: AsyncSession = Depends(get_db),
 ):
-    """List all workouts shared by this coach."""
-    query = (
-        select(SharedWorkout)
-        .options(selectinload(SharedWorkout.workout), selectinload(SharedWorkout.athlete))
-        .where(SharedWorkout.coach_id == coach.id)
-        .order_by(SharedWorkout.shared_at.desc())
-    )
+    """List workouts shared by this coach, most recent first."""
+    filters = [SharedWorkout.coach_id == coach.id]
     if athlete_id:
-        query = query.where(SharedWorkout.athlete_id == athlete_id)
+        filters.append(SharedWorkout.athlete_id == athlete_id)
 
-    result = await db.execute(query)
-    shared = result.scalars().all()
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count(SharedWorkout.id)).where(*filters))).scalar() or 0
+    result = await db.execute(
+        keyset_page(
+            select(SharedWorkout).options(selectinload(SharedWorkout.workout)).where(*filters),
+            SHARED_WORKOUT_PAGE_KEY,
+            cursor,
+            limit,
+            descending=True,
+        )
+    )
+    shared, next_cursor = page_of(result.scalars().all(), SHARED_WORKOUT_PAGE_KEY, limit)
 
     return SharedWorkoutListResponse(
         workouts=[
@@ -395,5 +787,6 @@ async def list_shared_workouts(
             )
             for s in shared
         ],
-        total=len(shared),
+        total=total,
+        next_cursor=next_cursor,
     )
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -46,9 +46,11 @@ async def connect_garmin_account(
     if creds:
         creds.garmin_email_encrypted = encrypted_email
         creds.garmin_password_encrypted = encrypted_password
+        creds.oauth_token_encrypted = None
         creds.is_connected = success
         creds.connection_error = None if success else message
         creds.last_sync = datetime.now(timezone.utc) if success else None
+        creds.last_checked_at = datetime.now(timezone.utc)
     else:
         creds = GarminCredentials(
             user_id=current_user.id,
@@ -57,9 +59,12 @@ async def connect_garmin_account(
             is_connected=success,
             connection_error=None if success else message,
             last_sync=datetime.now(timezone.utc) if success else None,
+            last_checked_at=datetime.now(timezone.utc),
         )
         db.add(creds)
 
+    if success:
+        GarminService.persist_session(creds)
     await db.flush()
 
     if not success:
@@ -106,20 +111,29 @@ async def get_garmin_status(
     except Exception:
         pass
 
+    availability = GarminService.availability(creds.garmin_email_encrypted)
     return GarminConnectionStatus(
         is_connected=creds.is_connected,
         last_sync=creds.last_sync,
         error_message=creds.connection_error,
         garmin_email=garmin_email,
+        garmin_available=availability["available"],
+        retry_after=availability["retry_after"],
+        last_checked_at=creds.last_checked_at,
     )
 
 
 @router.post("/test")
 async def test_garmin_connection(
+    live: bool = Query(False),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Test the current Garmin Connect connection."""
+    """Report whether the Garmin Connect connection works.
+
+    Answers from the state kept by the background health sweeper; pass
+    ``live=true`` to check with Garmin now.
+    """
     result = await db.execute(
         select(GarminCredentials).where(GarminCredentials.user_id == current_user.id)
     )
@@ -131,17 +145,29 @@ async def test_garmin_connection(
             detail="No Garmin account connected. Please connect first.",
         )
 
-    success, message = await GarminService.test_connection(
-        creds.garmin_email_encrypted, creds.garmin_password_encrypted
+    if not live and creds.last_checked_at is not None:
+        availability = GarminService.availability(creds.garmin_email_encrypted)
+        return {
+            "is_connected": creds.is_connected,
+            "message": creds.connection_error or "Garmin Connect account is working.",
+            "last_checked_at": creds.last_checked_at,
+            "retry_after": availability["retry_after"],
+        }
+
+    status_info = await GarminService.check_athlete_connection(
+        creds.garmin_email_encrypted,
+        creds.garmin_password_encrypted,
+        creds.oauth_token_encrypted,
     )
-
-    creds.is_connected = success
-    creds.connection_error = None if success else message
-    if success:
-        creds.last_sync = datetime.now(timezone.utc)
+    GarminService.record_check(creds, status_info)
     await db.flush()
 
-    return {"is_connected": success, "message": message}
+    return {
+        "is_connected": creds.is_connected,
+        "message": status_info["message"],
+        "last_checked_at": creds.last_checked_at,
+        "retry_after": status_info.get("retry_after"),
+    }
 
 
 @router.delete("/disconnect")
@@ -158,6 +184,7 @@ async def disconnect_garmin(
     if not creds:
         raise HTTPException(status_code=400, detail="No Garmin account connected")
 
+    GarminService.forget_session(creds.garmin_email_encrypted)
     await db.delete(creds)
     await db.flush()
     return {"status": "disconnected", "message": "Garmin account disconnected and credentials removed"}
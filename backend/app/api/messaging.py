@@ -1,16 +1,56 @@
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import func, or_, select
+from sqlalchemy import Select, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from app.api.deps import get_current_user
-from app.api.schemas import MessageCreate, MessageListResponse, MessageResponse
+from app.api.pagination import keyset_page, page_of
+from app.api.schemas import (
+    ConversationListResponse,
+    ConversationResponse,
+    MessageCreate,
+    MessageListResponse,
+    MessageResponse,
+)
 from app.core.database import get_db
-from app.models.user import Message, User, UserRole
+from app.models.user import Conversation, Message, User, UserRole
+from app.services import conversations
 
 router = APIRouter(prefix="/messages", tags=["messages"])
 
+MESSAGE_PAGE_KEY = (Message.created_at, Message.id)
+CONVERSATION_PAGE_KEY = (Conversation.last_message_at, Conversation.id)
+
+Sender = aliased(User)
+Recipient = aliased(User)
+
+
+def _with_names(query: Select) -> Select:
+    """Add the sender's and recipient's names to a query of messages."""
+    return (
+        query.add_columns(Sender.full_name, Recipient.full_name)
+        .outerjoin(Sender, Sender.id == Message.sender_id)
+        .outerjoin(Recipient, Recipient.id == Message.recipient_id)
+    )
+
+
+def _message_response(
+    message: Message, sender_name: Optional[str], recipient_name: Optional[str]
+) -> MessageResponse:
+    return MessageResponse(
+        id=message.id,
+        sender_id=message.sender_id,
+        sender_name=sender_name or "Unknown",
+        recipient_id=message.recipient_id,
+        recipient_name=recipient_name or "Unknown",
+        subject=message.subject,
+        body=message.body,
+        is_read=message.is_read,
+        created_at=message.created_at,
+    )
+
 
 @router.post("/send", response_model=MessageResponse, status_code=status.HTTP_201_CREATED)
 async def send_message(
@@ -46,8 +86,7 @@ async def send_message(
         subject=data.subject,
         body=data.body,
     )
-    db.add(message)
-    await db.flush()
+    await conversations.add_message(db, message)
 
     return MessageResponse(
         id=message.id,
@@ -65,86 +104,63 @@ async def send_message(
 @router.get("/inbox", response_model=MessageListResponse)
 async def get_inbox(
     unread_only: bool = Query(False),
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
+    include_total: bool = Query(False),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get messages received by the current user."""
-    query = select(Message).where(Message.recipient_id == current_user.id)
-    count_query = select(func.count(Message.id)).where(Message.recipient_id == current_user.id)
-
+    """Get messages received by the current user, newest first."""
+    filters = [Message.recipient_id == current_user.id]
     if unread_only:
-        query = query.where(Message.is_read == False)
-        count_query = count_query.where(Message.is_read == False)
+        filters.append(Message.is_read == False)
 
-    total = (await db.execute(count_query)).scalar() or 0
+    total = None
+    if include_total:
+        total = (await db.execute(select(func.count(Message.id)).where(*filters))).scalar() or 0
     result = await db.execute(
-        query.order_by(Message.created_at.desc()).offset(skip).limit(limit)
-    )
-    messages = result.scalars().all()
-
-    # Fetch sender/recipient names
-    response_messages = []
-    for m in messages:
-        sender = await db.execute(select(User.full_name).where(User.id == m.sender_id))
-        recipient = await db.execute(select(User.full_name).where(User.id == m.recipient_id))
-        response_messages.append(
-            MessageResponse(
-                id=m.id,
-                sender_id=m.sender_id,
-                sender_name=sender.scalar() or "Unknown",
-                recipient_id=m.recipient_id,
-                recipient_name=recipient.scalar() or "Unknown",
-                subject=m.subject,
-                body=m.body,
-                is_read=m.is_read,
-                created_at=m.created_at,
-            )
+        keyset_page(
+            _with_names(select(Message)).where(*filters),
+            MESSAGE_PAGE_KEY,
+            cursor,
+            limit,
+            descending=True,
         )
+    )
+    rows, next_cursor = page_of(result.all(), MESSAGE_PAGE_KEY, limit)
 
-    return MessageListResponse(messages=response_messages, total=total)
+    return MessageListResponse(
+        messages=[_message_response(*row) for row in rows], total=total, next_cursor=next_cursor
+    )
 
 
 @router.get("/sent", response_model=MessageListResponse)
 async def get_sent_messages(
-    skip: int = Query(0, ge=0),
+    cursor: Optional[str] = None,
     limit: int = Query(50, ge=1, le=100),
+    include_total: bool = Query(False),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get messages sent by the current user."""
-    count_query = select(func.count(Message.id)).where(Message.sender_id == current_user.id)
-    total = (await db.execute(count_query)).scalar() or 0
-
+    """Get messages sent by the current user, newest first."""
+    total = None
+    if include_total:
+        count_query = select(func.count(Message.id)).where(Message.sender_id == current_user.id)
+        total = (await db.execute(count_query)).scalar() or 0
     result = await db.execute(
-        select(Message)
-        .where(Message.sender_id == current_user.id)
-        .order_by(Message.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-    )
-    messages = result.scalars().all()
-
-    response_messages = []
-    for m in messages:
-        sender = await db.execute(select(User.full_name).where(User.id == m.sender_id))
-        recipient = await db.execute(select(User.full_name).where(User.id == m.recipient_id))
-        response_messages.append(
-            MessageResponse(
-                id=m.id,
-                sender_id=m.sender_id,
-                sender_name=sender.scalar() or "Unknown",
-                recipient_id=m.recipient_id,
-                recipient_name=recipient.scalar() or "Unknown",
-                subject=m.subject,
-                body=m.body,
-                is_read=m.is_read,
-                created_at=m.created_at,
-            )
+        keyset_page(
+            _with_names(select(Message)).where(Message.sender_id == current_user.id),
+            MESSAGE_PAGE_KEY,
+            cursor,
+            limit,
+            descending=True,
         )
+    )
+    rows, next_cursor = page_of(result.all(), MESSAGE_PAGE_KEY, limit)
 
-    return MessageListResponse(messages=response_messages, total=total)
+    return MessageListResponse(
+        messages=[_message_response(*row) for row in rows], total=total, next_cursor=next_cursor
+    )
 
 
 @router.put("/{message_id}/read")
@@ -164,8 +180,7 @@ async def mark_message_read(
     if not message:
         raise HTTPException(status_code=404, detail="Message not found")
 
-    message.is_read = True
-    await db.flush()
+    await conversations.mark_read(db, message)
     return {"status": "ok"}
 
 
@@ -199,3 +214,106 @@ async def list_messageable_coaches(
         users = result.scalars().all()
         return [{"id": u.id, "full_name": u.full_name, "email": u.email} for u in users]
     return []
+
+
+@router.get("/conversations", response_model=ConversationListResponse)
+async def list_conversations(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """List the current user's conversations, most recently active first.
+
+    Each comes with the other participant, the current user's unread count
+    and the last message, all from one query.
+    """
+    Other = aliased(User)
+    other_id = conversations.other_participant(current_user.id)
+    result = await db.execute(
+        keyset_page(
+            select(
+                Conversation,
+                other_id,
+                Other.full_name,
+                conversations.unread_count_for(current_user.id),
+                Message,
+            )
+            .outerjoin(Other, Other.id == other_id)
+            .outerjoin(Message, Message.id == Conversation.last_message_id)
+            .where(conversations.involving(current_user.id)),
+            CONVERSATION_PAGE_KEY,
+            cursor,
+            limit,
+            descending=True,
+        )
+    )
+    rows, next_cursor = page_of(result.all(), CONVERSATION_PAGE_KEY, limit)
+
+    items = []
+    for conversation, other_id, other_name, unread_count, last in rows:
+        names = {current_user.id: current_user.full_name, other_id: other_name}
+        items.append(
+            ConversationResponse(
+                id=conversation.id,
+                other_user_id=other_id,
+                other_user_name=other_name or "Unknown",
+                unread_count=unread_count,
+                last_message_at=conversation.last_message_at,
+                last_message=_message_response(
+                    last, names.get(last.sender_id), names.get(last.recipient_id)
+                )
+                if last is not None
+                else None,
+            )
+        )
+    return ConversationListResponse(conversations=items, next_cursor=next_cursor)
+
+
+async def _get_conversation(db: AsyncSession, conversation_id: int, user: User) -> Conversation:
+    result = await db.execute(
+        select(Conversation).where(
+            Conversation.id == conversation_id, conversations.involving(user.id)
+        )
+    )
+    conversation = result.scalar_one_or_none()
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+
+@router.get("/conversations/{conversation_id}/messages", response_model=MessageListResponse)
+async def get_conversation_messages(
+    conversation_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Page through one conversation, newest message first."""
+    conversation = await _get_conversation(db, conversation_id, current_user)
+    result = await db.execute(
+        keyset_page(
+            _with_names(select(Message)).where(Message.conversation_id == conversation.id),
+            MESSAGE_PAGE_KEY,
+            cursor,
+            limit,
+            descending=True,
+        )
+    )
+    rows, next_cursor = page_of(result.all(), MESSAGE_PAGE_KEY, limit)
+    return MessageListResponse(
+        messages=[_message_response(*row) for row in rows], next_cursor=next_cursor
+    )
+
+
+@router.put("/conversations/{conversation_id}/read")
+async def mark_conversation_read(
+    conversation_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Mark every message the current user received in a conversation as read."""
+    conversation = await _get_conversation(db, conversation_id, current_user)
+    marked = await conversations.mark_conversation_read(db, conversation, current_user.id)
+    return {"status": "ok", "marked": marked}
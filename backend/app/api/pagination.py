@@ -0,0 +1,78 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Opaque cursor for the sort key of the last row of a page."""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[InstrumentedAttribute]) -> List[Any]:
+    """The sort key in ``cursor``, converted to the types of ``columns``."""
+    invalid = HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise invalid
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise invalid
+
+    key = []
+    for value, column in zip(values, columns):
+        python_type = column.type.python_type
+        try:
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif not isinstance(value, python_type) or isinstance(value, bool):
+                raise TypeError
+        except (TypeError, ValueError):
+            raise invalid
+        key.append(value)
+    return key
+
+
+def keyset_page(
+    query: Select,
+    columns: Sequence[InstrumentedAttribute],
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+) -> Select:
+    """Order ``query`` by ``columns`` and select the page after ``cursor``.
+
+    The last column must be unique (normally the primary key) so the order
+    is total. Pages start from an index seek on the sort key instead of
+    skipping rows, so every page costs the same. One extra row is fetched
+    to tell whether there is a next page; see ``page_of``.
+    """
+    if cursor is not None:
+        key = tuple_(*columns)
+        after = tuple(decode_cursor(cursor, columns))
+        query = query.where(key < after if descending else key > after)
+    return query.order_by(
+        *(c.desc() if descending else c.asc() for c in columns)
+    ).limit(limit + 1)
+
+
+def page_of(
+    rows: Sequence[Any], columns: Sequence[InstrumentedAttribute], limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """Split the rows of a ``keyset_page`` query into the page and the next cursor.
+
+    Rows holding several columns (``Result.all()``) are keyed by their
+    first element, the entity being paged.
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1][0] if isinstance(rows[-1], Row) else rows[-1]
+    return rows, encode_cursor([getattr(last, c.key) for c in columns])
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.schemas import ContactRequestInput
 from app.core.database import get_db
 from app.models.user import ContactRequest
+from app.services import badges
 from app.services.email_service import send_contact_notification
 
 router = APIRouter(prefix="/public", tags=["public"])
@@ -23,6 +24,7 @@ async def submit_contact_form(
     )
     db.add(contact)
     await db.flush()
+    await badges.adjust_admins(db, "unread_contacts", 1)
     
     # Send email notification
     email_sent = await send_contact_notification(
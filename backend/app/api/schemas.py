@@ -73,7 +73,9 @@ class UserResponse(BaseModel):
 
 class UserListResponse(BaseModel):
     users: List[UserResponse]
-    total: int
+    # Only counted when asked for with include_total
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class CoachResponse(BaseModel):
@@ -98,6 +100,9 @@ class GarminConnectionStatus(BaseModel):
     last_sync: Optional[datetime] = None
     error_message: Optional[str] = None
     garmin_email: Optional[str] = None
+    garmin_available: bool = True
+    retry_after: Optional[int] = None  # seconds until Garmin calls are allowed again
+    last_checked_at: Optional[datetime] = None
 
 
 class GarminWorkoutResponse(BaseModel):
@@ -105,11 +110,19 @@ class GarminWorkoutResponse(BaseModel):
     workout_name: str
     workout_type: str
     description: Optional[str] = None
+    sport_type_key: Optional[str] = None
+    estimated_duration_seconds: Optional[int] = None
+    estimated_distance_meters: Optional[float] = None
+    step_count: Optional[int] = None
+    max_zone: Optional[int] = None
 
 
 class GarminWorkoutListResponse(BaseModel):
     workouts: List[GarminWorkoutResponse]
     total: int
+    last_synced_at: Optional[datetime] = None
+    refreshing: bool = False
+    refresh_error: Optional[str] = None
 
 
 # --- Workout Sharing Schemas ---
@@ -123,6 +136,34 @@ class ShareWorkoutFromGarminRequest(BaseModel):
     athlete_id: int
 
 
+class PushWorkoutsRequest(BaseModel):
+    garmin_workout_ids: List[str] = Field(min_length=1)
+    athlete_ids: List[int] = Field(min_length=1)
+
+
+class PushWorkoutCell(BaseModel):
+    garmin_workout_id: str
+    status: str  # imported, failed, pending, already_imported
+    message: str
+    shared_workout_id: Optional[int] = None
+    garmin_import_id: Optional[str] = None
+
+
+class PushAthleteResult(BaseModel):
+    athlete_id: int
+    athlete_name: str
+    garmin_connected: bool
+    results: List[PushWorkoutCell]
+
+
+class PushWorkoutsResponse(BaseModel):
+    athletes: List[PushAthleteResult]
+    imported_count: int
+    failed_count: int
+    pending_count: int
+    errors: List[str] = []
+
+
 class SharedWorkoutResponse(BaseModel):
     id: int
     workout_name: str
@@ -140,7 +181,8 @@ class SharedWorkoutResponse(BaseModel):
 
 class SharedWorkoutListResponse(BaseModel):
     workouts: List[SharedWorkoutResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class ImportWorkoutRequest(BaseModel):
@@ -154,6 +196,25 @@ class ImportWorkoutResult(BaseModel):
     garmin_import_id: Optional[str] = None
 
 
+class ImportJobItemResponse(BaseModel):
+    shared_workout_id: int
+    status: str
+    message: Optional[str] = None
+    garmin_import_id: Optional[str] = None
+
+
+class ImportJobResponse(BaseModel):
+    job_id: int
+    status: str
+    attempts: int
+    next_run_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    items: List[ImportJobItemResponse]
+    rejected: List[ImportWorkoutResult] = []
+
+
 class AthleteConnectionCheck(BaseModel):
     athlete_id: int
     is_connected: bool
@@ -161,6 +222,8 @@ class AthleteConnectionCheck(BaseModel):
     garmin_email: Optional[str] = None
     error_message: Optional[str] = None
     recommendations: List[str] = []
+    retry_after: Optional[int] = None  # seconds until Garmin calls are allowed again
+    last_checked_at: Optional[datetime] = None
 
 
 # --- Contact Schemas ---
@@ -231,4 +294,25 @@ class MessageResponse(BaseModel):
 
 class MessageListResponse(BaseModel):
     messages: List[MessageResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class ConversationResponse(BaseModel):
+    id: int
+    other_user_id: int
+    other_user_name: str
+    unread_count: int
+    last_message_at: datetime
+    last_message: Optional[MessageResponse] = None
+
+
+class ConversationListResponse(BaseModel):
+    conversations: List[ConversationResponse]
+    next_cursor: Optional[str] = None
+
+
+class BadgeCountsResponse(BaseModel):
+    unread_messages: int
+    pending_workouts: int
+    unread_contacts: int
@@ -53,6 +53,70 @@ class Settings(BaseSettings):
     # Encryption key for Garmin credentials at rest
     GARMIN_ENCRYPTION_KEY: str = secrets.token_urlsafe(32)
 
+    # Garmin sessions - refresh OAuth2 tokens this long before they expire
+    GARMIN_TOKEN_REFRESH_MARGIN_SECONDS: int = 300
+
+    # Garmin calls run on a dedicated thread pool so they never block the event loop
+    GARMIN_EXECUTOR_MAX_WORKERS: int = 8
+    GARMIN_CALL_TIMEOUT_SECONDS: float = 30.0
+
+    # "sync" uses garminconnect on the executor; "async" uses the native httpx client
+    GARMIN_CLIENT_MODE: str = "sync"
+    GARMIN_API_BASE_URL: str = "https://connectapi.garmin.com"
+    GARMIN_HTTP_MAX_CONNECTIONS: int = 100
+    GARMIN_HTTP_MAX_KEEPALIVE: int = 20
+    # "fake" talks to the in-process Garmin stand-in instead (tests, load benchmarks)
+    GARMIN_BACKEND: str = "live"
+    GARMIN_FAKE_LATENCY_SECONDS: float = 0.0
+    GARMIN_FAKE_ERROR_RATE: float = 0.0
+    GARMIN_FAKE_THROTTLE_RATE: float = 0.0
+
+    # Concurrent uploads per account during a batch import
+    GARMIN_IMPORT_CONCURRENCY: int = 4
+    # Athlete accounts pushed to in parallel by a coach fan-out
+    GARMIN_PUSH_ACCOUNT_CONCURRENCY: int = 8
+    # Per-account throttling of Garmin calls, across all worker processes
+    GARMIN_ACCOUNT_RATE_PER_SECOND: float = 2.0
+    GARMIN_ACCOUNT_BURST: int = 10
+    GARMIN_ACCOUNT_MAX_CONCURRENCY: int = 4
+    # Consecutive throttling/connection failures before failing fast
+    GARMIN_BREAKER_FAILURE_THRESHOLD: int = 5
+    GARMIN_GLOBAL_BREAKER_FAILURE_THRESHOLD: int = 20
+    GARMIN_BREAKER_RECOVERY_SECONDS: float = 60.0
+    # uvicorn worker processes (uvicorn reads the same variable); each limits its share
+    WEB_CONCURRENCY: int = 1
+    # Workout detail fetches in parallel during a library sync
+    GARMIN_SYNC_DETAIL_CONCURRENCY: int = 4
+    # How long an athlete's Garmin workout listing is reused when checking for lost uploads
+    GARMIN_LISTING_CACHE_SECONDS: int = 120
+    # Age after which a coach's stored workout library is refreshed in the background
+    WORKOUT_LIBRARY_TTL_SECONDS: int = 300
+
+    # Background Garmin connection health checks
+    CONNECTION_SWEEP_ENABLED: bool = True
+    CONNECTION_SWEEP_INTERVAL_SECONDS: int = 3600
+    CONNECTION_SWEEP_JITTER_SECONDS: int = 300
+    CONNECTION_SWEEP_BATCH_SIZE: int = 20
+    # Pause between accounts within a sweep, to stay well under Garmin limits
+    CONNECTION_SWEEP_SPACING_SECONDS: float = 2.0
+    # Background reconciliation of shared workouts with athletes' Garmin libraries
+    RECONCILE_ENABLED: bool = True
+    RECONCILE_INTERVAL_SECONDS: int = 21600
+    RECONCILE_BATCH_SIZE: int = 20
+    RECONCILE_SPACING_SECONDS: float = 2.0
+    # Automatic re-queues of imports that failed for transient reasons
+    IMPORT_RETRY_MAX_ATTEMPTS: int = 5
+    IMPORT_RETRY_BACKOFF_SECONDS: int = 900
+    # Athlete accounts checked in parallel by the roster connection-status stream
+    ROSTER_CHECK_CONCURRENCY: int = 8
+
+    # Background import job queue
+    IMPORT_WORKER_ENABLED: bool = True
+    IMPORT_WORKER_POLL_SECONDS: float = 2.0
+    IMPORT_JOB_LEASE_SECONDS: int = 300
+    IMPORT_JOB_MAX_ATTEMPTS: int = 5
+    IMPORT_JOB_BACKOFF_SECONDS: int = 30
+
     # First admin account
     FIRST_ADMIN_EMAIL: str = "admin@transformationcoaching.com"
     FIRST_ADMIN_PASSWORD: str = "FFester1!"
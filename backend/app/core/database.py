@@ -1,3 +1,9 @@
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import LargeBinary, TypeDecorator
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 
@@ -11,6 +17,22 @@ class Base(DeclarativeBase):
     pass
 
 
+class CompressedText(TypeDecorator):
+    """Text stored zlib-compressed in a binary column.
+
+    For large values that are only ever read whole, such as JSON blobs.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect: Any) -> Optional[bytes]:
+        return None if value is None else zlib.compress(value.encode())
+
+    def process_result_value(self, value: Optional[bytes], dialect: Any) -> Optional[str]:
+        return None if value is None else zlib.decompress(value).decode()
+
+
 async def get_db() -> AsyncSession:
     async with async_session() as session:
         try:
@@ -26,3 +48,43 @@ async def get_db() -> AsyncSession:
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+
+
+UPSERT_CHUNK_SIZE = 500
+
+
+async def bulk_upsert(
+    db: AsyncSession,
+    model: Any,
+    rows: List[Dict[str, Any]],
+    conflict_columns: Sequence[str],
+    update_columns: Sequence[str],
+    increment_columns: Sequence[str] = (),
+) -> None:
+    """Insert rows, updating ``update_columns`` where ``conflict_columns`` match.
+
+    ``increment_columns`` are added to the existing value on conflict
+    instead of replacing it, atomically; with nothing to update, existing
+    rows are left alone. Uses ``INSERT ... ON CONFLICT`` on PostgreSQL and
+    SQLite, which needs a unique index over ``conflict_columns``.
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert_fn = pg_insert
+    elif dialect == "sqlite":
+        insert_fn = sqlite_insert
+    else:
+        raise NotImplementedError(f"bulk_upsert does not support the {dialect} dialect")
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = insert_fn(model).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        set_ = {col: stmt.excluded[col] for col in update_columns}
+        for col in increment_columns:
+            set_[col] = model.__table__.c[col] + stmt.excluded[col]
+        if set_:
+            stmt = stmt.on_conflict_do_update(index_elements=list(conflict_columns), set_=set_)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_columns))
+        await db.execute(stmt)
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import re
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class CancelOnDisconnectMiddleware:
+    """Cancel GET and HEAD requests whose client has gone away.
+
+    Without this, a coach who closes the dashboard still keeps a worker
+    thread busy waiting on Garmin. Other methods always run to completion,
+    and so do the GET paths matching one of ``keep_running`` (regular
+    expressions): those record what Garmin answered, and cancelling them
+    halfway would leave the database out of step with Garmin.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD")
+
+    def __init__(self, app: ASGIApp, keep_running: Iterable[str] = ()):
+        self.app = app
+        self.keep_running = [re.compile(pattern) for pattern in keep_running]
+
+    def _cancellable(self, scope: Scope) -> bool:
+        if scope["type"] != "http" or scope.get("method") not in self.SAFE_METHODS:
+            return False
+        return not any(pattern.fullmatch(scope.get("path", "")) for pattern in self.keep_running)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if not self._cancellable(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Safe methods carry no meaningful body, so read it up front and let
+        # the watcher own the receive channel for the rest of the request.
+        buffered = []
+        while True:
+            message = await receive()
+            buffered.append(message)
+            if message["type"] == "http.disconnect" or not message.get("more_body", False):
+                break
+        if buffered[-1]["type"] == "http.disconnect":
+            return
+
+        disconnected = asyncio.Event()
+
+        async def wrapped_receive() -> Message:
+            if buffered:
+                return buffered.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        app_task = asyncio.create_task(self.app(scope, wrapped_receive, send))
+
+        async def watch() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    if not app_task.done():
+                        logger.info(f"Client disconnected, cancelling {scope.get('path')}")
+                        app_task.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch())
+        try:
+            await app_task
+        except asyncio.CancelledError:
+            if not disconnected.is_set():
+                raise
+        finally:
+            watcher.cancel()
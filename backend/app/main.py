@@ -9,8 +9,17 @@ from sqlalchemy import select
 from app.api import admin, athlete, auth, coach, garmin, messaging, public
 from app.core.config import settings
 from app.core.database import get_db, init_db, async_session
+from app.core.middleware import CancelOnDisconnectMiddleware
 from app.core.security import get_password_hash
 from app.models.user import User, UserRole
+from app.services.connection_sweeper import connection_sweeper
+from app.services.garmin_client import close_async_client
+from app.services.garmin_executor import garmin_executor
+from app.services.garmin_limits import garmin_limiter
+from app.services.garmin_service import garmin_single_flight
+from app.services.import_jobs import import_worker
+from app.services.share_reconciler import share_reconciler
+from app.services.workout_sync import library_refresher
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,8 +31,20 @@ async def lifespan(app: FastAPI):
     await init_db()
     await create_first_admin()  # Bcrypt issue resolved - re-enabled
     await seed_default_users()
+    if settings.IMPORT_WORKER_ENABLED:
+        import_worker.start()
+    if settings.CONNECTION_SWEEP_ENABLED:
+        connection_sweeper.start()
+    if settings.RECONCILE_ENABLED:
+        share_reconciler.start()
     yield
     logger.info("Shutting down Transformation Coaching API...")
+    await import_worker.stop()
+    await connection_sweeper.stop()
+    await share_reconciler.stop()
+    await library_refresher.stop()
+    await close_async_client()
+    garmin_executor.shutdown()
 
 
 async def create_first_admin():
@@ -117,6 +138,14 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    CancelOnDisconnectMiddleware,
+    # Live connection checks record Garmin's answer on the athlete's credentials
+    keep_running=[
+        rf"{settings.API_V1_STR}/coach/athletes/connection-status",
+        rf"{settings.API_V1_STR}/coach/athletes/\d+/check-connection",
+    ],
+)
 
 
 # Global exception handler
@@ -141,4 +170,10 @@ app.include_router(public.router, prefix=settings.API_V1_STR)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "service": settings.PROJECT_NAME}
+    return {
+        "status": "healthy",
+        "service": settings.PROJECT_NAME,
+        "garmin_executor": garmin_executor.stats(),
+        "garmin_limiter": garmin_limiter.stats(),
+        "garmin_coalescing": garmin_single_flight.stats(),
+    }
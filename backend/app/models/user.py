@@ -1,10 +1,10 @@
 import enum
 from datetime import datetime, timezone
 
-from sqlalchemy import Boolean, Column, DateTime, Enum, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, Column, DateTime, Enum, Float, ForeignKey, Index, Integer, String, Text, text
 from sqlalchemy.orm import relationship
 
-from app.core.database import Base
+from app.core.database import Base, CompressedText
 
 
 class UserRole(str, enum.Enum):
@@ -30,6 +30,16 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     last_login = Column(DateTime(timezone=True), nullable=True)
 
+    __table_args__ = (
+        # A coach's roster, by name
+        Index("ix_users_coach_id_role_full_name", "coach_id", "role", "full_name"),
+        # Active coaches for athletes to pick from, by name
+        Index("ix_users_role_is_active_full_name", "role", "is_active", "full_name"),
+        # Sort keys of the paginated user lists
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_full_name_id", "full_name", "id"),
+    )
+
     # Relationships
     coach = relationship("User", remote_side="User.id", backref="athletes")
     garmin_credentials = relationship("GarminCredentials", back_populates="user", uselist=False, cascade="all, delete-orphan")
@@ -38,6 +48,7 @@ class User(Base):
     activity_logs = relationship("ActivityLog", back_populates="user", cascade="all, delete-orphan")
     messages_sent = relationship("Message", foreign_keys="Message.sender_id", back_populates="sender", cascade="all, delete-orphan")
     messages_received = relationship("Message", foreign_keys="Message.recipient_id", back_populates="recipient", cascade="all, delete-orphan")
+    badge_counts = relationship("BadgeCounts", back_populates="user", uselist=False, cascade="all, delete-orphan")
 
 
 class GarminCredentials(Base):
@@ -50,7 +61,10 @@ class GarminCredentials(Base):
     oauth_token_encrypted = Column(Text, nullable=True)
     is_connected = Column(Boolean, default=False)
     last_sync = Column(DateTime(timezone=True), nullable=True)
+    library_synced_at = Column(DateTime(timezone=True), nullable=True)  # last workout library sync
     connection_error = Column(Text, nullable=True)
+    last_checked_at = Column(DateTime(timezone=True), nullable=True)  # last connection health check
+    reconciled_at = Column(DateTime(timezone=True), nullable=True)  # last shared workout reconciliation
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
@@ -65,13 +79,95 @@ class Workout(Base):
     coach_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     workout_name = Column(String(500), nullable=False)
     workout_type = Column(String(50), nullable=False)  # running, cycling, swimming, strength
-    workout_data = Column(Text, nullable=False)  # JSON blob of full workout details
     description = Column(Text, nullable=True)
+    # sha256 of the canonical workout JSON, which is stored once in workout_payloads
+    content_hash = Column(String(64), ForeignKey("workout_payloads.content_hash"), nullable=True)
+    garmin_updated_date = Column(String(50), nullable=True)  # Garmin's updatedDate, as returned
+    # Summary of the content, computed once at sync time (see workout_structure)
+    sport_type_key = Column(String(50), nullable=True)  # Garmin's sportTypeKey, e.g. trail_running
+    estimated_duration_seconds = Column(Integer, nullable=True)
+    estimated_distance_meters = Column(Float, nullable=True)
+    step_count = Column(Integer, nullable=True)  # executable steps, repeats not expanded
+    max_zone = Column(Integer, nullable=True)  # highest heart rate or power zone targeted
+    deleted_at = Column(DateTime(timezone=True), nullable=True)  # set when removed from Garmin
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     coach = relationship("User")
     shared_workouts = relationship("SharedWorkout", back_populates="workout", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("uq_workouts_coach_id_garmin_workout_id", "coach_id", "garmin_workout_id", unique=True),
+        Index("ix_workouts_coach_id_estimated_duration_seconds", "coach_id", "estimated_duration_seconds"),
+        Index("ix_workouts_coach_id_estimated_distance_meters", "coach_id", "estimated_distance_meters"),
+    )
+
+
+class WorkoutPayload(Base):
+    """Canonical workout JSON, stored once per distinct content.
+
+    ``Workout`` rows reference it by content hash; ``ref_count`` tracks how
+    many do, and payloads nobody references are deleted.
+    """
+
+    __tablename__ = "workout_payloads"
+
+    content_hash = Column(String(64), primary_key=True)
+    payload = Column(CompressedText, nullable=False)
+    ref_count = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class WorkoutSegment(Base):
+    """One segment of a workout's content, parsed from its payload."""
+
+    __tablename__ = "workout_segments"
+
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(
+        String(64), ForeignKey("workout_payloads.content_hash", ondelete="CASCADE"), nullable=False
+    )
+    segment_order = Column(Integer, nullable=False)
+    sport_type_key = Column(String(50), nullable=True)
+    estimated_duration_seconds = Column(Integer, nullable=True)
+    estimated_distance_meters = Column(Float, nullable=True)
+    step_count = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("uq_workout_segments_content_hash_segment_order", "content_hash", "segment_order", unique=True),
+    )
+
+
+class WorkoutStep(Base):
+    """One step of a workout's content, parsed from its payload.
+
+    Steps are numbered depth-first across the whole workout in ``position``;
+    steps inside a repeat group point at the group's ``parent_position``.
+    """
+
+    __tablename__ = "workout_steps"
+
+    id = Column(Integer, primary_key=True)
+    content_hash = Column(
+        String(64), ForeignKey("workout_payloads.content_hash", ondelete="CASCADE"), nullable=False
+    )
+    segment_order = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False)
+    parent_position = Column(Integer, nullable=True)
+    step_order = Column(Integer, nullable=True)  # Garmin's stepOrder
+    step_type = Column(String(30), nullable=False)  # warmup, interval, recovery, rest, cooldown, repeat, ...
+    iterations = Column(Integer, nullable=True)  # repeat groups only
+    end_condition = Column(String(30), nullable=True)  # time, distance, lap.button, iterations, ...
+    end_condition_value = Column(Float, nullable=True)
+    target_type = Column(String(30), nullable=True)  # heart.rate.zone, pace.zone, power.zone, ...
+    zone_number = Column(Integer, nullable=True)
+    target_value_low = Column(Float, nullable=True)
+    target_value_high = Column(Float, nullable=True)
+    description = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("uq_workout_steps_content_hash_position", "content_hash", "position", unique=True),
+    )
+
 
 class SharedWorkout(Base):
     __tablename__ = "shared_workouts"
@@ -85,11 +181,21 @@ class SharedWorkout(Base):
     garmin_import_id = Column(String(100), nullable=True)
     shared_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     imported_at = Column(DateTime(timezone=True), nullable=True)
+    # Automatic re-queues of a failed import; see ShareReconciler
+    retry_count = Column(Integer, default=0, nullable=False)
+    next_retry_at = Column(DateTime(timezone=True), nullable=True)
 
     workout = relationship("Workout", back_populates="shared_workouts")
     coach = relationship("User", foreign_keys=[coach_id], back_populates="shared_workouts_sent")
     athlete = relationship("User", foreign_keys=[athlete_id], back_populates="shared_workouts_received")
 
+    __table_args__ = (
+        Index("ix_shared_workouts_athlete_id_status_shared_at_id", "athlete_id", "status", "shared_at", "id"),
+        # The athlete's list, which shows several statuses, paged by (shared_at, id)
+        Index("ix_shared_workouts_athlete_id_shared_at_id", "athlete_id", "shared_at", "id"),
+        Index("ix_shared_workouts_coach_id_shared_at_id", "coach_id", "shared_at", "id"),
+    )
+
 
 class ActivityLog(Base):
     __tablename__ = "activity_logs"
@@ -103,6 +209,8 @@ class ActivityLog(Base):
 
     user = relationship("User", back_populates="activity_logs")
 
+    __table_args__ = (Index("ix_activity_logs_user_id_created_at", "user_id", "created_at"),)
+
 
 class Message(Base):
     __tablename__ = "messages"
@@ -110,6 +218,7 @@ class Message(Base):
     id = Column(Integer, primary_key=True, index=True)
     sender_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=True)
     subject = Column(String(500), nullable=True)
     body = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
@@ -118,6 +227,45 @@ class Message(Base):
     sender = relationship("User", foreign_keys=[sender_id], back_populates="messages_sent")
     recipient = relationship("User", foreign_keys=[recipient_id], back_populates="messages_received")
 
+    __table_args__ = (
+        Index("ix_messages_recipient_id_created_at_id", "recipient_id", "created_at", "id"),
+        # Unread messages only, so the unread inbox and its count skip read mail
+        Index(
+            "ix_messages_recipient_id_created_at_id_unread",
+            "recipient_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_read = false"),
+            sqlite_where=text("is_read = 0"),
+        ),
+        Index("ix_messages_sender_id_created_at_id", "sender_id", "created_at", "id"),
+        Index("ix_messages_conversation_id_created_at_id", "conversation_id", "created_at", "id"),
+    )
+
+
+class Conversation(Base):
+    """Message thread between two users, kept up to date as messages are sent and read."""
+
+    __tablename__ = "conversations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Participants in id order, so each pair has a single row
+    user_low_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    user_high_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Not a foreign key: messages point at their conversation
+    last_message_id = Column(Integer, nullable=True)
+    last_message_at = Column(DateTime(timezone=True), nullable=False)
+    # Unread messages received by each participant
+    low_unread_count = Column(Integer, nullable=False, default=0)
+    high_unread_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        Index("uq_conversations_user_low_id_user_high_id", "user_low_id", "user_high_id", unique=True),
+        Index("ix_conversations_user_low_id_last_message_at_id", "user_low_id", "last_message_at", "id"),
+        Index("ix_conversations_user_high_id_last_message_at_id", "user_high_id", "last_message_at", "id"),
+    )
+
 
 class ContactRequest(Base):
     __tablename__ = "contact_requests"
@@ -129,3 +277,89 @@ class ContactRequest(Base):
     message = Column(Text, nullable=False)
     is_read = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+
+class ImportJob(Base):
+    """A queued batch of workout imports into one athlete's Garmin account."""
+
+    __tablename__ = "import_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    athlete_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String(50), default="queued", nullable=False)  # queued, running, completed, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_run_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+    lease_owner = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    athlete = relationship("User")
+    items = relationship("ImportJobItem", back_populates="job", cascade="all, delete-orphan", order_by="ImportJobItem.id")
+
+    __table_args__ = (Index("ix_import_jobs_status_next_run_at", "status", "next_run_at"),)
+
+
+class ImportJobItem(Base):
+    """Progress of one SharedWorkout within an ImportJob."""
+
+    __tablename__ = "import_job_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("import_jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    shared_workout_id = Column(Integer, ForeignKey("shared_workouts.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(50), default="queued", nullable=False)  # queued, imported, failed, skipped
+    message = Column(Text, nullable=True)
+    garmin_import_id = Column(String(100), nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    job = relationship("ImportJob", back_populates="items")
+    shared_workout = relationship("SharedWorkout")
+
+
+class WorkoutUpload(Base):
+    """Idempotency record for uploading one version of a shared workout.
+
+    Keyed by the shared workout and the hash of the payload sent. A record
+    left ``in_flight`` means an earlier upload may or may not have reached
+    Garmin, so the athlete's library is checked before uploading again.
+    """
+
+    __tablename__ = "workout_uploads"
+
+    id = Column(Integer, primary_key=True, index=True)
+    shared_workout_id = Column(Integer, ForeignKey("shared_workouts.id", ondelete="CASCADE"), nullable=False)
+    athlete_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    payload_hash = Column(String(64), nullable=False)
+    status = Column(String(50), default="in_flight", nullable=False)  # in_flight, imported, failed, removed
+    garmin_workout_id = Column(String(100), nullable=True)
+    attempts = Column(Integer, default=0, nullable=False)
+    attempted_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("uq_workout_uploads_shared_workout_id_payload_hash", "shared_workout_id", "payload_hash", unique=True),
+    )
+
+
+class BadgeCounts(Base):
+    """Per-user counts shown as dashboard badges.
+
+    Kept in step by the transactions that change the counted rows; see
+    ``app/services/badges.py``. Rows are created on a user's first read
+    or first counted change.
+    """
+
+    __tablename__ = "badge_counts"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    # Messages received and not read yet
+    unread_messages = Column(Integer, nullable=False, default=0)
+    # Shared workouts waiting for the athlete to import
+    pending_workouts = Column(Integer, nullable=False, default=0)
+    # Unread contact requests, for admins
+    unread_contacts = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    user = relationship("User", back_populates="badge_counts")
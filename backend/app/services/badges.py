@@ -0,0 +1,154 @@
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import bulk_upsert
+from app.models.user import BadgeCounts, ContactRequest, Message, SharedWorkout, User, UserRole
+
+BADGE_COLUMNS = ("unread_messages", "pending_workouts", "unread_contacts")
+
+
+async def _add(db: AsyncSession, user_ids: List[int], column: str, delta: int) -> int:
+    counter = getattr(BadgeCounts, column)
+    result = await db.execute(
+        update(BadgeCounts)
+        .where(BadgeCounts.user_id.in_(user_ids))
+        .values({counter: case((counter + delta > 0, counter + delta), else_=0)})
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def _create_missing(db: AsyncSession, user_ids: List[int], column: str, delta: int) -> List[int]:
+    """Create the counters rows that do not exist yet among ``user_ids``.
+
+    Rows are counted as they stood before this transaction's change of
+    ``delta`` to ``column``, which the caller then applies. A row another
+    transaction creates meanwhile wins; its count cannot include this
+    transaction's uncommitted change, so applying ``delta`` on top of it is
+    right too. Returns the ids that had no row.
+    """
+    existing = set(
+        (await db.execute(select(BadgeCounts.user_id).where(BadgeCounts.user_id.in_(user_ids)))).scalars()
+    )
+    missing = [user_id for user_id in user_ids if user_id not in existing]
+    if missing:
+        counts = await count_badges(db, missing)
+        await bulk_upsert(
+            db,
+            BadgeCounts,
+            [{"user_id": user_id, **c, column: max(c[column] - delta, 0)} for user_id, c in counts.items()],
+            conflict_columns=["user_id"],
+            update_columns=[],
+        )
+    return missing
+
+
+async def adjust(db: AsyncSession, user_ids: Iterable[int], column: str, delta: int) -> None:
+    """Add ``delta`` to one counter of the given users, never going below zero.
+
+    Call after the counted rows have changed. Users without a counters row
+    get one, counted from scratch.
+    """
+    user_ids = list(set(user_ids))
+    if not user_ids or not delta:
+        return
+    if await _add(db, user_ids, column, delta) < len(user_ids):
+        missing = await _create_missing(db, user_ids, column, delta)
+        if missing:
+            await _add(db, missing, column, delta)
+
+
+async def adjust_admins(db: AsyncSession, column: str, delta: int) -> None:
+    """Add ``delta`` to one counter of every admin."""
+    if not delta:
+        return
+    admin_ids = (await db.execute(select(User.id).where(User.role == UserRole.ADMIN))).scalars().all()
+    await adjust(db, admin_ids, column, delta)
+
+
+async def refresh_pending_workouts(db: AsyncSession, athlete_ids: Iterable[int]) -> None:
+    """Recount the pending shared workouts of the given athletes.
+
+    Share statuses change in many places (sharing, pushing, imports,
+    reconciliation), so rather than tracking each transition the count is
+    taken again, in one statement, after the change.
+    """
+    athlete_ids = list(set(athlete_ids))
+    if not athlete_ids:
+        return
+    await _create_missing(db, athlete_ids, "pending_workouts", 0)
+    await db.execute(
+        update(BadgeCounts)
+        .where(BadgeCounts.user_id.in_(athlete_ids))
+        .values(
+            pending_workouts=select(func.count(SharedWorkout.id))
+            .where(SharedWorkout.athlete_id == BadgeCounts.user_id, SharedWorkout.status == "pending")
+            .scalar_subquery()
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def count_badges(
+    db: AsyncSession, user_ids: Optional[Iterable[int]] = None
+) -> Dict[int, Dict[str, int]]:
+    """Counts taken from the counted tables, for the given users or everyone."""
+    users = select(User.id, User.role)
+    unread = select(Message.recipient_id, func.count(Message.id)).where(Message.is_read == False)
+    pending = select(SharedWorkout.athlete_id, func.count(SharedWorkout.id)).where(
+        SharedWorkout.status == "pending"
+    )
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        users = users.where(User.id.in_(user_ids))
+        unread = unread.where(Message.recipient_id.in_(user_ids))
+        pending = pending.where(SharedWorkout.athlete_id.in_(user_ids))
+    roles = dict((await db.execute(users)).all())
+    if not roles:
+        return {}
+    unread = dict((await db.execute(unread.group_by(Message.recipient_id))).all())
+    pending = dict((await db.execute(pending.group_by(SharedWorkout.athlete_id))).all())
+    contacts = 0
+    if UserRole.ADMIN in roles.values():
+        contacts = (
+            await db.execute(select(func.count(ContactRequest.id)).where(ContactRequest.is_read == False))
+        ).scalar() or 0
+
+    return {
+        user_id: {
+            "unread_messages": unread.get(user_id, 0),
+            "pending_workouts": pending.get(user_id, 0),
+            "unread_contacts": contacts if role == UserRole.ADMIN else 0,
+        }
+        for user_id, role in roles.items()
+    }
+
+
+async def rebuild_badges(db: AsyncSession, user_ids: Optional[Iterable[int]] = None) -> int:
+    """Overwrite the counters of the given users, or everyone, with fresh counts.
+
+    Returns the number of users rebuilt.
+    """
+    counts = await count_badges(db, user_ids)
+    await bulk_upsert(
+        db,
+        BadgeCounts,
+        [{"user_id": user_id, **c} for user_id, c in counts.items()],
+        conflict_columns=["user_id"],
+        update_columns=list(BADGE_COLUMNS),
+    )
+    return len(counts)
+
+
+async def get_badges(db: AsyncSession, user_id: int) -> Dict[str, int]:
+    """The user's counters, building them the first time they are asked for."""
+    query = select(*(getattr(BadgeCounts, c) for c in BADGE_COLUMNS)).where(BadgeCounts.user_id == user_id)
+    row = (await db.execute(query)).first()
+    if row is None:
+        # Transactions changing counted rows meanwhile either find this row
+        # or, in _create_missing, wait for it, then add their change on top
+        await _create_missing(db, [user_id], BADGE_COLUMNS[0], 0)
+        row = (await db.execute(query)).first()
+    return dict(row._mapping) if row is not None else dict.fromkeys(BADGE_COLUMNS, 0)
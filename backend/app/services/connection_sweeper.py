@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.user import GarminCredentials
+from app.services.garmin_service import GarminService
+
+logger = logging.getLogger(__name__)
+
+# Pause between sweeps once every account is up to date
+SWEEP_IDLE_SECONDS = 60
+
+
+class ConnectionSweeper:
+    """Periodically re-checks connected Garmin accounts in the background.
+
+    Each account is checked roughly every ``CONNECTION_SWEEP_INTERVAL_SECONDS``,
+    minus a random jitter so accounts connected at the same time drift
+    apart. Checks run one at a time with a pause in between, and accounts
+    are claimed by bumping ``last_checked_at`` so several workers can sweep
+    without checking the same account twice. Nothing is checked while the
+    Garmin-wide circuit breaker is open.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = async_session):
+        self.session_factory = session_factory
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _cutoff(now: datetime) -> datetime:
+        jitter = random.uniform(0, settings.CONNECTION_SWEEP_JITTER_SECONDS)
+        return now - timedelta(seconds=settings.CONNECTION_SWEEP_INTERVAL_SECONDS - jitter)
+
+    @staticmethod
+    def _is_due(cutoff: datetime):
+        return or_(
+            GarminCredentials.last_checked_at.is_(None),
+            GarminCredentials.last_checked_at < cutoff,
+        )
+
+    async def due_accounts(self, cutoff: datetime) -> List[int]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(GarminCredentials.id)
+                .where(GarminCredentials.is_connected.is_(True), self._is_due(cutoff))
+                .order_by(GarminCredentials.last_checked_at.asc().nulls_first())
+                .limit(settings.CONNECTION_SWEEP_BATCH_SIZE)
+            )
+            return list(result.scalars().all())
+
+    async def check(self, creds_id: int, cutoff: datetime) -> Optional[Dict[str, Any]]:
+        """Claim and check one account if it is still due.
+
+        Returns the ``check_athlete_connection`` result, or None if the
+        account was checked by someone else since ``cutoff``.
+        """
+        async with self.session_factory() as db:
+            claimed = await db.execute(
+                update(GarminCredentials)
+                .where(GarminCredentials.id == creds_id, self._is_due(cutoff))
+                .values(last_checked_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return None
+
+            creds = await db.get(GarminCredentials, creds_id)
+            if creds is None:
+                return None
+            status_info = await GarminService.check_athlete_connection(
+                creds.garmin_email_encrypted,
+                creds.garmin_password_encrypted,
+                creds.oauth_token_encrypted,
+            )
+            GarminService.record_check(creds, status_info)
+            await db.commit()
+            if status_info["status"] != "connected":
+                logger.info(f"Garmin health check for user {creds.user_id}: {status_info['message']}")
+            return status_info
+
+    async def run_once(self) -> int:
+        """Check the accounts that are due. Returns how many were checked."""
+        if not GarminService.availability()["available"]:
+            return 0
+        cutoff = self._cutoff(datetime.now(timezone.utc))
+        checked = 0
+        for creds_id in await self.due_accounts(cutoff):
+            if checked:
+                spacing = settings.CONNECTION_SWEEP_SPACING_SECONDS
+                await asyncio.sleep(random.uniform(0.5, 1.5) * spacing)
+            if not GarminService.availability()["available"]:
+                break
+            try:
+                if await self.check(creds_id, cutoff) is not None:
+                    checked += 1
+            except Exception as e:
+                logger.error(f"Garmin health check for credentials {creds_id} failed: {e}", exc_info=True)
+        return checked
+
+    async def run_forever(self) -> None:
+        logger.info("Garmin connection sweeper started")
+        while True:
+            try:
+                checked = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Garmin connection sweeper error: {e}", exc_info=True)
+                checked = 0
+            if checked < settings.CONNECTION_SWEEP_BATCH_SIZE:
+                await asyncio.sleep(SWEEP_IDLE_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+connection_sweeper = ConnectionSweeper()
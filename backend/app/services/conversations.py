@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+from typing import Tuple
+
+from sqlalchemy import case, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import bulk_upsert
+from app.models.user import Conversation, Message
+from app.services import badges
+
+
+def participants(user_id: int, other_id: int) -> Tuple[int, int]:
+    """The (user_low_id, user_high_id) pair of a conversation."""
+    return min(user_id, other_id), max(user_id, other_id)
+
+
+def _unread_column(conversation_low_id: int, user_id: int) -> str:
+    return "low_unread_count" if user_id == conversation_low_id else "high_unread_count"
+
+
+def involving(user_id: int):
+    """Filter for the conversations ``user_id`` takes part in."""
+    return or_(Conversation.user_low_id == user_id, Conversation.user_high_id == user_id)
+
+
+def unread_count_for(user_id: int):
+    """``user_id``'s unread count, as a column of a conversation query."""
+    return case(
+        (Conversation.user_low_id == user_id, Conversation.low_unread_count),
+        else_=Conversation.high_unread_count,
+    )
+
+
+def other_participant(user_id: int):
+    """The other participant's id, as a column of a conversation query."""
+    return case(
+        (Conversation.user_low_id == user_id, Conversation.user_high_id),
+        else_=Conversation.user_low_id,
+    )
+
+
+async def add_message(db: AsyncSession, message: Message) -> None:
+    """Add a new message to its conversation, creating the conversation if needed.
+
+    The conversation's unread count for the recipient is bumped in the same
+    upsert that creates or touches the row, so concurrent sends in one
+    conversation never lose an increment. Flushes ``message``.
+    """
+    if message.created_at is None:
+        message.created_at = datetime.now(timezone.utc)
+    low, high = participants(message.sender_id, message.recipient_id)
+    unread = _unread_column(low, message.recipient_id)
+    await bulk_upsert(
+        db,
+        Conversation,
+        [{
+            "user_low_id": low,
+            "user_high_id": high,
+            "last_message_at": message.created_at,
+            "low_unread_count": 1 if unread == "low_unread_count" else 0,
+            "high_unread_count": 1 if unread == "high_unread_count" else 0,
+            "created_at": message.created_at,
+        }],
+        conflict_columns=["user_low_id", "user_high_id"],
+        update_columns=["last_message_at"],
+        increment_columns=["low_unread_count", "high_unread_count"],
+    )
+    message.conversation_id = (
+        await db.execute(
+            select(Conversation.id).where(
+                Conversation.user_low_id == low, Conversation.user_high_id == high
+            )
+        )
+    ).scalar_one()
+    db.add(message)
+    await db.flush()
+    await db.execute(
+        update(Conversation)
+        .where(
+            Conversation.id == message.conversation_id,
+            or_(Conversation.last_message_id.is_(None), Conversation.last_message_id < message.id),
+        )
+        .values(last_message_id=message.id)
+        .execution_options(synchronize_session=False)
+    )
+    await badges.adjust(db, [message.recipient_id], "unread_messages", 1)
+
+
+async def mark_read(db: AsyncSession, message: Message) -> bool:
+    """Mark a received message read, updating its conversation's unread count.
+
+    Returns False if the message was already read.
+    """
+    result = await db.execute(
+        update(Message)
+        .where(Message.id == message.id, Message.is_read.is_not(True))
+        .values(is_read=True)
+    )
+    if result.rowcount != 1:
+        return False
+    if message.conversation_id is not None:
+        low, _ = participants(message.sender_id, message.recipient_id)
+        column = getattr(Conversation, _unread_column(low, message.recipient_id))
+        await db.execute(
+            update(Conversation)
+            .where(Conversation.id == message.conversation_id)
+            .values({column: case((column > 0, column - 1), else_=0)})
+            .execution_options(synchronize_session=False)
+        )
+    await badges.adjust(db, [message.recipient_id], "unread_messages", -1)
+    return True
+
+
+async def mark_conversation_read(db: AsyncSession, conversation: Conversation, user_id: int) -> int:
+    """Mark every message ``user_id`` received in ``conversation`` read.
+
+    Returns the number of messages marked.
+    """
+    result = await db.execute(
+        update(Message)
+        .where(
+            Message.conversation_id == conversation.id,
+            Message.recipient_id == user_id,
+            Message.is_read.is_not(True),
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    )
+    column = _unread_column(conversation.user_low_id, user_id)
+    await db.execute(
+        update(Conversation)
+        .where(Conversation.id == conversation.id)
+        .values({column: 0})
+        .execution_options(synchronize_session=False)
+    )
+    await badges.adjust(db, [user_id], "unread_messages", -result.rowcount)
+    return result.rowcount
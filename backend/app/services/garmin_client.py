@@ -0,0 +1,152 @@
+import logging
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from garminconnect import (
+    GarminConnectAuthenticationError,
+    GarminConnectConnectionError,
+    GarminConnectTooManyRequestsError,
+)
+
+from app.core.config import settings
+from app.services.garmin_executor import GarminCallTimeout
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "GCM-iOS-5.7.2.1"
+
+
+class AsyncGarminClient:
+    """Native asyncio client for the Garmin Connect endpoints we use.
+
+    Authentication is not handled here: callers pass the OAuth2
+    ``Authorization`` header of a session obtained through
+    ``GarminSessionManager``. Connections are pooled and kept alive, so a
+    single worker can hold many concurrent Garmin requests without a thread
+    per call.
+
+    Method names mirror ``garminconnect.Garmin`` so GarminService can
+    dispatch the same operation to either client.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.base_url = base_url or settings.GARMIN_API_BASE_URL
+        self._http = httpx.AsyncClient(
+            base_url=self.base_url,
+            transport=transport,
+            timeout=timeout or settings.GARMIN_CALL_TIMEOUT_SECONDS,
+            limits=httpx.Limits(
+                max_connections=settings.GARMIN_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GARMIN_HTTP_MAX_KEEPALIVE,
+            ),
+            headers={"User-Agent": USER_AGENT},
+        )
+
+    async def _request(
+        self, authorization: str, method: str, path: str, **kwargs: Any
+    ) -> Any:
+        try:
+            headers = {**kwargs.pop("headers", {}), "Authorization": authorization}
+            resp = await self._http.request(method, path, headers=headers, **kwargs)
+        except httpx.TimeoutException as e:
+            raise GarminCallTimeout(f"Garmin Connect did not respond in time: {e}") from e
+        except httpx.TransportError as e:
+            raise GarminConnectConnectionError(f"Connection error: {e}") from e
+
+        if resp.status_code == 401:
+            raise GarminConnectAuthenticationError(f"Authentication failed: {resp.text}")
+        if resp.status_code == 429:
+            raise GarminConnectTooManyRequestsError(f"Rate limit exceeded: {resp.text}")
+        if resp.status_code >= 400:
+            raise GarminConnectConnectionError(
+                f"API error ({resp.status_code}) for {method} {path}"
+            )
+        if resp.status_code == 204 or not resp.content:
+            return None
+        return resp.json()
+
+    async def get_workouts(
+        self, authorization: str, start: int = 0, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Return the account's workouts."""
+        return await self._request(
+            authorization,
+            "GET",
+            "/workout-service/workouts",
+            params={"start": start, "limit": limit},
+        ) or []
+
+    async def get_workout_by_id(self, authorization: str, workout_id: str) -> Dict[str, Any]:
+        """Return one workout with its full step structure."""
+        return await self._request(
+            authorization, "GET", f"/workout-service/workout/{workout_id}"
+        )
+
+    async def upload_workout(
+        self, authorization: str, workout_json: Union[Dict[str, Any], str]
+    ) -> Dict[str, Any]:
+        """Create a workout in the account.
+
+        A string is sent as the request body unchanged, like
+        ``garminconnect.Garmin.upload_workout`` accepts.
+        """
+        if isinstance(workout_json, str):
+            return await self._request(
+                authorization,
+                "POST",
+                "/workout-service/workout",
+                content=workout_json.encode(),
+                headers={"Content-Type": "application/json"},
+            )
+        return await self._request(
+            authorization, "POST", "/workout-service/workout", json=workout_json
+        )
+
+    async def get_full_name(self, authorization: str) -> Optional[str]:
+        """Return the account holder's name from their profile."""
+        profile = await self._request(
+            authorization, "GET", "/userprofile-service/socialProfile"
+        )
+        if not isinstance(profile, dict):
+            return None
+        return profile.get("fullName") or profile.get("displayName")
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+
+_client: Optional[AsyncGarminClient] = None
+
+
+def get_async_client() -> AsyncGarminClient:
+    """Shared client so connections are pooled across requests."""
+    global _client
+    if _client is None:
+        if settings.GARMIN_BACKEND == "fake":
+            from app.services.garmin_fake import FAKE_BASE_URL, create_fake_garmin_app
+
+            _client = AsyncGarminClient(
+                base_url=FAKE_BASE_URL,
+                transport=httpx.ASGITransport(app=create_fake_garmin_app()),
+            )
+        else:
+            _client = AsyncGarminClient()
+    return _client
+
+
+def set_async_client(client: Optional[AsyncGarminClient]) -> None:
+    """Replace the shared client (used by tests and alternative backends)."""
+    global _client
+    _client = client
+
+
+async def close_async_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
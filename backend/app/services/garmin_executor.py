@@ -0,0 +1,123 @@
+import asyncio
+import functools
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from garminconnect import GarminConnectConnectionError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class GarminCallTimeout(GarminConnectConnectionError):
+    """Raised when a Garmin call does not finish within its timeout."""
+
+
+class GarminExecutor:
+    """Bounded thread pool for the blocking garminconnect client.
+
+    Running Garmin calls here keeps the event loop free while Garmin is slow.
+    Calls that are still queued when their caller times out or is cancelled
+    never start; calls already running finish in the background and their
+    result is discarded.
+    """
+
+    def __init__(self, max_workers: int, default_timeout: float):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._timeouts = 0
+        self._cancelled = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="garmin"
+            )
+        return self._pool
+
+    def _instrumented(self, fn: Callable[..., T], submitted_at: float) -> Callable[[], T]:
+        def run() -> T:
+            waited = time.monotonic() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+
+        return run
+
+    async def run(
+        self, fn: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any
+    ) -> T:
+        """Run a blocking function on the pool and await its result."""
+        call = functools.partial(fn, *args, **kwargs)
+        with self._lock:
+            self._queued += 1
+        future = self._get_pool().submit(self._instrumented(call, time.monotonic()))
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), timeout or self.default_timeout
+            )
+        except asyncio.TimeoutError:
+            self._discard(future)
+            with self._lock:
+                self._timeouts += 1
+            raise GarminCallTimeout(
+                f"Garmin Connect did not respond within {timeout or self.default_timeout:.0f}s"
+            )
+        except asyncio.CancelledError:
+            self._discard(future)
+            with self._lock:
+                self._cancelled += 1
+            raise
+
+    def _discard(self, future) -> None:
+        if future.cancel():
+            # Never started, so it will not decrement the queue itself
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool utilisation for monitoring."""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "in_flight": self._running,
+                "completed": self._completed,
+                "timeouts": self._timeouts,
+                "cancelled": self._cancelled,
+                "avg_wait_ms": round(self._wait_total / started * 1000, 1) if started else 0.0,
+                "max_wait_ms": round(self._wait_max * 1000, 1),
+            }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+garmin_executor = GarminExecutor(
+    max_workers=settings.GARMIN_EXECUTOR_MAX_WORKERS,
+    default_timeout=settings.GARMIN_CALL_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,415 @@
+import asyncio
+import copy
+import json
+import random
+import secrets
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Union
+
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import JSONResponse
+from garminconnect import (
+    GarminConnectAuthenticationError,
+    GarminConnectConnectionError,
+    GarminConnectTooManyRequestsError,
+)
+
+from app.core.config import settings
+
+# Base URL the in-process stand-in is mounted under for the async client
+FAKE_BASE_URL = "http://garmin.fake"
+
+
+@dataclass
+class FakeGarminConfig:
+    """Behaviour of the stand-in: how slow and how unreliable it is."""
+
+    latency_seconds: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    token_ttl_seconds: int = 3600
+    # Unknown accounts are created on first login with the password given
+    auto_create_accounts: bool = True
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls) -> "FakeGarminConfig":
+        return cls(
+            latency_seconds=settings.GARMIN_FAKE_LATENCY_SECONDS,
+            error_rate=settings.GARMIN_FAKE_ERROR_RATE,
+            throttle_rate=settings.GARMIN_FAKE_THROTTLE_RATE,
+        )
+
+
+@dataclass
+class FakeAccount:
+    email: str
+    password: str
+    full_name: str
+    owner_id: int = 0
+    workouts: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.0")
+
+
+class FakeGarminBackend:
+    """In-memory Garmin Connect: accounts, tokens and workouts.
+
+    Every operation first rolls for a throttling or server error according
+    to the config and raises the same ``garminconnect`` exceptions the real
+    client would. Latency is not applied here; the callers sleep in the way
+    that suits them (a thread for ``FakeGarmin``, the event loop for the
+    ASGI app). Thread-safe, since sync-mode calls run on executor threads.
+    """
+
+    def __init__(self, config: Optional[FakeGarminConfig] = None):
+        self.config = config or FakeGarminConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._accounts: Dict[str, FakeAccount] = {}
+        self._oauth1: Dict[str, str] = {}
+        self._access: Dict[str, tuple] = {}
+        self._next_workout_id = 1
+        self._next_step_id = 1
+        self._next_owner_id = 1
+        self.counters: Dict[str, int] = {
+            "requests": 0,
+            "logins": 0,
+            "token_exchanges": 0,
+            "uploads": 0,
+            "errors": 0,
+            "throttled": 0,
+        }
+
+    def _count(self, name: str) -> None:
+        self.counters[name] += 1
+
+    def _roll(self) -> None:
+        with self._lock:
+            self._count("requests")
+            roll = self._random.random()
+            if roll < self.config.throttle_rate:
+                self._count("throttled")
+                raise GarminConnectTooManyRequestsError("Rate limit exceeded (fake Garmin)")
+            if roll < self.config.throttle_rate + self.config.error_rate:
+                self._count("errors")
+                raise GarminConnectConnectionError("Server error (fake Garmin)")
+
+    def add_account(
+        self,
+        email: str,
+        password: str,
+        full_name: Optional[str] = None,
+        workouts: Optional[List[Dict[str, Any]]] = None,
+    ) -> FakeAccount:
+        with self._lock:
+            account = FakeAccount(
+                email=email,
+                password=password,
+                full_name=full_name or email.split("@")[0].title(),
+                owner_id=self._next_owner_id,
+            )
+            self._next_owner_id += 1
+            self._accounts[email.strip().lower()] = account
+        for workout in workouts or []:
+            self.store_workout(account, workout)
+        return account
+
+    def account(self, email: str) -> Optional[FakeAccount]:
+        return self._accounts.get(email.strip().lower())
+
+    def revoke_tokens(self, email: str) -> None:
+        """Invalidate every token issued for an account, as a password change would."""
+        key = email.strip().lower()
+        with self._lock:
+            self._oauth1 = {t: e for t, e in self._oauth1.items() if e != key}
+            self._access = {t: v for t, v in self._access.items() if v[0] != key}
+
+    def login(self, email: str, password: str) -> str:
+        """Password login; returns a long-lived OAuth1 token."""
+        self._roll()
+        key = email.strip().lower()
+        if key not in self._accounts and self.config.auto_create_accounts:
+            self.add_account(email, password)
+        with self._lock:
+            account = self._accounts.get(key)
+            if account is None or account.password != password:
+                raise GarminConnectAuthenticationError("Invalid username or password (fake Garmin)")
+            self._count("logins")
+            token = secrets.token_urlsafe(16)
+            self._oauth1[token] = key
+            return token
+
+    def exchange(self, oauth1_token: str) -> Dict[str, Any]:
+        """Trade an OAuth1 token for a short-lived OAuth2 access token."""
+        self._roll()
+        with self._lock:
+            key = self._oauth1.get(oauth1_token)
+            if key is None:
+                raise GarminConnectAuthenticationError("Unknown OAuth1 token (fake Garmin)")
+            self._count("token_exchanges")
+            token = secrets.token_urlsafe(16)
+            expires_at = int(time.time()) + self.config.token_ttl_seconds
+            self._access[token] = (key, expires_at)
+            return {
+                "access_token": token,
+                "expires_in": self.config.token_ttl_seconds,
+                "expires_at": expires_at,
+            }
+
+    def authorize(self, authorization: Optional[str]) -> FakeAccount:
+        """Resolve an ``Authorization: Bearer`` header to its account."""
+        self._roll()
+        token = (authorization or "").removeprefix("Bearer ").strip()
+        with self._lock:
+            entry = self._access.get(token)
+            if entry is None or entry[1] <= time.time():
+                raise GarminConnectAuthenticationError("Invalid or expired access token (fake Garmin)")
+            return self._accounts[entry[0]]
+
+    def _assign_step_ids(self, steps: List[Dict[str, Any]]) -> None:
+        for step in steps:
+            step["stepId"] = self._next_step_id
+            self._next_step_id += 1
+            self._assign_step_ids(step.get("workoutSteps") or [])
+
+    def store_workout(self, account: FakeAccount, workout: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a copy of a workout with the ids, owner and dates Garmin assigns."""
+        with self._lock:
+            workout_id = self._next_workout_id
+            self._next_workout_id += 1
+            now = _now()
+            stored = {
+                **copy.deepcopy(workout),
+                "workoutId": workout_id,
+                "ownerId": account.owner_id,
+                "author": {
+                    "userProfilePk": account.owner_id,
+                    "displayName": account.email.split("@")[0],
+                    "fullName": account.full_name,
+                },
+                "createdDate": now,
+                "updatedDate": now,
+            }
+            for segment in stored.get("workoutSegments") or []:
+                self._assign_step_ids(segment.get("workoutSteps") or [])
+            account.workouts[workout_id] = stored
+            return stored
+
+    def list_workouts(self, account: FakeAccount, start: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        workouts = sorted(account.workouts.values(), key=lambda w: w["workoutId"])
+        return [
+            {k: v for k, v in w.items() if k != "workoutSegments"}
+            for w in workouts[start:start + limit]
+        ]
+
+    def get_workout(self, account: FakeAccount, workout_id: Any) -> Dict[str, Any]:
+        try:
+            return account.workouts[int(workout_id)]
+        except (KeyError, ValueError):
+            raise GarminConnectConnectionError(f"Workout {workout_id} not found (fake Garmin)")
+
+    def upload_workout(self, account: FakeAccount, workout: Dict[str, Any]) -> Dict[str, Any]:
+        stored = self.store_workout(account, workout)
+        with self._lock:
+            self._count("uploads")
+        return stored
+
+    def profile(self, account: FakeAccount) -> Dict[str, Any]:
+        return {
+            "displayName": account.email.split("@")[0],
+            "fullName": account.full_name,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "accounts": len(self._accounts),
+            "workouts": sum(len(a.workouts) for a in self._accounts.values()),
+        }
+
+
+class _FakeOAuth2Token:
+    def __init__(self, access_token: str, expires_at: int):
+        self.access_token = access_token
+        self.expires_at = expires_at
+
+    def __str__(self) -> str:
+        return f"Bearer {self.access_token}"
+
+
+class _FakeGarth:
+    """The slice of ``garth.Client`` that ``GarminSession`` relies on."""
+
+    def __init__(self, backend: FakeGarminBackend):
+        self.backend = backend
+        self.oauth1_token: Optional[str] = None
+        self.oauth2_token: Optional[_FakeOAuth2Token] = None
+
+    def refresh_oauth2(self) -> None:
+        token = self.backend.exchange(self.oauth1_token)
+        self.oauth2_token = _FakeOAuth2Token(token["access_token"], token["expires_at"])
+
+    def dumps(self) -> Optional[str]:
+        # Nothing to store until a login has succeeded
+        if self.oauth2_token is None:
+            return None
+        return json.dumps({
+            "fake_oauth1": self.oauth1_token,
+            "access_token": self.oauth2_token.access_token,
+            "expires_at": self.oauth2_token.expires_at,
+        })
+
+    def loads(self, tokens: str) -> None:
+        try:
+            data = json.loads(tokens)
+            self.oauth1_token = data["fake_oauth1"]
+            self.oauth2_token = _FakeOAuth2Token(data["access_token"], data["expires_at"])
+        except (ValueError, KeyError, TypeError):
+            raise GarminConnectAuthenticationError("Unrecognised token store (fake Garmin)")
+
+
+class FakeGarmin:
+    """Drop-in for ``garminconnect.Garmin`` backed by a ``FakeGarminBackend``.
+
+    Used by ``GarminSessionManager`` when ``GARMIN_BACKEND`` is "fake", so
+    sync-mode calls, logins and token refreshes never leave the process.
+    """
+
+    def __init__(self, email: str, password: str, backend: Optional[FakeGarminBackend] = None):
+        self.email = email
+        self.password = password
+        self.backend = backend or get_fake_backend()
+        self.garth = _FakeGarth(self.backend)
+        self.full_name: Optional[str] = None
+
+    def _delay(self) -> None:
+        if self.backend.config.latency_seconds:
+            time.sleep(self.backend.config.latency_seconds)
+
+    def login(self, tokenstore: Optional[str] = None) -> None:
+        self._delay()
+        if tokenstore:
+            self.garth.loads(tokenstore)
+        else:
+            self.garth.oauth1_token = self.backend.login(self.email, self.password)
+            self.garth.refresh_oauth2()
+        # Like the real client, the profile is loaded once at login, which
+        # also checks a stored access token
+        self.full_name = self.connectapi("/userprofile-service/socialProfile")["fullName"]
+
+    def _account(self) -> FakeAccount:
+        self._delay()
+        return self.backend.authorize(str(self.garth.oauth2_token))
+
+    def get_workouts(self, start: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        return self.backend.list_workouts(self._account(), start, limit)
+
+    def get_workout_by_id(self, workout_id: Any) -> Dict[str, Any]:
+        return self.backend.get_workout(self._account(), workout_id)
+
+    def upload_workout(self, workout_json: Union[Dict[str, Any], str]) -> Dict[str, Any]:
+        if isinstance(workout_json, str):
+            workout_json = json.loads(workout_json)
+        return self.backend.upload_workout(self._account(), workout_json)
+
+    def connectapi(self, path: str) -> Dict[str, Any]:
+        account = self._account()
+        if path != "/userprofile-service/socialProfile":
+            raise GarminConnectConnectionError(f"API client error (404): {path} (fake Garmin)")
+        return self.backend.profile(account)
+
+    def get_full_name(self) -> Optional[str]:
+        # Cached from login, without contacting Garmin, as garminconnect does
+        return self.full_name
+
+
+def create_fake_garmin_app(backend: Optional[FakeGarminBackend] = None) -> FastAPI:
+    """ASGI app serving a backend over the Garmin Connect paths we use.
+
+    Mount it in-process with ``httpx.ASGITransport`` or run it standalone
+    (``uvicorn app.services.garmin_fake:app``). Besides the workout and
+    profile endpoints it offers a simplified login and OAuth exchange; the
+    real SSO flow is not reproduced.
+    """
+    backend = backend or get_fake_backend()
+    fake = FastAPI(title="Fake Garmin Connect")
+    fake.state.backend = backend
+
+    @fake.middleware("http")
+    async def simulate_latency(request: Request, call_next):
+        if backend.config.latency_seconds:
+            await asyncio.sleep(backend.config.latency_seconds)
+        return await call_next(request)
+
+    @fake.exception_handler(GarminConnectAuthenticationError)
+    async def unauthorized(request: Request, exc: Exception):
+        return JSONResponse(status_code=401, content={"message": str(exc)})
+
+    @fake.exception_handler(GarminConnectTooManyRequestsError)
+    async def throttled(request: Request, exc: Exception):
+        return JSONResponse(status_code=429, content={"message": str(exc)}, headers={"Retry-After": "1"})
+
+    @fake.exception_handler(GarminConnectConnectionError)
+    async def server_error(request: Request, exc: Exception):
+        status = 404 if "not found" in str(exc) else 503
+        return JSONResponse(status_code=status, content={"message": str(exc)})
+
+    @fake.post("/sso/login")
+    async def login(credentials: Dict[str, str]):
+        return {"oauth1_token": backend.login(credentials.get("email", ""), credentials.get("password", ""))}
+
+    @fake.post("/oauth-service/oauth/exchange/user/2.0")
+    async def exchange(body: Dict[str, str]):
+        return backend.exchange(body.get("oauth1_token", ""))
+
+    @fake.get("/workout-service/workouts")
+    async def list_workouts(start: int = 0, limit: int = 100, authorization: str = Header(None)):
+        return backend.list_workouts(backend.authorize(authorization), start, limit)
+
+    @fake.get("/workout-service/workout/{workout_id}")
+    async def get_workout(workout_id: str, authorization: str = Header(None)):
+        return backend.get_workout(backend.authorize(authorization), workout_id)
+
+    @fake.post("/workout-service/workout")
+    async def upload_workout(workout: Dict[str, Any], authorization: str = Header(None)):
+        return backend.upload_workout(backend.authorize(authorization), workout)
+
+    @fake.get("/userprofile-service/socialProfile")
+    async def profile(authorization: str = Header(None)):
+        return backend.profile(backend.authorize(authorization))
+
+    @fake.get("/_fake/stats")
+    async def stats():
+        return backend.stats()
+
+    return fake
+
+
+_backend: Optional[FakeGarminBackend] = None
+
+
+def get_fake_backend() -> FakeGarminBackend:
+    """Shared backend, so the sync and async clients see the same accounts."""
+    global _backend
+    if _backend is None:
+        _backend = FakeGarminBackend(FakeGarminConfig.from_settings())
+    return _backend
+
+
+def set_fake_backend(backend: Optional[FakeGarminBackend]) -> None:
+    """Replace the shared backend (used by tests and benchmarks)."""
+    global _backend
+    _backend = backend
+
+
+def __getattr__(name: str) -> Any:
+    # ``uvicorn app.services.garmin_fake:app`` serves the shared backend
+    if name == "app":
+        return create_fake_garmin_app()
+    raise AttributeError(name)
@@ -0,0 +1,290 @@
+import asyncio
+import logging
+import math
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from garminconnect import GarminConnectConnectionError, GarminConnectTooManyRequestsError
+from garth.exc import GarthHTTPError
+
+from app.core.config import settings
+from app.services.garmin_session import account_key
+
+logger = logging.getLogger(__name__)
+
+# Idle account limiters are pruned once this many accounts are tracked
+MAX_TRACKED_ACCOUNTS = 10000
+
+
+class GarminUnavailable(GarminConnectConnectionError):
+    """Raised without calling Garmin while a circuit breaker is open."""
+
+    def __init__(self, scope: str, retry_after: float):
+        self.scope = scope
+        self.retry_after = max(1, math.ceil(retry_after))
+        where = " for this account" if scope == "account" else ""
+        super().__init__(
+            f"Garmin Connect is temporarily unavailable{where}. "
+            f"Retry in {self.retry_after} seconds."
+        )
+
+
+def is_unhealthy_failure(exc: BaseException) -> bool:
+    """True if an error suggests Garmin is throttling us or is down."""
+    if isinstance(exc, GarminUnavailable):
+        return False
+    if isinstance(exc, (GarminConnectTooManyRequestsError, GarminConnectConnectionError)):
+        return True
+    if isinstance(exc, GarthHTTPError):
+        status = getattr(getattr(exc.error, "response", None), "status_code", None)
+        return status is None or status == 429 or status >= 500
+    return False
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second with bursts of up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        while True:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    @property
+    def is_full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.capacity
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one trial call through
+    once ``recovery_seconds`` have passed.
+    """
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.recovery_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> Optional[float]:
+        if self.opened_at is None:
+            return None
+        return max(0.0, self.opened_at + self.recovery_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Return True if a call may go ahead, taking the trial slot if half-open."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Give back a trial slot taken by a call that never ran."""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Garmin circuit closed")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self._trial_in_flight = False
+        if self.opened_at is not None:
+            # A failed trial re-opens the circuit for another recovery period
+            self.opened_at = time.monotonic()
+            return
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            logger.warning(f"Garmin circuit opened after {self.failures} consecutive failures")
+
+    def snapshot(self) -> Dict[str, Any]:
+        retry_after = self.retry_after()
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_after": math.ceil(retry_after) if retry_after else None,
+        }
+
+
+@dataclass
+class AccountLimiter:
+    bucket: TokenBucket
+    slots: asyncio.Semaphore
+    breaker: CircuitBreaker
+    in_flight: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+class GarminLimiter:
+    """Throttles Garmin calls per account and trips breakers when Garmin struggles.
+
+    Each Garmin account gets a token bucket and a cap on concurrent calls so
+    a burst of imports cannot get it blocked. Throttling responses and
+    connection failures count towards a breaker for the account and one for
+    Garmin as a whole; while either is open, calls fail fast with
+    ``GarminUnavailable`` and a retry-after hint instead of waiting on
+    Garmin.
+
+    All of this state lives in the process. With several uvicorn workers
+    (``WEB_CONCURRENCY``) each one gets an equal share of the rate, burst
+    and concurrency, so together they stay within the configured limits.
+    Breakers are not shared: each worker opens its own after
+    ``failure_threshold`` failures.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        failure_threshold: Optional[int] = None,
+        global_failure_threshold: Optional[int] = None,
+        recovery_seconds: Optional[float] = None,
+        workers: Optional[int] = None,
+    ):
+        workers = max(1, workers or settings.WEB_CONCURRENCY)
+        self.rate = (rate or settings.GARMIN_ACCOUNT_RATE_PER_SECOND) / workers
+        self.burst = max(1, (burst or settings.GARMIN_ACCOUNT_BURST) // workers)
+        self.max_concurrency = max(
+            1, (max_concurrency or settings.GARMIN_ACCOUNT_MAX_CONCURRENCY) // workers
+        )
+        self.failure_threshold = failure_threshold or settings.GARMIN_BREAKER_FAILURE_THRESHOLD
+        self.recovery_seconds = recovery_seconds or settings.GARMIN_BREAKER_RECOVERY_SECONDS
+        self.global_breaker = CircuitBreaker(
+            global_failure_threshold or settings.GARMIN_GLOBAL_BREAKER_FAILURE_THRESHOLD,
+            self.recovery_seconds,
+        )
+        self._accounts: Dict[str, AccountLimiter] = {}
+
+    def _account(self, email: str) -> AccountLimiter:
+        key = account_key(email)
+        account = self._accounts.get(key)
+        if account is None:
+            if len(self._accounts) >= MAX_TRACKED_ACCOUNTS:
+                self._prune()
+            account = AccountLimiter(
+                bucket=TokenBucket(self.rate, self.burst),
+                slots=asyncio.Semaphore(self.max_concurrency),
+                breaker=CircuitBreaker(self.failure_threshold, self.recovery_seconds),
+            )
+            self._accounts[key] = account
+        account.last_used = time.monotonic()
+        return account
+
+    def _prune(self) -> None:
+        for key, account in list(self._accounts.items()):
+            if account.in_flight == 0 and account.breaker.state == "closed" and account.bucket.is_full:
+                del self._accounts[key]
+
+    def _admit(self, account: AccountLimiter) -> List[CircuitBreaker]:
+        """Check both breakers, returning those whose trial slot was taken."""
+        trials = []
+        for breaker, scope in ((self.global_breaker, "global"), (account.breaker, "account")):
+            half_open = breaker.state == "half_open"
+            if not breaker.allow():
+                for taken in trials:
+                    taken.release()
+                raise GarminUnavailable(scope, breaker.retry_after() or 1)
+            if half_open:
+                trials.append(breaker)
+        return trials
+
+    @asynccontextmanager
+    async def limit(self, email: str) -> AsyncIterator[None]:
+        """Guard one Garmin call (or login plus call) for an account."""
+        account = self._account(email)
+        # Fail fast before queueing behind other calls
+        for breaker, scope in ((self.global_breaker, "global"), (account.breaker, "account")):
+            if breaker.state == "open":
+                raise GarminUnavailable(scope, breaker.retry_after() or 1)
+
+        async with account.slots:
+            await account.bucket.acquire()
+            trials = self._admit(account)
+            account.in_flight += 1
+            try:
+                yield
+            except asyncio.CancelledError:
+                for breaker in trials:
+                    breaker.release()
+                raise
+            except Exception as e:
+                if is_unhealthy_failure(e):
+                    account.breaker.record_failure()
+                    self.global_breaker.record_failure()
+                else:
+                    # Garmin answered (e.g. rejected credentials), so it is reachable
+                    account.breaker.record_success()
+                    self.global_breaker.record_success()
+                raise
+            else:
+                account.breaker.record_success()
+                self.global_breaker.record_success()
+            finally:
+                account.in_flight -= 1
+
+    def availability(self, email: Optional[str] = None) -> Dict[str, Any]:
+        """Whether calls for an account (or any account) would go through now."""
+        breakers = [("global", self.global_breaker)]
+        if email:
+            account = self._accounts.get(account_key(email))
+            if account is not None:
+                breakers.append(("account", account.breaker))
+        for scope, breaker in breakers:
+            if breaker.state == "open":
+                return {
+                    "available": False,
+                    "scope": scope,
+                    "retry_after": math.ceil(breaker.retry_after() or 1),
+                }
+        return {"available": True, "scope": None, "retry_after": None}
+
+    def stats(self) -> Dict[str, Any]:
+        states = [a.breaker.state for a in self._accounts.values()]
+        return {
+            "global": self.global_breaker.snapshot(),
+            "tracked_accounts": len(self._accounts),
+            "open_accounts": sum(1 for s in states if s != "closed"),
+            "in_flight": sum(a.in_flight for a in self._accounts.values()),
+        }
+
+    def reset(self) -> None:
+        """Forget all limiter and breaker state."""
+        self._accounts.clear()
+        self.global_breaker = CircuitBreaker(
+            self.global_breaker.failure_threshold, self.recovery_seconds
+        )
+
+
+garmin_limiter = GarminLimiter()
@@ -1,34 +1,261 @@
+import asyncio
+import hashlib
 import json
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
-from garminconnect import Garmin, GarminConnectAuthenticationError, GarminConnectConnectionError
+from garminconnect import (
+    GarminConnectAuthenticationError,
+    GarminConnectConnectionError,
+    GarminConnectTooManyRequestsError,
+)
 
+from app.core.config import settings
 from app.core.security import decrypt_value, encrypt_value
+from app.services.garmin_client import get_async_client
+from app.services.garmin_executor import garmin_executor
+from app.services.garmin_limits import GarminUnavailable, garmin_limiter
+from app.services.garmin_session import credentials_key, garmin_sessions
+from app.services.single_flight import SingleFlight
+from app.services.workout_structure import classify_sport_type
 
 logger = logging.getLogger(__name__)
 
+WORKOUT_PAGE_SIZE = 100
+
+# Fields Garmin assigns per account; they are stripped before upload and
+# ignored when comparing workout content.
+VOLATILE_WORKOUT_FIELDS = ("workoutId", "ownerId", "createdDate", "updatedDate")
+
+# Everything Garmin assigns when it stores a workout, at any depth
+SERVER_ASSIGNED_FIELDS = frozenset(VOLATILE_WORKOUT_FIELDS + ("author", "stepId"))
+
+# Read-only operations that concurrent callers may share
+COALESCED_OPERATIONS = frozenset({"get_workouts", "get_workout_by_id", "get_full_name"})
+
+garmin_single_flight = SingleFlight()
+
+SOCIAL_PROFILE_PATH = "/userprofile-service/socialProfile"
+
+
+def fetch_full_name(client: Any) -> Optional[str]:
+    """Fetch the account holder's name from Garmin with the sync client.
+
+    ``Garmin.get_full_name`` only returns the name cached at login, so it
+    cannot tell whether the session still works.
+    """
+    profile = client.connectapi(SOCIAL_PROFILE_PATH)
+    if not isinstance(profile, dict):
+        return None
+    return profile.get("fullName") or profile.get("displayName")
+
+
+# Operations the sync client runs through a helper instead of its own method
+SYNC_OPERATIONS: Dict[str, Callable[..., Any]] = {"get_full_name": fetch_full_name}
+
+IMPORT_AUTH_FAILED = (
+    "Authentication failed for athlete's Garmin account. "
+    "The athlete needs to re-enter their Garmin credentials."
+)
+IMPORT_CONNECTION_FAILED = (
+    "Could not connect to Garmin Connect. "
+    "Please try again in a few minutes."
+)
+IMPORT_RATE_LIMITED = (
+    "Garmin Connect is limiting requests for this account. "
+    "The import will be retried shortly."
+)
+IMPORT_UNAVAILABLE = (
+    "Garmin Connect is temporarily unavailable. "
+    "The import will be retried shortly."
+)
+# Import failures that are transient and worth retrying later
+RETRYABLE_IMPORT_ERRORS = (IMPORT_CONNECTION_FAILED, IMPORT_RATE_LIMITED, IMPORT_UNAVAILABLE)
+
 
 class GarminService:
     """Service for interacting with Garmin Connect API."""
 
     @staticmethod
-    def _create_client(email: str, password: str) -> Garmin:
-        """Create and authenticate a Garmin Connect client."""
-        client = Garmin(email, password)
-        client.login()
-        return client
+    def _decrypt_credentials(
+        encrypted_email: str,
+        encrypted_password: str,
+        oauth_token_encrypted: Optional[str] = None,
+    ) -> Tuple[str, str, Optional[str]]:
+        email = decrypt_value(encrypted_email)
+        password = decrypt_value(encrypted_password)
+        tokens = None
+        if oauth_token_encrypted:
+            try:
+                tokens = decrypt_value(oauth_token_encrypted)
+            except Exception:
+                logger.warning("Stored Garmin OAuth token could not be decrypted; ignoring it")
+        return email, password, tokens
+
+    @staticmethod
+    async def _call(
+        encrypted_email: str,
+        encrypted_password: str,
+        operation: str,
+        *args: Any,
+        oauth_token_encrypted: Optional[str] = None,
+    ) -> Any:
+        """Run a named Garmin operation for an account.
+
+        ``operation`` is a method name shared by ``garminconnect.Garmin`` and
+        ``AsyncGarminClient``; the sync client runs the ``SYNC_OPERATIONS``
+        helper instead where its own method is not a real call. Sessions are
+        reused across calls; stored OAuth tokens are used to resume a session
+        before falling back to a password login. With the sync client, calls
+        run on the Garmin executor so the event loop stays free; with the
+        async client only logins and token refreshes touch the executor.
+        Every call goes through the per-account limiter and raises
+        ``GarminUnavailable`` while a breaker is open.
+
+        Concurrent identical reads for the same account share one Garmin
+        call, keyed by the credentials, operation and arguments.
+        """
+        email, password, tokens = GarminService._decrypt_credentials(
+            encrypted_email, encrypted_password, oauth_token_encrypted
+        )
+        if operation in COALESCED_OPERATIONS:
+            return await garmin_single_flight.do(
+                (credentials_key(email, password), operation, args),
+                lambda: GarminService._dispatch(email, password, tokens, operation, args),
+            )
+        return await GarminService._dispatch(email, password, tokens, operation, args)
+
+    @staticmethod
+    async def _dispatch(
+        email: str, password: str, tokens: Optional[str], operation: str, args: Tuple[Any, ...]
+    ) -> Any:
+        async with garmin_limiter.limit(email):
+            if settings.GARMIN_CLIENT_MODE == "async":
+                return await GarminService._call_async(email, password, tokens, operation, args)
+            helper = SYNC_OPERATIONS.get(operation)
+            return await garmin_executor.run(
+                garmin_sessions.call,
+                email,
+                password,
+                lambda client: helper(client, *args) if helper else getattr(client, operation)(*args),
+                tokens=tokens,
+            )
+
+    @staticmethod
+    async def _call_async(
+        email: str, password: str, tokens: Optional[str], operation: str, args: Tuple[Any, ...]
+    ) -> Any:
+        method = getattr(get_async_client(), operation)
+        session = garmin_sessions.cached_session(email, password)
+        if session is None:
+            session = await garmin_executor.run(garmin_sessions.get_session, email, password, tokens)
+        try:
+            return await method(session.authorization, *args)
+        except GarminConnectAuthenticationError:
+            logger.info("Garmin rejected session tokens, retrying with password login")
+            garmin_sessions.invalidate(email)
+            session = await garmin_executor.run(garmin_sessions.get_session, email, password)
+            return await method(session.authorization, *args)
+
+    @staticmethod
+    async def _authenticate(
+        encrypted_email: str,
+        encrypted_password: str,
+        oauth_token_encrypted: Optional[str] = None,
+    ) -> None:
+        """Make sure a live session exists for an account, logging in if needed."""
+        email, password, tokens = GarminService._decrypt_credentials(
+            encrypted_email, encrypted_password, oauth_token_encrypted
+        )
+        if garmin_sessions.cached_session(email, password) is None:
+            async with garmin_limiter.limit(email):
+                await garmin_executor.run(garmin_sessions.get_session, email, password, tokens)
+
+    @staticmethod
+    def availability(encrypted_email: Optional[str] = None) -> Dict[str, Any]:
+        """Circuit breaker state for an account, or for Garmin as a whole.
+
+        Returns ``available`` plus a ``retry_after`` hint in seconds when
+        calls are currently being refused.
+        """
+        email = None
+        if encrypted_email:
+            try:
+                email = decrypt_value(encrypted_email)
+            except Exception:
+                pass
+        return garmin_limiter.availability(email)
+
+    @staticmethod
+    def persist_session(creds: Any) -> bool:
+        """Store the current session tokens on a GarminCredentials row.
+
+        Only writes when the tokens have changed, so routine calls do not
+        rewrite the row. Returns True if the row was updated.
+        """
+        try:
+            tokens = garmin_sessions.tokens_for(decrypt_value(creds.garmin_email_encrypted))
+        except Exception:
+            return False
+        if not tokens:
+            return False
+        if creds.oauth_token_encrypted:
+            try:
+                if decrypt_value(creds.oauth_token_encrypted) == tokens:
+                    return False
+            except Exception:
+                pass
+        creds.oauth_token_encrypted = encrypt_value(tokens)
+        return True
+
+    @staticmethod
+    def record_check(creds: Any, status_info: Dict[str, Any]) -> None:
+        """Store the outcome of ``check_athlete_connection`` on a GarminCredentials row.
+
+        Only rejected credentials mark the account disconnected. When Garmin
+        is unreachable or throttled the error is recorded but the connection
+        flag is left alone.
+        """
+        now = datetime.now(timezone.utc)
+        creds.last_checked_at = now
+        status = status_info.get("status")
+        if status == "connected":
+            creds.is_connected = True
+            creds.connection_error = None
+            creds.last_sync = now
+            GarminService.persist_session(creds)
+        elif status == "auth_failed":
+            creds.is_connected = False
+            creds.connection_error = status_info["message"]
+        else:
+            creds.connection_error = status_info["message"]
 
     @staticmethod
-    async def test_connection(encrypted_email: str, encrypted_password: str) -> Tuple[bool, str]:
+    def forget_session(encrypted_email: str) -> None:
+        """Drop any cached session for an account (e.g. on disconnect)."""
+        try:
+            garmin_sessions.invalidate(decrypt_value(encrypted_email))
+        except Exception:
+            pass
+
+    @staticmethod
+    async def test_connection(
+        encrypted_email: str,
+        encrypted_password: str,
+        oauth_token_encrypted: Optional[str] = None,
+    ) -> Tuple[bool, str]:
         """Test Garmin Connect connectivity with stored credentials."""
         try:
-            email = decrypt_value(encrypted_email)
-            password = decrypt_value(encrypted_password)
-            client = GarminService._create_client(email, password)
-            display_name = client.get_full_name()
+            display_name = await GarminService._call(
+                encrypted_email,
+                encrypted_password,
+                "get_full_name",
+                oauth_token_encrypted=oauth_token_encrypted,
+            )
             return True, f"Successfully connected to Garmin Connect as {display_name}"
+        except GarminUnavailable as e:
+            return False, str(e)
         except GarminConnectAuthenticationError:
             return False, (
                 "Authentication failed. The Garmin Connect credentials are invalid. "
@@ -43,45 +270,100 @@ class GarminService:
             logger.error(f"Garmin connection test failed: {e}")
             return False, f"Unexpected error connecting to Garmin Connect: {str(e)}"
 
+    @staticmethod
+    def classify_workout_type(workout: Dict[str, Any]) -> str:
+        """Map Garmin's sport type onto our workout types."""
+        return classify_sport_type(workout.get("sportType"))
+
+    @staticmethod
+    def canonical_workout(workout_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Workout content without the account-specific ids and timestamps."""
+        return {k: v for k, v in workout_data.items() if k not in VOLATILE_WORKOUT_FIELDS}
+
+    @staticmethod
+    def canonical_json(workout_data: Dict[str, Any]) -> str:
+        """Compact, key-ordered JSON of a workout's content, ready to upload."""
+        return json.dumps(
+            GarminService.canonical_workout(workout_data),
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+
+    @staticmethod
+    def workout_content_hash(workout_data: Union[Dict[str, Any], str]) -> str:
+        """Stable hash of a workout's content, independent of key order.
+
+        Also accepts the output of ``canonical_json`` directly.
+        """
+        if not isinstance(workout_data, str):
+            workout_data = GarminService.canonical_json(workout_data)
+        return hashlib.sha256(workout_data.encode()).hexdigest()
+
+    @staticmethod
+    def workout_fingerprint(workout_data: Union[Dict[str, Any], str]) -> str:
+        """Hash of the content a workout keeps once Garmin stores it.
+
+        Unlike ``workout_content_hash`` this also ignores the step ids and
+        author Garmin fills in, so an uploaded payload and the workout Garmin
+        made from it hash the same.
+        """
+
+        def project(value: Any) -> Any:
+            if isinstance(value, dict):
+                return {k: project(v) for k, v in value.items() if k not in SERVER_ASSIGNED_FIELDS}
+            if isinstance(value, list):
+                return [project(v) for v in value]
+            return value
+
+        if isinstance(workout_data, str):
+            workout_data = json.loads(workout_data)
+        projected = json.dumps(project(workout_data), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(projected.encode()).hexdigest()
+
     @staticmethod
     async def get_workouts(
-        encrypted_email: str, encrypted_password: str
+        encrypted_email: str,
+        encrypted_password: str,
+        oauth_token_encrypted: Optional[str] = None,
     ) -> Tuple[bool, str, List[Dict[str, Any]]]:
-        """Fetch all workouts from a Garmin Connect account."""
+        """Fetch all workouts from a Garmin Connect account.
+
+        Garmin pages the workout list, so pages are requested until a short
+        one comes back; a partial list would make deleted-workout detection
+        unreliable.
+        """
         try:
-            email = decrypt_value(encrypted_email)
-            password = decrypt_value(encrypted_password)
-            client = GarminService._create_client(email, password)
+            workouts = []
+            start = 0
+            while True:
+                page = await GarminService._call(
+                    encrypted_email,
+                    encrypted_password,
+                    "get_workouts",
+                    start,
+                    WORKOUT_PAGE_SIZE,
+                    oauth_token_encrypted=oauth_token_encrypted,
+                ) or []
+                workouts.extend(page)
+                if len(page) < WORKOUT_PAGE_SIZE:
+                    break
+                start += WORKOUT_PAGE_SIZE
 
-            workouts = client.get_workouts()
             result = []
             for w in workouts:
-                workout_type = "other"
-                sport_type = w.get("sportType", {})
-                if isinstance(sport_type, dict):
-                    sport_key = sport_type.get("sportTypeKey", "").lower()
-                else:
-                    sport_key = str(sport_type).lower()
-
-                if "running" in sport_key or "run" in sport_key:
-                    workout_type = "running"
-                elif "cycling" in sport_key or "bik" in sport_key:
-                    workout_type = "cycling"
-                elif "swim" in sport_key:
-                    workout_type = "swimming"
-                elif "strength" in sport_key or "cardio" in sport_key:
-                    workout_type = "strength"
-
                 result.append({
                     "garmin_workout_id": str(w.get("workoutId", "")),
                     "workout_name": w.get("workoutName", "Unnamed Workout"),
-                    "workout_type": workout_type,
+                    "workout_type": GarminService.classify_workout_type(w),
                     "description": w.get("description", ""),
+                    "garmin_updated_date": w.get("updatedDate"),
                     "workout_data": json.dumps(w),
                 })
             return True, "Workouts fetched successfully", result
         except GarminConnectAuthenticationError:
             return False, "Authentication failed. Please re-enter your Garmin credentials.", []
+        except GarminUnavailable as e:
+            return False, str(e), []
         except GarminConnectConnectionError:
             return False, "Could not connect to Garmin Connect. Please try again later.", []
         except Exception as e:
@@ -90,15 +372,20 @@ class GarminService:
 
     @staticmethod
     async def get_workout_details(
-        encrypted_email: str, encrypted_password: str, workout_id: str
+        encrypted_email: str,
+        encrypted_password: str,
+        workout_id: str,
+        oauth_token_encrypted: Optional[str] = None,
     ) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
         """Fetch detailed workout data from Garmin Connect."""
         try:
-            email = decrypt_value(encrypted_email)
-            password = decrypt_value(encrypted_password)
-            client = GarminService._create_client(email, password)
-
-            workout = client.get_workout_by_id(workout_id)
+            workout = await GarminService._call(
+                encrypted_email,
+                encrypted_password,
+                "get_workout_by_id",
+                workout_id,
+                oauth_token_encrypted=oauth_token_encrypted,
+            )
             return True, "Workout details fetched", workout
         except Exception as e:
             logger.error(f"Failed to fetch workout {workout_id}: {e}")
@@ -108,49 +395,100 @@ class GarminService:
     async def import_workout(
         encrypted_email: str,
         encrypted_password: str,
-        workout_data: Dict[str, Any],
+        workout_data: Union[Dict[str, Any], str],
+        oauth_token_encrypted: Optional[str] = None,
     ) -> Tuple[bool, str, Optional[str]]:
         """Import a workout into an athlete's Garmin Connect account.
 
         This creates a new workout in the athlete's account based on the
-        workout data exported from the coach's account.
+        workout data exported from the coach's account. A string is taken
+        to be ``canonical_json`` output and is sent as is.
         """
         try:
-            email = decrypt_value(encrypted_email)
-            password = decrypt_value(encrypted_password)
-            client = GarminService._create_client(email, password)
-
-            # Remove the original workoutId so Garmin creates a new one
-            import_data = dict(workout_data)
-            import_data.pop("workoutId", None)
-            import_data.pop("ownerId", None)
-            import_data.pop("createdDate", None)
-            import_data.pop("updatedDate", None)
+            if isinstance(workout_data, str):
+                import_data = workout_data
+            else:
+                # Remove the original workoutId so Garmin creates a new one
+                import_data = GarminService.canonical_workout(workout_data)
 
-            result = client.upload_workout(import_data)
+            result = await GarminService._call(
+                encrypted_email,
+                encrypted_password,
+                "upload_workout",
+                import_data,
+                oauth_token_encrypted=oauth_token_encrypted,
+            )
 
             new_id = None
-            if isinstance(result, dict):
-                new_id = str(result.get("workoutId", ""))
+            if isinstance(result, dict) and result.get("workoutId") is not None:
+                new_id = str(result["workoutId"])
 
             return True, "Workout imported successfully to Garmin Connect", new_id
+        except GarminUnavailable:
+            # Refused by the limiter before anything was sent
+            return False, IMPORT_UNAVAILABLE, None
         except GarminConnectAuthenticationError:
-            return False, (
-                "Authentication failed for athlete's Garmin account. "
-                "The athlete needs to re-enter their Garmin credentials."
-            ), None
+            return False, IMPORT_AUTH_FAILED, None
+        except GarminConnectTooManyRequestsError:
+            return False, IMPORT_RATE_LIMITED, None
         except GarminConnectConnectionError:
-            return False, (
-                "Could not connect to Garmin Connect. "
-                "Please try again in a few minutes."
-            ), None
+            return False, IMPORT_CONNECTION_FAILED, None
         except Exception as e:
             logger.error(f"Failed to import workout: {e}")
             return False, f"Error importing workout: {str(e)}", None
 
+    @staticmethod
+    async def import_workouts(
+        encrypted_email: str,
+        encrypted_password: str,
+        workouts: List[Union[Dict[str, Any], str]],
+        oauth_token_encrypted: Optional[str] = None,
+        concurrency: Optional[int] = None,
+    ) -> List[Tuple[bool, str, Optional[str]]]:
+        """Import several workouts into one Garmin account.
+
+        The account is authenticated once up front, then uploads run with
+        bounded concurrency. Results are returned in the order of ``workouts``.
+        """
+        if not workouts:
+            return []
+
+        try:
+            await GarminService._authenticate(
+                encrypted_email, encrypted_password, oauth_token_encrypted
+            )
+        except GarminUnavailable:
+            return [(False, IMPORT_UNAVAILABLE, None)] * len(workouts)
+        except GarminConnectAuthenticationError:
+            return [(False, IMPORT_AUTH_FAILED, None)] * len(workouts)
+        except GarminConnectTooManyRequestsError:
+            return [(False, IMPORT_RATE_LIMITED, None)] * len(workouts)
+        except GarminConnectConnectionError:
+            return [(False, IMPORT_CONNECTION_FAILED, None)] * len(workouts)
+        except Exception as e:
+            logger.error(f"Failed to authenticate for workout import: {e}")
+            return [(False, f"Error importing workout: {str(e)}", None)] * len(workouts)
+
+        semaphore = asyncio.Semaphore(concurrency or settings.GARMIN_IMPORT_CONCURRENCY)
+
+        async def upload(workout_data: Union[Dict[str, Any], str]) -> Tuple[bool, str, Optional[str]]:
+            async with semaphore:
+                return await GarminService.import_workout(
+                    encrypted_email, encrypted_password, workout_data, oauth_token_encrypted
+                )
+
+        return list(await asyncio.gather(*(upload(w) for w in workouts)))
+
+    @staticmethod
+    def is_retryable_import_error(message: str) -> bool:
+        """True if an import failure is transient and worth retrying later."""
+        return message in RETRYABLE_IMPORT_ERRORS
+
     @staticmethod
     async def check_athlete_connection(
-        encrypted_email: str, encrypted_password: str
+        encrypted_email: str,
+        encrypted_password: str,
+        oauth_token_encrypted: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Check if an athlete's Garmin Connect account is accessible.
 
@@ -158,13 +496,16 @@ class GarminService:
         """
         recommendations = []
         try:
-            email = decrypt_value(encrypted_email)
-            password = decrypt_value(encrypted_password)
-            client = GarminService._create_client(email, password)
-            display_name = client.get_full_name()
+            display_name = await GarminService._call(
+                encrypted_email,
+                encrypted_password,
+                "get_full_name",
+                oauth_token_encrypted=oauth_token_encrypted,
+            )
 
             return {
                 "is_connected": True,
+                "status": "connected",
                 "message": f"Connected to Garmin Connect as {display_name}. Ready for workout sync.",
                 "recommendations": [],
             }
@@ -177,9 +518,18 @@ class GarminService:
             ]
             return {
                 "is_connected": False,
+                "status": "auth_failed",
                 "message": "Cannot authenticate with Garmin Connect. The stored credentials are invalid.",
                 "recommendations": recommendations,
             }
+        except GarminUnavailable as e:
+            return {
+                "is_connected": False,
+                "status": "unavailable",
+                "message": str(e),
+                "recommendations": ["Wait for Garmin Connect to recover, then check again"],
+                "retry_after": e.retry_after,
+            }
         except GarminConnectConnectionError:
             recommendations = [
                 "Check if Garmin Connect is experiencing an outage at status.garmin.com",
@@ -188,6 +538,7 @@ class GarminService:
             ]
             return {
                 "is_connected": False,
+                "status": "unavailable",
                 "message": "Cannot reach Garmin Connect servers.",
                 "recommendations": recommendations,
             }
@@ -198,6 +549,7 @@ class GarminService:
             ]
             return {
                 "is_connected": False,
+                "status": "error",
                 "message": f"Unexpected error: {str(e)}",
                 "recommendations": recommendations,
             }
@@ -0,0 +1,200 @@
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, TypeVar
+
+from garminconnect import Garmin, GarminConnectAuthenticationError
+from garth.exc import GarthHTTPError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def account_key(email: str) -> str:
+    """Stable, non-reversible key identifying a Garmin account."""
+    return hashlib.sha256(email.strip().lower().encode()).hexdigest()
+
+
+def _password_digest(password: str) -> str:
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def credentials_key(email: str, password: str) -> str:
+    """Key for one set of account credentials, safe to keep in memory."""
+    return f"{account_key(email)}:{_password_digest(password)}"
+
+
+def is_auth_failure(exc: Exception) -> bool:
+    """Return True if an exception means Garmin rejected our tokens."""
+    if isinstance(exc, GarminConnectAuthenticationError):
+        return True
+    if isinstance(exc, GarthHTTPError):
+        status = getattr(getattr(exc.error, "response", None), "status_code", None)
+        return status == 401
+    return False
+
+
+def _new_client(email: str, password: str) -> Garmin:
+    if settings.GARMIN_BACKEND == "fake":
+        from app.services.garmin_fake import FakeGarmin
+
+        return FakeGarmin(email, password)
+    return Garmin(email, password)
+
+
+@dataclass
+class GarminSession:
+    """An authenticated Garmin client plus the tokens it was built from."""
+
+    client: Garmin
+    password_digest: str
+
+    @property
+    def tokens(self) -> Optional[str]:
+        """Serialized garth OAuth1/OAuth2 tokens for this session."""
+        try:
+            return self.client.garth.dumps()
+        except Exception:
+            return None
+
+    @property
+    def expires_at(self) -> Optional[int]:
+        oauth2 = getattr(self.client.garth, "oauth2_token", None)
+        return getattr(oauth2, "expires_at", None)
+
+    @property
+    def authorization(self) -> str:
+        """OAuth2 ``Authorization`` header value for direct API calls."""
+        return str(self.client.garth.oauth2_token)
+
+
+class GarminSessionManager:
+    """Keeps one authenticated Garmin session per account.
+
+    A full username/password login is only performed when there is neither a
+    live in-memory session nor a stored token that Garmin still accepts.
+    OAuth2 access tokens are refreshed from the long-lived OAuth1 token shortly
+    before they expire, so steady-state calls never hit the SSO login flow.
+
+    The manager is thread-safe: Garmin calls may run on worker threads.
+    """
+
+    def __init__(self, refresh_margin_seconds: int = 300):
+        self.refresh_margin_seconds = refresh_margin_seconds
+        self._sessions: Dict[str, GarminSession] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    @staticmethod
+    def _password_login(email: str, password: str) -> Garmin:
+        logger.info("Performing Garmin password login")
+        client = _new_client(email, password)
+        client.login()
+        return client
+
+    @staticmethod
+    def _resume(email: str, password: str, tokens: str) -> Optional[Garmin]:
+        """Rebuild a client from stored tokens, or None if they are rejected."""
+        client = _new_client(email, password)
+        try:
+            client.login(tokenstore=tokens)
+        except Exception as e:
+            if not is_auth_failure(e):
+                logger.warning(f"Could not resume Garmin session from stored tokens: {e}")
+            return None
+        return client
+
+    def _is_fresh(self, session: GarminSession) -> bool:
+        expires_at = session.expires_at
+        return expires_at is None or expires_at - time.time() > self.refresh_margin_seconds
+
+    def _refresh_if_needed(self, session: GarminSession) -> None:
+        if not self._is_fresh(session):
+            session.client.garth.refresh_oauth2()
+
+    def get_session(
+        self, email: str, password: str, tokens: Optional[str] = None
+    ) -> GarminSession:
+        """Return an authenticated session, logging in only as a last resort."""
+        key = account_key(email)
+        digest = _password_digest(password)
+        with self._lock_for(key):
+            session = self._sessions.get(key)
+            if session is not None and session.password_digest != digest:
+                session = None
+
+            if session is None and tokens:
+                client = self._resume(email, password, tokens)
+                if client is not None:
+                    session = GarminSession(client=client, password_digest=digest)
+
+            if session is not None:
+                try:
+                    self._refresh_if_needed(session)
+                except Exception as e:
+                    logger.info(f"Garmin token refresh failed, logging in again: {e}")
+                    session = None
+
+            if session is None:
+                session = GarminSession(
+                    client=self._password_login(email, password), password_digest=digest
+                )
+
+            self._sessions[key] = session
+            return session
+
+    def cached_session(self, email: str, password: str) -> Optional[GarminSession]:
+        """Return a live session that needs no network I/O to use, if any."""
+        session = self._sessions.get(account_key(email))
+        if session is None or session.password_digest != _password_digest(password):
+            return None
+        return session if self._is_fresh(session) else None
+
+    def call(
+        self,
+        email: str,
+        password: str,
+        operation: Callable[[Garmin], T],
+        tokens: Optional[str] = None,
+    ) -> T:
+        """Run ``operation`` with an authenticated client.
+
+        If Garmin rejects a resumed session the tokens are discarded and the
+        operation is retried once after a fresh password login.
+        """
+        session = self.get_session(email, password, tokens)
+        try:
+            return operation(session.client)
+        except Exception as e:
+            if not is_auth_failure(e):
+                raise
+            logger.info("Garmin rejected session tokens, retrying with password login")
+            self.invalidate(email)
+            session = self.get_session(email, password)
+            return operation(session.client)
+
+    def tokens_for(self, email: str) -> Optional[str]:
+        """Current serialized tokens for an account, if a session exists."""
+        session = self._sessions.get(account_key(email))
+        return session.tokens if session else None
+
+    def invalidate(self, email: str) -> None:
+        """Forget the in-memory session for an account."""
+        self._sessions.pop(account_key(email), None)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+
+
+garmin_sessions = GarminSessionManager(
+    refresh_margin_seconds=settings.GARMIN_TOKEN_REFRESH_MARGIN_SECONDS
+)
@@ -0,0 +1,296 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.user import GarminCredentials, ImportJob, ImportJobItem, SharedWorkout
+from app.services import badges
+from app.services.garmin_service import GarminService
+from app.services.upload_idempotency import (
+    UploadRequest,
+    import_shared_workouts,
+    load_upload_payloads,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobWorker:
+    """Drains the import_jobs table in the background.
+
+    Jobs are claimed with a lease so several uvicorn workers can share the
+    queue: a job is only picked up when it is due and nobody holds an
+    unexpired lease on it. A worker that crashes mid-job simply lets its
+    lease expire and another worker resumes the remaining items. The lease
+    is renewed between upload batches and checked again before the job's
+    final state is written; a worker that finds it taken over stops.
+    Transient Garmin failures are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        worker_id: Optional[str] = None,
+    ):
+        self.session_factory = session_factory
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    async def claim(self) -> Optional[int]:
+        """Lease the next due job, or return None if there is nothing to do."""
+        now = datetime.now(timezone.utc)
+        lease_free = or_(ImportJob.lease_expires_at.is_(None), ImportJob.lease_expires_at < now)
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(ImportJob.id)
+                .where(
+                    ImportJob.status.in_(["queued", "running"]),
+                    ImportJob.next_run_at <= now,
+                    lease_free,
+                )
+                .order_by(ImportJob.next_run_at)
+                .limit(5)
+            )
+            for job_id in result.scalars().all():
+                claimed = await db.execute(
+                    update(ImportJob)
+                    .where(ImportJob.id == job_id, lease_free)
+                    .values(
+                        status="running",
+                        lease_owner=self.worker_id,
+                        lease_expires_at=now + timedelta(seconds=settings.IMPORT_JOB_LEASE_SECONDS),
+                        attempts=ImportJob.attempts + 1,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                if claimed.rowcount == 1:
+                    await db.commit()
+                    return job_id
+            await db.rollback()
+        return None
+
+    async def process(self, job_id: int) -> None:
+        """Import the outstanding items of a claimed job."""
+        async with self.session_factory() as db:
+            job = (
+                await db.execute(
+                    select(ImportJob).options(selectinload(ImportJob.items)).where(ImportJob.id == job_id)
+                )
+            ).scalar_one()
+            outstanding = [i for i in job.items if i.status == "queued"]
+
+            creds = (
+                await db.execute(
+                    select(GarminCredentials).where(GarminCredentials.user_id == job.athlete_id)
+                )
+            ).scalar_one_or_none()
+
+            shared_by_id = {}
+            if outstanding:
+                shared_result = await db.execute(
+                    select(SharedWorkout)
+                    .options(joinedload(SharedWorkout.workout))
+                    .where(SharedWorkout.id.in_([i.shared_workout_id for i in outstanding]))
+                )
+                shared_by_id = {s.id: s for s in shared_result.scalars().all()}
+            payloads = await load_upload_payloads(db, [s.workout for s in shared_by_id.values()])
+
+            if outstanding and (not creds or not creds.is_connected):
+                message = "Please connect your Garmin account first (Settings > Garmin Connect)"
+                for item in outstanding:
+                    self._fail(item, shared_by_id.get(item.shared_workout_id), message)
+                outstanding = []
+
+            to_import: List[tuple] = []
+            for item in outstanding:
+                shared = shared_by_id.get(item.shared_workout_id)
+                if shared is None or shared.status == "removed":
+                    item.status = "skipped"
+                    item.message = "Shared workout is no longer available"
+                    continue
+                if shared.status == "imported":
+                    item.status = "skipped"
+                    item.message = "This workout has already been imported"
+                    continue
+                payload = payloads.get(shared.workout_id)
+                if payload is None:
+                    self._fail(
+                        item,
+                        shared,
+                        "Workout data is missing. Ask your coach to re-share this workout.",
+                        import_error="Missing workout data",
+                    )
+                    continue
+                to_import.append((item, shared, payload))
+
+            # Uploads run a batch at a time; the lease is renewed between batches
+            batch_size = settings.GARMIN_IMPORT_CONCURRENCY
+            for start in range(0, len(to_import), batch_size):
+                if start and not await self._renew_lease(db, job_id):
+                    logger.warning(f"Import job {job_id}: lease taken over by another worker, stopping")
+                    return
+                batch = to_import[start:start + batch_size]
+                outcomes = await import_shared_workouts(
+                    db,
+                    creds,
+                    [
+                        UploadRequest.for_workout(shared.id, job.athlete_id, shared.workout, payload)
+                        for _, shared, payload in batch
+                    ],
+                )
+                # Later batches of a long job must not look older than they are
+                imported_at = datetime.now(timezone.utc)
+                for (item, shared, _), (success, message, garmin_id) in zip(batch, outcomes):
+                    if success:
+                        item.status = "imported"
+                        item.message = f"'{shared.workout.workout_name}' imported successfully to your Garmin account"
+                        item.garmin_import_id = garmin_id
+                        shared.status = "imported"
+                        shared.imported_at = imported_at
+                        shared.garmin_import_id = garmin_id
+                        shared.import_error = None
+                        shared.retry_count = 0
+                        shared.next_retry_at = None
+                    elif GarminService.is_retryable_import_error(message):
+                        item.message = message
+                        job.last_error = message
+                    else:
+                        self._fail(item, shared, message)
+                GarminService.persist_session(creds)
+
+            now = datetime.now(timezone.utc)
+            retrying = [i for i in job.items if i.status == "queued"]
+            if retrying and job.attempts < settings.IMPORT_JOB_MAX_ATTEMPTS:
+                delay = settings.IMPORT_JOB_BACKOFF_SECONDS * 2 ** (job.attempts - 1)
+                job.status = "queued"
+                job.next_run_at = now + timedelta(seconds=delay)
+                logger.info(f"Import job {job.id}: {len(retrying)} item(s) retrying in {delay}s")
+            else:
+                for item in retrying:
+                    self._fail(item, shared_by_id.get(item.shared_workout_id), item.message or "Import failed")
+                job.status = "failed" if retrying else "completed"
+                job.finished_at = now
+            await badges.refresh_pending_workouts(db, [job.athlete_id])
+            # The last batch may have outlived the lease, so release it only if still held
+            released = await db.execute(
+                update(ImportJob)
+                .where(ImportJob.id == job_id, ImportJob.lease_owner == self.worker_id)
+                .values(lease_owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            if released.rowcount != 1:
+                await db.rollback()
+                logger.warning(f"Import job {job_id}: lease taken over by another worker, discarding results")
+                return
+            await db.commit()
+
+    async def _renew_lease(self, db: AsyncSession, job_id: int) -> bool:
+        """Extend this worker's lease on a job, committing the progress so far.
+
+        Returns False, discarding the uncommitted progress, if another
+        worker has claimed the job since.
+        """
+        renewed = await db.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job_id, ImportJob.lease_owner == self.worker_id)
+            .values(
+                lease_expires_at=datetime.now(timezone.utc)
+                + timedelta(seconds=settings.IMPORT_JOB_LEASE_SECONDS)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if renewed.rowcount != 1:
+            await db.rollback()
+            return False
+        await db.commit()
+        return True
+
+    @staticmethod
+    def _fail(
+        item: ImportJobItem,
+        shared: Optional[SharedWorkout],
+        message: str,
+        import_error: Optional[str] = None,
+    ) -> None:
+        item.status = "failed"
+        item.message = message
+        if shared is not None:
+            shared.status = "failed"
+            shared.import_error = import_error or message
+
+    async def release(self, job_id: int, error: str) -> None:
+        """Hand a job back to the queue after an unexpected error."""
+        async with self.session_factory() as db:
+            job = await db.get(ImportJob, job_id)
+            if job is None:
+                return
+            delay = settings.IMPORT_JOB_BACKOFF_SECONDS * 2 ** max(job.attempts - 1, 0)
+            if job.attempts >= settings.IMPORT_JOB_MAX_ATTEMPTS:
+                job.status = "failed"
+                job.finished_at = datetime.now(timezone.utc)
+            else:
+                job.status = "queued"
+                job.next_run_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            job.last_error = error
+            job.lease_owner = None
+            job.lease_expires_at = None
+            await db.commit()
+
+    async def run_once(self) -> bool:
+        """Claim and process one job. Returns False when the queue is empty."""
+        job_id = await self.claim()
+        if job_id is None:
+            return False
+        try:
+            await self.process(job_id)
+        except Exception as e:
+            logger.error(f"Import job {job_id} failed unexpectedly: {e}", exc_info=True)
+            await self.release(job_id, str(e))
+        return True
+
+    def notify(self) -> None:
+        """Wake the worker loop early, e.g. right after enqueueing a job."""
+        self._wakeup.set()
+
+    async def run_forever(self) -> None:
+        logger.info(f"Import job worker {self.worker_id} started")
+        while True:
+            try:
+                while await self.run_once():
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Import job worker error: {e}", exc_info=True)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.IMPORT_WORKER_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+import_worker = ImportJobWorker()
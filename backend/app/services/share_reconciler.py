@@ -0,0 +1,274 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session
+from app.models.user import (
+    GarminCredentials,
+    ImportJob,
+    ImportJobItem,
+    SharedWorkout,
+    WorkoutUpload,
+)
+from app.services import badges
+from app.services.garmin_service import RETRYABLE_IMPORT_ERRORS, GarminService
+from app.services.import_jobs import ImportJobWorker, import_worker
+from app.services.upload_idempotency import workout_listings
+
+logger = logging.getLogger(__name__)
+
+# Pause between passes once every account is up to date
+RECONCILE_IDLE_SECONDS = 60
+
+DELETED_IN_GARMIN = (
+    "This workout was deleted from your Garmin Connect library. "
+    "Import it again to put it back."
+)
+
+
+@dataclass
+class ReconcileResult:
+    # Imported shares no longer in the athlete's Garmin library, set back to pending
+    reset: int = 0
+    # Failed shares queued for another import attempt
+    requeued: int = 0
+
+
+class ShareReconciler:
+    """Keeps shared workout statuses in line with athletes' Garmin libraries.
+
+    Each connected athlete with imported or failed shares is reconciled
+    roughly every ``RECONCILE_INTERVAL_SECONDS``, claimed by bumping
+    ``reconciled_at`` so several workers never reconcile the same athlete
+    twice. Imported shares missing from the athlete's library go back to
+    pending; failed imports that are safe to retry are queued again as an
+    import job, with exponential backoff between automatic attempts.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = async_session,
+        import_queue: ImportJobWorker = import_worker,
+    ):
+        self.session_factory = session_factory
+        self.import_queue = import_queue
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _is_due(cutoff: datetime):
+        return or_(
+            GarminCredentials.reconciled_at.is_(None),
+            GarminCredentials.reconciled_at < cutoff,
+        )
+
+    async def due_accounts(self, cutoff: datetime) -> List[int]:
+        async with self.session_factory() as db:
+            result = await db.execute(
+                select(GarminCredentials.id)
+                .where(
+                    GarminCredentials.is_connected.is_(True),
+                    self._is_due(cutoff),
+                    GarminCredentials.user_id.in_(
+                        select(SharedWorkout.athlete_id).where(
+                            SharedWorkout.status.in_(["imported", "failed"])
+                        )
+                    ),
+                )
+                .order_by(GarminCredentials.reconciled_at.asc().nulls_first())
+                .limit(settings.RECONCILE_BATCH_SIZE)
+            )
+            return list(result.scalars().all())
+
+    async def reconcile(self, creds_id: int, cutoff: datetime) -> Optional[ReconcileResult]:
+        """Claim and reconcile one athlete if still due.
+
+        Returns None if someone else reconciled the athlete since ``cutoff``.
+        """
+        async with self.session_factory() as db:
+            claimed = await db.execute(
+                update(GarminCredentials)
+                .where(GarminCredentials.id == creds_id, self._is_due(cutoff))
+                .values(reconciled_at=datetime.now(timezone.utc))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            if claimed.rowcount != 1:
+                return None
+
+            creds = await db.get(GarminCredentials, creds_id)
+            if creds is None:
+                return None
+            result = ReconcileResult(
+                reset=await self._reset_deleted(db, creds),
+                requeued=await self._requeue_failed(db, creds),
+            )
+            await db.commit()
+        if result.requeued:
+            self.import_queue.notify()
+        if result.reset or result.requeued:
+            logger.info(
+                f"Reconciled shares of athlete {creds.user_id}: {result.reset} deleted in Garmin, "
+                f"{result.requeued} re-queued"
+            )
+        return result
+
+    async def _reset_deleted(self, db: AsyncSession, creds: GarminCredentials) -> int:
+        """Set imported shares that are gone from Garmin back to pending.
+
+        This needs the athlete's whole listing, not only what changed since
+        the last pass: a deleted workout never shows up again, whatever its
+        ``updatedDate`` was, so only its absence from a full listing tells.
+        The cost is kept down elsewhere. Athletes are only listed when they
+        have imported shares, at most once per ``RECONCILE_INTERVAL_SECONDS``,
+        and the listing is shared with the upload checks through
+        ``workout_listings``.
+        """
+        now = datetime.now(timezone.utc)
+        listing_age = timedelta(
+            seconds=settings.GARMIN_LISTING_CACHE_SECONDS + settings.GARMIN_CALL_TIMEOUT_SECONDS
+        )
+        # Shares imported after the listing may have been fetched are left for next time
+        imported = (
+            await db.execute(
+                select(SharedWorkout.id, SharedWorkout.garmin_import_id).where(
+                    SharedWorkout.athlete_id == creds.user_id,
+                    SharedWorkout.status == "imported",
+                    SharedWorkout.garmin_import_id.is_not(None),
+                    SharedWorkout.garmin_import_id != "",
+                    SharedWorkout.imported_at < now - listing_age,
+                )
+            )
+        ).all()
+        if not imported:
+            return 0
+
+        success, message, listing = await workout_listings.get(
+            creds, now - timedelta(seconds=settings.GARMIN_LISTING_CACHE_SECONDS)
+        )
+        if not success:
+            logger.info(f"Not reconciling athlete {creds.user_id}: {message}")
+            return 0
+        GarminService.persist_session(creds)
+
+        in_garmin = {w["garmin_workout_id"] for w in listing}
+        deleted = [share_id for share_id, garmin_id in imported if garmin_id not in in_garmin]
+        if not deleted:
+            return 0
+        await db.execute(
+            update(SharedWorkout)
+            .where(SharedWorkout.id.in_(deleted))
+            .values(
+                status="pending",
+                garmin_import_id=None,
+                imported_at=None,
+                import_error=DELETED_IN_GARMIN,
+                retry_count=0,
+                next_retry_at=None,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        await badges.refresh_pending_workouts(db, [creds.user_id])
+        # Otherwise the idempotency records would report the old upload as done
+        await db.execute(
+            update(WorkoutUpload)
+            .where(WorkoutUpload.shared_workout_id.in_(deleted), WorkoutUpload.status == "imported")
+            .values(status="removed")
+            .execution_options(synchronize_session=False)
+        )
+        return len(deleted)
+
+    async def _requeue_failed(self, db: AsyncSession, creds: GarminCredentials) -> int:
+        """Queue failed imports that are safe to retry as one import job."""
+        now = datetime.now(timezone.utc)
+        already_queued = (
+            select(ImportJobItem.id)
+            .where(
+                ImportJobItem.shared_workout_id == SharedWorkout.id,
+                ImportJobItem.status == "queued",
+            )
+            .exists()
+        )
+        due = (
+            await db.execute(
+                select(SharedWorkout.id, SharedWorkout.retry_count).where(
+                    SharedWorkout.athlete_id == creds.user_id,
+                    SharedWorkout.status == "failed",
+                    SharedWorkout.import_error.in_(RETRYABLE_IMPORT_ERRORS),
+                    SharedWorkout.retry_count < settings.IMPORT_RETRY_MAX_ATTEMPTS,
+                    or_(SharedWorkout.next_retry_at.is_(None), SharedWorkout.next_retry_at <= now),
+                    ~already_queued,
+                )
+            )
+        ).all()
+        if not due:
+            return 0
+
+        job = ImportJob(athlete_id=creds.user_id, status="queued", attempts=0)
+        job.items = [ImportJobItem(shared_workout_id=share_id, status="queued") for share_id, _ in due]
+        db.add(job)
+        await db.execute(
+            update(SharedWorkout),
+            [
+                {
+                    "id": share_id,
+                    "retry_count": retry_count + 1,
+                    "next_retry_at": now
+                    + timedelta(seconds=settings.IMPORT_RETRY_BACKOFF_SECONDS * 2 ** retry_count),
+                }
+                for share_id, retry_count in due
+            ],
+        )
+        return len(due)
+
+    async def run_once(self) -> int:
+        """Reconcile the athletes that are due. Returns how many were reconciled."""
+        if not GarminService.availability()["available"]:
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.RECONCILE_INTERVAL_SECONDS)
+        reconciled = 0
+        for creds_id in await self.due_accounts(cutoff):
+            if reconciled:
+                await asyncio.sleep(settings.RECONCILE_SPACING_SECONDS)
+            if not GarminService.availability()["available"]:
+                break
+            try:
+                if await self.reconcile(creds_id, cutoff) is not None:
+                    reconciled += 1
+            except Exception as e:
+                logger.error(f"Reconciliation of credentials {creds_id} failed: {e}", exc_info=True)
+        return reconciled
+
+    async def run_forever(self) -> None:
+        logger.info("Shared workout reconciler started")
+        while True:
+            try:
+                reconciled = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Shared workout reconciler error: {e}", exc_info=True)
+                reconciled = 0
+            if reconciled < settings.RECONCILE_BATCH_SIZE:
+                await asyncio.sleep(RECONCILE_IDLE_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+share_reconciler = ShareReconciler()
@@ -0,0 +1,330 @@
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import GarminCredentials, SharedWorkout, Workout, WorkoutUpload
+from app.services.garmin_service import (
+    IMPORT_AUTH_FAILED,
+    IMPORT_CONNECTION_FAILED,
+    IMPORT_RATE_LIMITED,
+    IMPORT_UNAVAILABLE,
+    GarminService,
+)
+from app.services.workout_payloads import load_payloads
+
+logger = logging.getLogger(__name__)
+
+IMPORT_SUCCEEDED = "Workout imported successfully to Garmin Connect"
+
+# Failures that prove Garmin did not store the workout
+REJECTED_MESSAGES = (IMPORT_AUTH_FAILED, IMPORT_RATE_LIMITED, IMPORT_UNAVAILABLE)
+
+Outcome = Tuple[bool, str, Optional[str]]
+
+# Garmin's createdDate has no offset and may be the account's local time, so
+# it only rules out candidates created well before the attempt
+CREATED_DATE_SLACK = timedelta(hours=24)
+
+
+def _aware(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class UploadRequest:
+    """One shared workout to upload to its athlete's Garmin account."""
+
+    shared_workout_id: int
+    athlete_id: int
+    # Upload-ready JSON, as produced by GarminService.canonical_json
+    payload: str
+    payload_hash: str
+    workout_name: str
+    workout_type: str
+    # Id of the request's idempotency record
+    record_id: Optional[int] = None
+    # When an earlier attempt with an unknown outcome started
+    unresolved_since: Optional[datetime] = None
+    # Garmin ids already linked to other shares of this athlete
+    claimed_ids: Set[str] = field(default_factory=set)
+    outcome: Optional[Outcome] = None
+
+    @classmethod
+    def for_workout(
+        cls, shared_workout_id: int, athlete_id: int, workout: Workout, payload: str
+    ) -> "UploadRequest":
+        return cls(
+            shared_workout_id=shared_workout_id,
+            athlete_id=athlete_id,
+            payload=payload,
+            payload_hash=workout.content_hash or GarminService.workout_content_hash(payload),
+            workout_name=workout.workout_name,
+            workout_type=workout.workout_type,
+        )
+
+
+async def load_upload_payloads(db: AsyncSession, workouts: Iterable[Workout]) -> Dict[int, str]:
+    """Upload-ready payloads by workout id, in one query.
+
+    Workouts whose content is missing from ``workout_payloads`` are left out.
+    """
+    workouts = [w for w in workouts if w.content_hash]
+    payloads = await load_payloads(db, [w.content_hash for w in workouts])
+    return {w.id: payloads[w.content_hash] for w in workouts if w.content_hash in payloads}
+
+
+class WorkoutListingCache:
+    """Recently fetched Garmin workout listings, keyed by user.
+
+    A listing only answers "did an earlier upload land?" if it was fetched
+    after that upload could have finished, so callers pass the oldest fetch
+    time they can accept.
+    """
+
+    def __init__(self):
+        self._listings: Dict[int, Tuple[datetime, List[Dict[str, Any]]]] = {}
+
+    async def get(
+        self, creds: GarminCredentials, fetched_after: datetime
+    ) -> Tuple[bool, str, List[Dict[str, Any]]]:
+        now = datetime.now(timezone.utc)
+        cached = self._listings.get(creds.user_id)
+        if (
+            cached is not None
+            and cached[0] > fetched_after
+            and now - cached[0] < timedelta(seconds=settings.GARMIN_LISTING_CACHE_SECONDS)
+        ):
+            return True, "Workouts fetched from cache", cached[1]
+
+        success, message, listing = await GarminService.get_workouts(
+            creds.garmin_email_encrypted,
+            creds.garmin_password_encrypted,
+            creds.oauth_token_encrypted,
+        )
+        if success:
+            self._prune(now)
+            self._listings[creds.user_id] = (now, listing)
+        return success, message, listing
+
+    def _prune(self, now: datetime) -> None:
+        ttl = timedelta(seconds=settings.GARMIN_LISTING_CACHE_SECONDS)
+        for user_id, (fetched_at, _) in list(self._listings.items()):
+            if now - fetched_at >= ttl:
+                del self._listings[user_id]
+
+    def invalidate(self, user_id: int) -> None:
+        self._listings.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._listings.clear()
+
+
+workout_listings = WorkoutListingCache()
+
+
+async def begin_uploads(db: AsyncSession, requests: List[UploadRequest]) -> None:
+    """Load or create the idempotency record for each request.
+
+    Requests whose payload is already recorded as imported get their
+    outcome straight away. The rest are marked ``in_flight`` before any
+    upload starts, so a crash or timeout mid-upload leaves a trace for the
+    next attempt to check. The records are written and committed in a
+    session of their own on ``db``'s engine; ``db``'s transaction is left
+    alone, so the shares must already be committed.
+    """
+    if not requests:
+        return
+    async with AsyncSession(db.bind, expire_on_commit=False) as records_db:
+        result = await records_db.execute(
+            select(WorkoutUpload).where(
+                WorkoutUpload.shared_workout_id.in_({r.shared_workout_id for r in requests})
+            )
+        )
+        records = {(u.shared_workout_id, u.payload_hash): u for u in result.scalars().all()}
+
+        now = datetime.now(timezone.utc)
+        unresolved_athletes = set()
+        started: List[Tuple[UploadRequest, WorkoutUpload]] = []
+        for request in requests:
+            record = records.get((request.shared_workout_id, request.payload_hash))
+            if record is None:
+                record = WorkoutUpload(
+                    shared_workout_id=request.shared_workout_id,
+                    athlete_id=request.athlete_id,
+                    payload_hash=request.payload_hash,
+                    attempts=0,
+                )
+                records_db.add(record)
+                records[(request.shared_workout_id, request.payload_hash)] = record
+            elif record.status == "imported":
+                # Garmin's response may have had no id; the upload still landed
+                request.record_id = record.id
+                request.outcome = (True, IMPORT_SUCCEEDED, record.garmin_workout_id)
+                continue
+            elif record.status == "in_flight" and record.attempted_at is not None:
+                request.unresolved_since = _aware(record.attempted_at)
+                unresolved_athletes.add(request.athlete_id)
+            record.status = "in_flight"
+            record.attempts += 1
+            record.attempted_at = now
+            started.append((request, record))
+
+        if unresolved_athletes:
+            claimed = await records_db.execute(
+                select(SharedWorkout.athlete_id, SharedWorkout.garmin_import_id).where(
+                    SharedWorkout.athlete_id.in_(unresolved_athletes),
+                    SharedWorkout.garmin_import_id.is_not(None),
+                )
+            )
+            claimed_by_athlete: Dict[int, Set[str]] = {}
+            for athlete_id, garmin_id in claimed.all():
+                claimed_by_athlete.setdefault(athlete_id, set()).add(garmin_id)
+            for request in requests:
+                if request.unresolved_since is not None:
+                    request.claimed_ids = claimed_by_athlete.get(request.athlete_id, set())
+
+        await records_db.commit()
+        for request, record in started:
+            request.record_id = record.id
+
+
+def _created_date(summary: Dict[str, Any]) -> Optional[datetime]:
+    """When Garmin created a listed workout, or None if it does not say."""
+    try:
+        return _aware(datetime.fromisoformat(json.loads(summary["workout_data"])["createdDate"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+async def _find_landed_upload(
+    creds: GarminCredentials, request: UploadRequest, listing: List[Dict[str, Any]]
+) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """Look for the workout an earlier attempt of ``request`` stored in Garmin.
+
+    Candidates are unclaimed workouts of the same name and type created no
+    more than a day before that attempt; the listing has no steps, so each
+    one's details are fetched and compared with the payload, leaving out the
+    ids, dates and owner Garmin assigned when storing it. Returns False if a
+    candidate could not be checked, so nothing is known.
+    """
+    since = request.unresolved_since - CREATED_DATE_SLACK
+    fingerprint = GarminService.workout_fingerprint(request.payload)
+    for summary in listing:
+        if (
+            summary["garmin_workout_id"] in request.claimed_ids
+            or summary["workout_name"] != request.workout_name
+            or summary["workout_type"] != request.workout_type
+        ):
+            continue
+        created = _created_date(summary)
+        if created is not None and created < since:
+            continue
+        success, _, detail = await GarminService.get_workout_details(
+            creds.garmin_email_encrypted,
+            creds.garmin_password_encrypted,
+            summary["garmin_workout_id"],
+            creds.oauth_token_encrypted,
+        )
+        if not success or detail is None:
+            return False, None
+        if GarminService.workout_fingerprint(detail) == fingerprint:
+            return True, summary
+    return True, None
+
+
+async def upload_for_account(creds: GarminCredentials, requests: List[UploadRequest]) -> None:
+    """Upload the requests of one account that have no outcome yet.
+
+    Requests with an earlier attempt of unknown outcome are first looked
+    up in the account's workout listing; an unclaimed workout created
+    around or after that attempt with the same content is taken as the
+    earlier upload having landed. If the listing or a candidate's details cannot
+    be fetched those requests are not uploaded at all.
+    """
+    pending = [r for r in requests if r.outcome is None]
+    unresolved = [r for r in pending if r.unresolved_since is not None]
+    if unresolved:
+        fetched_after = max(r.unresolved_since for r in unresolved) + timedelta(
+            seconds=settings.GARMIN_CALL_TIMEOUT_SECONDS
+        )
+        success, message, listing = await workout_listings.get(creds, fetched_after)
+        for request in unresolved:
+            if not success:
+                logger.warning(f"Not retrying upload of shared workout {request.shared_workout_id}: {message}")
+                request.outcome = (False, IMPORT_CONNECTION_FAILED, None)
+                continue
+            checked, landed = await _find_landed_upload(creds, request, listing)
+            if not checked:
+                logger.warning(
+                    f"Not retrying upload of shared workout {request.shared_workout_id}: "
+                    "could not check Garmin for the earlier attempt"
+                )
+                request.outcome = (False, IMPORT_CONNECTION_FAILED, None)
+            elif landed is not None:
+                listing = [s for s in listing if s is not landed]
+                logger.info(
+                    f"Earlier upload of shared workout {request.shared_workout_id} found in Garmin; not re-uploading"
+                )
+                request.outcome = (True, IMPORT_SUCCEEDED, landed["garmin_workout_id"])
+
+    to_upload = [r for r in pending if r.outcome is None]
+    if not to_upload:
+        return
+    outcomes = await GarminService.import_workouts(
+        creds.garmin_email_encrypted,
+        creds.garmin_password_encrypted,
+        [r.payload for r in to_upload],
+        creds.oauth_token_encrypted,
+    )
+    for request, outcome in zip(to_upload, outcomes):
+        request.outcome = outcome
+    workout_listings.invalidate(creds.user_id)
+
+
+async def finish_uploads(db: AsyncSession, requests: List[UploadRequest]) -> None:
+    """Record each request's outcome on its idempotency record.
+
+    The updates join ``db``'s transaction, so they are committed along with
+    the share statuses. Failures that may have happened after Garmin stored
+    the workout (time outs, dropped connections) leave the record
+    ``in_flight``, as does a rolled back transaction.
+    """
+    now = datetime.now(timezone.utc)
+    updates = []
+    for request in requests:
+        if request.record_id is None or request.outcome is None:
+            continue
+        success, message, garmin_id = request.outcome
+        if success:
+            updates.append({
+                "id": request.record_id,
+                "status": "imported",
+                "garmin_workout_id": garmin_id,
+                "completed_at": now,
+            })
+        elif message in REJECTED_MESSAGES:
+            updates.append({"id": request.record_id, "status": "failed", "completed_at": now})
+    for status_value in ("imported", "failed"):
+        batch = [u for u in updates if u["status"] == status_value]
+        if batch:
+            await db.execute(update(WorkoutUpload), batch)
+
+
+async def import_shared_workouts(
+    db: AsyncSession, creds: GarminCredentials, requests: List[UploadRequest]
+) -> List[Outcome]:
+    """Idempotently upload shared workouts to one athlete's Garmin account.
+
+    Returns outcomes in the order of ``requests``, in the same form as
+    ``GarminService.import_workouts``. The caller commits the outcomes.
+    """
+    await begin_uploads(db, requests)
+    await upload_for_account(creds, requests)
+    await finish_uploads(db, requests)
+    return [r.outcome for r in requests]
@@ -0,0 +1,129 @@
+import logging
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import bulk_upsert
+from app.models.user import Workout, WorkoutPayload, WorkoutSegment, WorkoutStep
+from app.services.garmin_service import GarminService
+
+logger = logging.getLogger(__name__)
+
+
+async def acquire_payloads(
+    db: AsyncSession, payloads: Mapping[str, str], counts: Mapping[str, int]
+) -> None:
+    """Store payloads by content hash and add ``counts`` references to each.
+
+    ``payloads`` maps content hash to canonical JSON. Payloads that already
+    exist only have their reference count bumped, in the same statement, so
+    a concurrent garbage collection cannot delete them in between.
+    """
+    await bulk_upsert(
+        db,
+        WorkoutPayload,
+        [
+            {"content_hash": content_hash, "payload": payload, "ref_count": counts.get(content_hash, 0)}
+            for content_hash, payload in payloads.items()
+        ],
+        conflict_columns=["content_hash"],
+        update_columns=[],
+        increment_columns=["ref_count"],
+    )
+
+
+async def release_payloads(db: AsyncSession, counts: Mapping[str, int]) -> int:
+    """Drop references to payloads, deleting those no longer referenced.
+
+    Returns the number of payloads deleted.
+    """
+    counts = {h: n for h, n in counts.items() if n}
+    if not counts:
+        return 0
+    # One statement per distinct decrement, which is almost always just 1
+    by_amount: Dict[int, List[str]] = {}
+    for content_hash, n in counts.items():
+        by_amount.setdefault(n, []).append(content_hash)
+    for n, hashes in by_amount.items():
+        await db.execute(
+            update(WorkoutPayload)
+            .where(WorkoutPayload.content_hash.in_(hashes))
+            .values(ref_count=WorkoutPayload.ref_count - n)
+            .execution_options(synchronize_session=False)
+        )
+    return await collect_garbage(db, counts.keys())
+
+
+async def collect_garbage(db: AsyncSession, hashes: Iterable[str]) -> int:
+    """Delete the given payloads if nothing references them any more.
+
+    Their segments and steps go with them; the foreign keys cascade where
+    the database enforces them and are deleted explicitly otherwise.
+    """
+    result = await db.execute(
+        delete(WorkoutPayload)
+        .where(WorkoutPayload.content_hash.in_(list(hashes)), WorkoutPayload.ref_count <= 0)
+        .returning(WorkoutPayload.content_hash)
+        .execution_options(synchronize_session=False)
+    )
+    deleted = result.scalars().all()
+    if deleted:
+        for model in (WorkoutStep, WorkoutSegment):
+            await db.execute(
+                delete(model)
+                .where(model.content_hash.in_(deleted))
+                .execution_options(synchronize_session=False)
+            )
+    return len(deleted)
+
+
+async def store_workout_payload(db: AsyncSession, workout_data: Dict[str, Any]) -> str:
+    """Store one workout's content with a single reference; returns its hash."""
+    canonical = GarminService.canonical_json(workout_data)
+    content_hash = GarminService.workout_content_hash(canonical)
+    await acquire_payloads(db, {content_hash: canonical}, {content_hash: 1})
+    return content_hash
+
+
+async def load_payloads(db: AsyncSession, hashes: Iterable[str]) -> Dict[str, str]:
+    """Canonical JSON by content hash, for the hashes that exist."""
+    hashes = list(set(hashes))
+    if not hashes:
+        return {}
+    result = await db.execute(
+        select(WorkoutPayload.content_hash, WorkoutPayload.payload).where(
+            WorkoutPayload.content_hash.in_(hashes)
+        )
+    )
+    return dict(result.all())
+
+
+async def recount_payloads(db: AsyncSession) -> Tuple[int, int]:
+    """Recompute every reference count from the workouts table.
+
+    Repairs counts that drifted (e.g. after manual edits) and deletes
+    unreferenced payloads. Returns (payloads corrected, payloads deleted).
+    """
+    actual = dict(
+        (
+            await db.execute(
+                select(Workout.content_hash, func.count())
+                .where(Workout.content_hash.is_not(None))
+                .group_by(Workout.content_hash)
+            )
+        ).all()
+    )
+    stored = dict(
+        (await db.execute(select(WorkoutPayload.content_hash, WorkoutPayload.ref_count))).all()
+    )
+    corrections = [
+        {"content_hash": h, "ref_count": actual.get(h, 0)}
+        for h, n in stored.items()
+        if n != actual.get(h, 0)
+    ]
+    if corrections:
+        await db.execute(update(WorkoutPayload), corrections)
+    deleted = await collect_garbage(db, [h for h in stored if h not in actual])
+    logger.info(f"Workout payload recount: {len(corrections)} corrected, {deleted} deleted")
+    return len(corrections), deleted
@@ -0,0 +1,317 @@
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import bulk_upsert
+from app.models.user import Workout, WorkoutPayload, WorkoutSegment, WorkoutStep
+
+logger = logging.getLogger(__name__)
+
+# Garmin sport type keys, for workouts and the activity sub-types they use
+SPORT_TYPE_KEYS = {
+    "running": "running",
+    "trail_running": "running",
+    "treadmill_running": "running",
+    "track_running": "running",
+    "indoor_running": "running",
+    "street_running": "running",
+    "cycling": "cycling",
+    "road_biking": "cycling",
+    "mountain_biking": "cycling",
+    "gravel_cycling": "cycling",
+    "indoor_cycling": "cycling",
+    "virtual_ride": "cycling",
+    "swimming": "swimming",
+    "lap_swimming": "swimming",
+    "open_water_swimming": "swimming",
+    "strength_training": "strength",
+    "cardio_training": "strength",
+    "hiit": "strength",
+}
+
+# Other keys are matched on these fragments, in order, as before the table existed
+SPORT_TYPE_FRAGMENTS = (
+    ("run", "running"),
+    ("cycling", "cycling"),
+    ("bik", "cycling"),
+    ("swim", "swimming"),
+    ("strength", "strength"),
+    ("cardio", "strength"),
+)
+
+# Used when a workout has a sport type id but no key
+SPORT_TYPE_IDS = {1: "running", 2: "cycling", 4: "swimming", 5: "strength", 6: "strength", 9: "strength"}
+
+REPEAT_STEP_DTO = "RepeatGroupDTO"
+
+STRUCTURE_CHUNK_SIZE = 200
+
+
+def _key(value: Any, key_field: str) -> Optional[str]:
+    """Garmin's key out of a typed field such as ``{"stepTypeKey": "warmup"}``."""
+    if isinstance(value, dict):
+        key = value.get(key_field)
+    else:
+        key = value
+    return str(key).lower() if key else None
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+def _int(value: Any) -> Optional[int]:
+    number = _number(value)
+    return int(number) if number is not None else None
+
+
+def classify_sport_type(sport_type: Any) -> str:
+    """Map Garmin's sport type onto our workout types.
+
+    Known keys are looked up exactly; other keys fall back to matching
+    fragments such as "swim", so new Garmin variants still classify.
+    """
+    key = _key(sport_type, "sportTypeKey")
+    if key in SPORT_TYPE_KEYS:
+        return SPORT_TYPE_KEYS[key]
+    if key:
+        for fragment, workout_type in SPORT_TYPE_FRAGMENTS:
+            if fragment in key:
+                return workout_type
+    if isinstance(sport_type, dict):
+        return SPORT_TYPE_IDS.get(sport_type.get("sportTypeId"), "other")
+    return "other"
+
+
+@dataclass
+class ParsedStep:
+    segment_order: int
+    position: int
+    step_type: str
+    parent_position: Optional[int] = None
+    step_order: Optional[int] = None
+    iterations: Optional[int] = None
+    end_condition: Optional[str] = None
+    end_condition_value: Optional[float] = None
+    target_type: Optional[str] = None
+    zone_number: Optional[int] = None
+    target_value_low: Optional[float] = None
+    target_value_high: Optional[float] = None
+    description: Optional[str] = None
+
+
+@dataclass
+class ParsedSegment:
+    segment_order: int
+    sport_type_key: Optional[str]
+    estimated_duration_seconds: Optional[int]
+    estimated_distance_meters: Optional[float]
+    step_count: int
+
+
+@dataclass
+class WorkoutStructure:
+    """Segments, steps and summary of one workout's content."""
+
+    workout_type: str
+    sport_type_key: Optional[str]
+    estimated_duration_seconds: Optional[int]
+    estimated_distance_meters: Optional[float]
+    step_count: int
+    max_zone: Optional[int]
+    segments: List[ParsedSegment] = field(default_factory=list)
+    steps: List[ParsedStep] = field(default_factory=list)
+
+    def summary(self) -> Dict[str, Any]:
+        """The summary columns of ``Workout``."""
+        return {
+            "sport_type_key": self.sport_type_key,
+            "estimated_duration_seconds": self.estimated_duration_seconds,
+            "estimated_distance_meters": self.estimated_distance_meters,
+            "step_count": self.step_count,
+            "max_zone": self.max_zone,
+        }
+
+
+class _Totals:
+    def __init__(self):
+        self.seconds = 0.0
+        self.meters = 0.0
+        self.timed = False
+        self.measured = False
+        self.executable = 0
+
+    def add(self, other: "_Totals", times: int = 1) -> None:
+        self.seconds += other.seconds * times
+        self.meters += other.meters * times
+        self.timed = self.timed or other.timed
+        self.measured = self.measured or other.measured
+        self.executable += other.executable
+
+    @property
+    def duration(self) -> Optional[int]:
+        return int(round(self.seconds)) if self.timed else None
+
+    @property
+    def distance(self) -> Optional[float]:
+        return self.meters if self.measured else None
+
+
+def _parse_steps(
+    raw_steps: Any,
+    segment_order: int,
+    steps: List[ParsedStep],
+    parent_position: Optional[int] = None,
+) -> _Totals:
+    """Flatten ``raw_steps`` into ``steps`` depth first and total them up."""
+    totals = _Totals()
+    if not isinstance(raw_steps, list):
+        return totals
+    for raw in sorted(
+        (s for s in raw_steps if isinstance(s, dict)), key=lambda s: _int(s.get("stepOrder")) or 0
+    ):
+        end_condition = _key(raw.get("endCondition"), "conditionTypeKey")
+        end_value = _number(raw.get("endConditionValue"))
+        step = ParsedStep(
+            segment_order=segment_order,
+            position=len(steps),
+            parent_position=parent_position,
+            step_order=_int(raw.get("stepOrder")),
+            step_type=_key(raw.get("stepType"), "stepTypeKey") or "other",
+            end_condition=end_condition,
+            end_condition_value=end_value,
+            target_type=_key(raw.get("targetType"), "workoutTargetTypeKey"),
+            zone_number=_int(raw.get("zoneNumber")),
+            target_value_low=_number(raw.get("targetValueOne")),
+            target_value_high=_number(raw.get("targetValueTwo")),
+            description=raw.get("description") or None,
+        )
+        steps.append(step)
+
+        if raw.get("type") == REPEAT_STEP_DTO or "workoutSteps" in raw:
+            step.step_type = "repeat"
+            step.iterations = _int(raw.get("numberOfIterations")) or 1
+            inner = _parse_steps(raw.get("workoutSteps"), segment_order, steps, step.position)
+            totals.add(inner, step.iterations)
+            continue
+
+        totals.executable += 1
+        if end_value is None:
+            continue
+        if end_condition in ("time", "fixed.rest"):
+            totals.seconds += end_value
+            totals.timed = True
+        elif end_condition == "distance":
+            totals.meters += end_value
+            totals.measured = True
+    return totals
+
+
+def parse_workout(workout_data: Mapping[str, Any]) -> WorkoutStructure:
+    """Parse a Garmin workout into its segments, steps and summary.
+
+    Garmin's own estimates are preferred; otherwise durations and distances
+    are summed over the steps that end on time or distance, with repeat
+    groups multiplied out.
+    """
+    sport_type = workout_data.get("sportType")
+    segments: List[ParsedSegment] = []
+    steps: List[ParsedStep] = []
+    totals = _Totals()
+
+    raw_segments = workout_data.get("workoutSegments")
+    if isinstance(raw_segments, list):
+        for index, raw in enumerate(s for s in raw_segments if isinstance(s, dict)):
+            segment_order = _int(raw.get("segmentOrder")) or index + 1
+            segment_totals = _parse_steps(raw.get("workoutSteps"), segment_order, steps)
+            totals.add(segment_totals)
+            segments.append(ParsedSegment(
+                segment_order=segment_order,
+                sport_type_key=_key(raw.get("sportType"), "sportTypeKey"),
+                estimated_duration_seconds=_int(raw.get("estimatedDurationInSecs")) or segment_totals.duration,
+                estimated_distance_meters=_number(raw.get("estimatedDistanceInMeters")) or segment_totals.distance,
+                step_count=segment_totals.executable,
+            ))
+
+    zones = [s.zone_number for s in steps if s.zone_number]
+    return WorkoutStructure(
+        workout_type=classify_sport_type(sport_type),
+        sport_type_key=_key(workout_data.get("subSportType"), "subSportTypeKey")
+        or _key(sport_type, "sportTypeKey"),
+        estimated_duration_seconds=_int(workout_data.get("estimatedDurationInSecs")) or totals.duration,
+        estimated_distance_meters=_number(workout_data.get("estimatedDistanceInMeters")) or totals.distance,
+        step_count=totals.executable,
+        max_zone=max(zones) if zones else None,
+        segments=segments,
+        steps=steps,
+    )
+
+
+async def index_structures(db: AsyncSession, structures: Mapping[str, WorkoutStructure]) -> None:
+    """Store the segments and steps of content that is not indexed yet.
+
+    Content is keyed by hash, so content indexed by an earlier or a
+    concurrent sync is left alone.
+    """
+    segments = [
+        {"content_hash": content_hash, **asdict(segment)}
+        for content_hash, structure in structures.items()
+        for segment in structure.segments
+    ]
+    steps = [
+        {"content_hash": content_hash, **asdict(step)}
+        for content_hash, structure in structures.items()
+        for step in structure.steps
+    ]
+    await bulk_upsert(
+        db, WorkoutSegment, segments, conflict_columns=["content_hash", "segment_order"], update_columns=[]
+    )
+    await bulk_upsert(
+        db, WorkoutStep, steps, conflict_columns=["content_hash", "position"], update_columns=[]
+    )
+
+
+async def reindex_structures(db: AsyncSession, hashes: Optional[Iterable[str]] = None) -> int:
+    """Re-parse stored payloads, replacing their index and workout summaries.
+
+    Covers every payload unless ``hashes`` is given; used to backfill
+    content stored before it was indexed, or after the parser changes.
+    Returns the number of payloads parsed.
+    """
+    query = select(WorkoutPayload.content_hash).order_by(WorkoutPayload.content_hash)
+    if hashes is not None:
+        query = query.where(WorkoutPayload.content_hash.in_(list(hashes)))
+    all_hashes = (await db.execute(query)).scalars().all()
+
+    parsed = 0
+    for start in range(0, len(all_hashes), STRUCTURE_CHUNK_SIZE):
+        chunk = all_hashes[start:start + STRUCTURE_CHUNK_SIZE]
+        payloads = (
+            await db.execute(
+                select(WorkoutPayload.content_hash, WorkoutPayload.payload).where(
+                    WorkoutPayload.content_hash.in_(chunk)
+                )
+            )
+        ).all()
+        structures = {}
+        for content_hash, payload in payloads:
+            try:
+                structures[content_hash] = parse_workout(json.loads(payload))
+            except (ValueError, AttributeError) as e:
+                logger.warning(f"Could not parse workout payload {content_hash}: {e}")
+        await db.execute(delete(WorkoutStep).where(WorkoutStep.content_hash.in_(chunk)))
+        await db.execute(delete(WorkoutSegment).where(WorkoutSegment.content_hash.in_(chunk)))
+        await index_structures(db, structures)
+        for content_hash, structure in structures.items():
+            await db.execute(
+                update(Workout)
+                .where(Workout.content_hash == content_hash)
+                .values(workout_type=structure.workout_type, **structure.summary())
+                .execution_options(synchronize_session=False)
+            )
+        parsed += len(structures)
+    return parsed
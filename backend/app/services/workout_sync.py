@@ -0,0 +1,305 @@
+import asyncio
+import json
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import async_session, bulk_upsert
+from app.models.user import GarminCredentials, Workout
+from app.services.garmin_service import GarminService
+from app.services.workout_payloads import acquire_payloads, release_payloads
+from app.services.workout_structure import WorkoutStructure, index_structures, parse_workout
+
+logger = logging.getLogger(__name__)
+
+# A failed background refresh is not retried sooner than this
+REFRESH_RETRY_SECONDS = 60
+
+UPSERT_COLUMNS = [
+    "workout_name",
+    "workout_type",
+    "description",
+    "content_hash",
+    "garmin_updated_date",
+    "sport_type_key",
+    "estimated_duration_seconds",
+    "estimated_distance_meters",
+    "step_count",
+    "max_zone",
+    "deleted_at",
+]
+
+
+@dataclass
+class SyncResult:
+    created: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    deleted: int = 0
+    details_fetched: int = 0
+    workouts: List[Dict[str, Any]] = field(default_factory=list)
+
+
+async def sync_coach_library(
+    db: AsyncSession, coach_id: int, creds: GarminCredentials
+) -> Tuple[bool, str, Optional[SyncResult]]:
+    """Bring the coach's stored workouts in line with their Garmin library.
+
+    Garmin's ``updatedDate`` on the summary list decides which workouts need
+    their full details fetched; the content hash of those details decides
+    whether the stored row actually changes. Workouts that disappeared from
+    Garmin are tombstoned rather than deleted so existing shares keep
+    working. Garmin calls and database writes scale with the number of
+    changes, not the size of the library. Workout content is stored once
+    per distinct hash in ``workout_payloads``, already in upload-ready
+    form, and shared between coaches holding the same workout. New content
+    is parsed once into segments, steps and the summary columns coaches
+    filter on. On success ``library_synced_at`` is stamped; the caller
+    commits.
+    """
+    success, message, summaries = await GarminService.get_workouts(
+        creds.garmin_email_encrypted,
+        creds.garmin_password_encrypted,
+        creds.oauth_token_encrypted,
+    )
+    if not success:
+        return False, message, None
+    GarminService.persist_session(creds)
+
+    # Stamping the coach's credentials locks their row until the caller
+    # commits, so overlapping syncs of one coach take turns here and each
+    # counts payload references against the rows the previous one wrote.
+    await db.execute(
+        update(GarminCredentials)
+        .where(GarminCredentials.id == creds.id)
+        .values(library_synced_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+    existing_result = await db.execute(
+        select(
+            Workout.id,
+            Workout.garmin_workout_id,
+            Workout.garmin_updated_date,
+            Workout.content_hash,
+            Workout.deleted_at,
+        ).where(Workout.coach_id == coach_id)
+    )
+    existing = {row.garmin_workout_id: row for row in existing_result.all()}
+
+    result = SyncResult(workouts=summaries)
+    stale = []
+    for summary in summaries:
+        row = existing.get(summary["garmin_workout_id"])
+        if (
+            row is not None
+            and row.deleted_at is None
+            and row.garmin_updated_date is not None
+            and row.garmin_updated_date == summary["garmin_updated_date"]
+        ):
+            result.unchanged += 1
+        else:
+            stale.append(summary)
+
+    details = await _fetch_details(creds, [s["garmin_workout_id"] for s in stale])
+    result.details_fetched = sum(1 for d in details if d is not None)
+
+    upserts = []
+    touched = []
+    payloads: Dict[str, str] = {}
+    acquired: Counter = Counter()
+    released: Counter = Counter()
+    structures: Dict[str, WorkoutStructure] = {}
+    for summary, detail in zip(stale, details):
+        row = existing.get(summary["garmin_workout_id"])
+        if detail is None:
+            if row is not None:
+                # Keep what we have; the next sync tries the details again
+                if row.deleted_at is not None:
+                    touched.append({"id": row.id, "garmin_updated_date": None, "deleted_at": None})
+                result.unchanged += 1
+                continue
+            # Store the summary without a date so the next sync retries
+            workout_data = json.loads(summary["workout_data"])
+            updated_date = None
+        else:
+            workout_data = detail
+            updated_date = summary["garmin_updated_date"]
+
+        canonical = GarminService.canonical_json(workout_data)
+        content_hash = GarminService.workout_content_hash(canonical)
+        if row is not None and row.content_hash == content_hash:
+            touched.append({"id": row.id, "garmin_updated_date": updated_date, "deleted_at": None})
+            result.unchanged += 1
+            continue
+
+        structure = parse_workout(workout_data)
+        structures[content_hash] = structure
+        payloads[content_hash] = canonical
+        acquired[content_hash] += 1
+        if row is not None and row.content_hash:
+            released[row.content_hash] += 1
+        upserts.append({
+            "garmin_workout_id": summary["garmin_workout_id"],
+            "coach_id": coach_id,
+            "workout_name": summary["workout_name"],
+            "workout_type": structure.workout_type,
+            "description": summary["description"],
+            "content_hash": content_hash,
+            "garmin_updated_date": updated_date,
+            **structure.summary(),
+            "deleted_at": None,
+        })
+        if row is None:
+            result.created += 1
+        else:
+            result.updated += 1
+
+    await acquire_payloads(db, payloads, acquired)
+    await index_structures(db, structures)
+    await bulk_upsert(
+        db,
+        Workout,
+        upserts,
+        conflict_columns=["coach_id", "garmin_workout_id"],
+        update_columns=UPSERT_COLUMNS,
+    )
+    if touched:
+        await db.execute(update(Workout), touched)
+    await release_payloads(db, released)
+
+    seen = {s["garmin_workout_id"] for s in summaries}
+    removed = [
+        row.id for gw_id, row in existing.items() if gw_id not in seen and row.deleted_at is None
+    ]
+    if removed:
+        await db.execute(
+            update(Workout)
+            .where(Workout.id.in_(removed))
+            .values(deleted_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        result.deleted = len(removed)
+
+    logger.info(
+        f"Synced library for coach {coach_id}: {result.created} new, {result.updated} updated, "
+        f"{result.unchanged} unchanged, {result.deleted} deleted"
+    )
+    return True, "Library synced", result
+
+
+async def _fetch_details(
+    creds: GarminCredentials, workout_ids: List[str]
+) -> List[Optional[Dict[str, Any]]]:
+    """Fetch full workout details, returning None for any that failed."""
+    semaphore = asyncio.Semaphore(max(1, settings.GARMIN_SYNC_DETAIL_CONCURRENCY))
+
+    async def fetch(workout_id: str) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            success, message, detail = await GarminService.get_workout_details(
+                creds.garmin_email_encrypted,
+                creds.garmin_password_encrypted,
+                workout_id,
+                creds.oauth_token_encrypted,
+            )
+        if not success or not isinstance(detail, dict):
+            logger.warning(f"Keeping previous data for workout {workout_id}: {message}")
+            return None
+        return detail
+
+    return await asyncio.gather(*(fetch(workout_id) for workout_id in workout_ids))
+
+
+class LibraryRefresher:
+    """Refreshes coach workout libraries in the background.
+
+    The coach library is served from the database; this keeps it fresh by
+    running ``sync_coach_library`` once the stored copy is older than
+    ``WORKOUT_LIBRARY_TTL_SECONDS``. At most one refresh runs per coach, and
+    a failed refresh is retried only after ``REFRESH_RETRY_SECONDS``.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession] = async_session):
+        self.session_factory = session_factory
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._errors: Dict[int, Tuple[str, datetime]] = {}
+
+    def is_refreshing(self, coach_id: int) -> bool:
+        return coach_id in self._tasks
+
+    def last_error(self, coach_id: int) -> Optional[str]:
+        error = self._errors.get(coach_id)
+        return error[0] if error else None
+
+    def is_stale(self, synced_at: Optional[datetime]) -> bool:
+        if synced_at is None:
+            return True
+        if synced_at.tzinfo is None:
+            synced_at = synced_at.replace(tzinfo=timezone.utc)
+        age = datetime.now(timezone.utc) - synced_at
+        return age > timedelta(seconds=settings.WORKOUT_LIBRARY_TTL_SECONDS)
+
+    def schedule(self, coach_id: int, force: bool = False) -> bool:
+        """Start a refresh unless one is running or recently failed.
+
+        Returns True if a refresh is in progress afterwards.
+        """
+        if coach_id in self._tasks:
+            return True
+        error = self._errors.get(coach_id)
+        if error and not force:
+            if datetime.now(timezone.utc) - error[1] < timedelta(seconds=REFRESH_RETRY_SECONDS):
+                return False
+        task = asyncio.create_task(self.refresh(coach_id))
+        self._tasks[coach_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(coach_id, None))
+        return True
+
+    async def refresh(self, coach_id: int) -> bool:
+        """Sync one coach's library in its own session."""
+        try:
+            async with self.session_factory() as db:
+                creds = (
+                    await db.execute(
+                        select(GarminCredentials).where(GarminCredentials.user_id == coach_id)
+                    )
+                ).scalar_one_or_none()
+                if not creds or not creds.is_connected:
+                    self._errors[coach_id] = (
+                        "Please connect your Garmin account first (Settings > Garmin Connect)",
+                        datetime.now(timezone.utc),
+                    )
+                    return False
+                success, message, _ = await sync_coach_library(db, coach_id, creds)
+                if not success:
+                    await db.rollback()
+                    self._errors[coach_id] = (message, datetime.now(timezone.utc))
+                    return False
+                await db.commit()
+            self._errors.pop(coach_id, None)
+            return True
+        except Exception as e:
+            logger.error(f"Library refresh for coach {coach_id} failed: {e}", exc_info=True)
+            self._errors[coach_id] = (f"Library refresh failed: {e}", datetime.now(timezone.utc))
+            return False
+
+    async def wait(self, coach_id: int) -> None:
+        """Wait for a running refresh to finish, if any."""
+        task = self._tasks.get(coach_id)
+        if task is not None:
+            await asyncio.shield(task)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+library_refresher = LibraryRefresher()
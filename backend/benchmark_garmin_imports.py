@@ -0,0 +1,75 @@
+"""Benchmark athlete workout imports against the local Garmin stand-in.
+
+Nothing leaves the machine: logins, token exchanges and uploads are served by
+app.services.garmin_fake with the latency and failure rates given below.
+
+    python benchmark_garmin_imports.py --athletes 500 --workouts 5 --latency 0.2
+"""
+import argparse
+import asyncio
+import time
+
+from app.core.config import settings
+from app.core.security import encrypt_value
+from app.services import garmin_fake
+from app.services.garmin_client import close_async_client
+from app.services.garmin_executor import garmin_executor
+from app.services.garmin_fake import FakeGarminBackend, FakeGarminConfig
+from app.services.garmin_service import GarminService
+
+WORKOUT = {
+    "workoutName": "Benchmark Intervals",
+    "sportType": {"sportTypeId": 1, "sportTypeKey": "running"},
+    "workoutSegments": [{"segmentOrder": 1, "workoutSteps": [{"stepOrder": 1}]}],
+}
+
+
+async def run(args: argparse.Namespace) -> None:
+    settings.GARMIN_BACKEND = "fake"
+    settings.GARMIN_CLIENT_MODE = args.mode
+    backend = FakeGarminBackend(FakeGarminConfig(
+        latency_seconds=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    ))
+    garmin_fake.set_fake_backend(backend)
+
+    semaphore = asyncio.Semaphore(settings.GARMIN_PUSH_ACCOUNT_CONCURRENCY)
+
+    async def push(i: int):
+        async with semaphore:
+            return await GarminService.import_workouts(
+                encrypt_value(f"athlete{i}@bench.local"),
+                encrypt_value("pw"),
+                [WORKOUT] * args.workouts,
+            )
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(push(i) for i in range(args.athletes)))
+    elapsed = time.monotonic() - started
+
+    outcomes = [ok for athlete in results for ok, _, _ in athlete]
+    imported = sum(outcomes)
+    print(f"mode={args.mode} athletes={args.athletes} workouts/athlete={args.workouts}")
+    print(f"imported {imported}/{len(outcomes)} in {elapsed:.2f}s ({imported / elapsed:.1f}/s)")
+    print(f"fake Garmin: {backend.stats()}")
+    print(f"executor: {garmin_executor.stats()}")
+    await close_async_client()
+    garmin_executor.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--athletes", type=int, default=200)
+    parser.add_argument("--workouts", type=int, default=5)
+    parser.add_argument("--mode", choices=["sync", "async"], default="async")
+    parser.add_argument("--latency", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Recompute each user's unread message, pending workout and unread contact counts.
+
+badge_counts is adjusted in the same transaction as every API change to
+messages, shared workouts and contact requests. Changes made around the
+API, such as SQL run against those tables or a restore that leaves out
+badge_counts, are never counted. This overwrites every user's row with
+counts taken from the tables themselves.
+
+    python rebuild_badges.py
+"""
+import asyncio
+
+from app.core.database import async_session
+from app.services.badges import rebuild_badges
+
+
+async def main() -> None:
+    async with async_session() as db:
+        rebuilt = await rebuild_badges(db)
+        await db.commit()
+    print(f"Badge counters rebuilt for {rebuilt} users")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,25 @@
+"""Recount how many workouts point at each row of workout_payloads.
+
+A payload's ref_count should equal the number of workouts whose
+content_hash names it, and a payload is deleted when that reaches zero.
+This sets every ref_count from the workouts table and deletes the
+payloads no workout uses, such as those left behind by workouts deleted
+with SQL.
+
+    python recount_workout_payloads.py
+"""
+import asyncio
+
+from app.core.database import async_session
+from app.services.workout_payloads import recount_payloads
+
+
+async def main() -> None:
+    async with async_session() as db:
+        corrected, deleted = await recount_payloads(db)
+        await db.commit()
+    print(f"{corrected} reference counts corrected, {deleted} unreferenced payloads deleted")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
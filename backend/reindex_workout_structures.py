@@ -0,0 +1,22 @@
+"""Parse stored workout content into segments, steps and summary columns.
+
+Syncs index new content as it arrives; run this once after upgrading to
+index workouts synced earlier, and again whenever the parser changes.
+
+    python reindex_workout_structures.py
+"""
+import asyncio
+
+from app.core.database import async_session
+from app.services.workout_structure import reindex_structures
+
+
+async def main() -> None:
+    async with async_session() as db:
+        parsed = await reindex_structures(db)
+        await db.commit()
+    print(f"{parsed} workout payloads indexed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
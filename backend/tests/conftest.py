@@ -10,6 +10,7 @@ from app.core.database import Base, get_db
 from app.core.security import get_password_hash
 from app.main import app
 from app.models.user import User, UserRole
+from app.services.garmin_limits import garmin_limiter
 
 
 TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
@@ -29,6 +30,7 @@ def event_loop() -> Generator:
 async def setup_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    garmin_limiter.reset()
     yield
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
@@ -30,6 +30,7 @@ async def test_admin_stats_forbidden_for_athlete(client: AsyncClient, athlete_to
 async def test_list_users(client: AsyncClient, admin_token: str, athlete_user: User):
     resp = await client.get(
         "/api/v1/admin/users",
+        params={"include_total": True},
         headers={"Authorization": f"Bearer {admin_token}"},
     )
     assert resp.status_code == 200
@@ -39,6 +40,25 @@ async def test_list_users(client: AsyncClient, admin_token: str, athlete_user: U
     assert data["total"] >= 1
 
 
+@pytest.mark.asyncio
+async def test_list_users_pages(
+    client: AsyncClient, admin_token: str, coach_user: User, athlete_user: User
+):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    resp = await client.get("/api/v1/admin/users", params={"limit": 2}, headers=headers)
+    first = resp.json()
+    assert len(first["users"]) == 2
+    assert first["total"] is None
+
+    resp = await client.get(
+        "/api/v1/admin/users", params={"limit": 2, "cursor": first["next_cursor"]}, headers=headers
+    )
+    second = resp.json()
+    assert second["next_cursor"] is None
+    ids = [u["id"] for u in first["users"] + second["users"]]
+    assert len(ids) == len(set(ids)) == 3
+
+
 @pytest.mark.asyncio
 async def test_list_users_filter_by_role(client: AsyncClient, admin_token: str, coach_user: User):
     resp = await client.get(
@@ -1,11 +1,20 @@
+import asyncio
 import json
+from datetime import datetime, timedelta, timezone
 
 import pytest
+from garminconnect import GarminConnectConnectionError
 from httpx import AsyncClient
+from sqlalchemy import event, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_password_hash
-from app.models.user import SharedWorkout, User, UserRole, Workout
+from app.core.config import settings
+from app.core.security import encrypt_value, get_password_hash
+from app.models.user import GarminCredentials, ImportJob, SharedWorkout, User, UserRole, Workout
+from app.services.garmin_service import GarminService
+from app.services.import_jobs import ImportJobWorker
+from app.services.workout_payloads import store_workout_payload
+from tests.conftest import TestSessionLocal, engine as test_engine
 
 
 @pytest.mark.asyncio
@@ -58,7 +67,7 @@ async def test_athlete_get_workouts(
         coach_id=coach_user.id,
         workout_name="Test Run",
         workout_type="running",
-        workout_data=json.dumps({"workoutId": "test-123"}),
+        content_hash=await store_workout_payload(db_session, {"workoutId": "test-123"}),
         description="5K easy run",
     )
     db_session.add(workout)
@@ -79,14 +88,29 @@ async def test_athlete_get_workouts(
     )
     token = resp.json()["access_token"]
 
-    resp = await client.get(
-        "/api/v1/athlete/workouts",
-        headers={"Authorization": f"Bearer {token}"},
-    )
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        resp = await client.get(
+            "/api/v1/athlete/workouts",
+            params={"include_total": True},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
     assert resp.status_code == 200
     data = resp.json()
     assert data["total"] >= 1
     assert any(w["workout_name"] == "Test Run" for w in data["workouts"])
+    assert data["workouts"][0]["coach_name"] == coach_user.full_name
+    # Workout content is never loaded for the list
+    assert not any("workout_payloads" in s for s in statements)
+    # Coach names come from one batched query
+    assert sum(s.startswith("SELECT users.id, users.full_name") for s in statements) == 1
 
 
 @pytest.mark.asyncio
@@ -100,7 +124,7 @@ async def test_athlete_remove_pending_workout(
         coach_id=coach_user.id,
         workout_name="Workout to Remove",
         workout_type="running",
-        workout_data=json.dumps({"workoutId": "remove-test"}),
+        content_hash=await store_workout_payload(db_session, {"workoutId": "remove-test"}),
     )
     db_session.add(workout)
     await db_session.flush()
@@ -138,7 +162,7 @@ async def test_athlete_remove_imported_workout(
         coach_id=coach_user.id,
         workout_name="Imported Workout",
         workout_type="cycling",
-        workout_data=json.dumps({"workoutId": "imported-test"}),
+        content_hash=await store_workout_payload(db_session, {"workoutId": "imported-test"}),
     )
     db_session.add(workout)
     await db_session.flush()
@@ -185,7 +209,7 @@ async def test_athlete_cannot_remove_others_workout(
         coach_id=coach_user.id,
         workout_name="Other's Workout",
         workout_type="running",
-        workout_data=json.dumps({"workoutId": "other-test"}),
+        content_hash=await store_workout_payload(db_session, {"workoutId": "other-test"}),
     )
     db_session.add(workout)
     await db_session.flush()
@@ -220,3 +244,381 @@ async def test_coach_cannot_access_athlete_endpoints(client: AsyncClient, coach_
         headers={"Authorization": f"Bearer {coach_token}"},
     )
     assert resp.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_athlete_import_is_queued_and_processed(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    athlete_token: str,
+    monkeypatch,
+):
+    """Imports are queued, then processed by the worker behind one login."""
+    db_session.add(GarminCredentials(
+        user_id=athlete_user.id,
+        garmin_email_encrypted=encrypt_value("athlete@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    shared_ids = []
+    for i in range(3):
+        workout = Workout(
+            garmin_workout_id=f"batch-{i}",
+            coach_id=coach_user.id,
+            workout_name=f"Batch {i}",
+            workout_type="running",
+            content_hash=await store_workout_payload(db_session, {"workoutId": f"batch-{i}", "workoutName": f"Batch {i}"}),
+        )
+        db_session.add(workout)
+        await db_session.flush()
+        shared = SharedWorkout(
+            workout_id=workout.id,
+            coach_id=coach_user.id,
+            athlete_id=athlete_user.id,
+            status="pending",
+        )
+        db_session.add(shared)
+        await db_session.flush()
+        shared_ids.append(shared.id)
+    await db_session.commit()
+
+    logins = []
+    uploads = []
+
+    async def fake_authenticate(*args, **kwargs):
+        logins.append(args)
+
+    async def fake_call(email, password, operation, *args, **kwargs):
+        assert operation == "upload_workout"
+        assert "workoutId" not in json.loads(args[0])
+        uploads.append(args[0])
+        return {"workoutId": 1000 + len(uploads)}
+
+    monkeypatch.setattr(GarminService, "_authenticate", staticmethod(fake_authenticate))
+    monkeypatch.setattr(GarminService, "_call", staticmethod(fake_call))
+
+    resp = await client.post(
+        "/api/v1/athlete/workouts/import",
+        json={"shared_workout_ids": shared_ids + [99999]},
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+    assert resp.status_code == 202
+    job = resp.json()
+    assert job["status"] == "queued"
+    assert [i["shared_workout_id"] for i in job["items"]] == shared_ids
+    assert [r["shared_workout_id"] for r in job["rejected"]] == [99999]
+    assert uploads == []
+
+    worker = ImportJobWorker(session_factory=TestSessionLocal)
+    assert await worker.run_once() is True
+    assert await worker.run_once() is False
+    assert len(logins) == 1
+    assert len(uploads) == 3
+
+    resp = await client.get(
+        f"/api/v1/athlete/import-jobs/{job['job_id']}",
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+    assert resp.status_code == 200
+    job = resp.json()
+    assert job["status"] == "completed"
+    assert {i["status"] for i in job["items"]} == {"imported"}
+
+    statuses = (
+        await db_session.execute(
+            select(SharedWorkout.status).where(SharedWorkout.id.in_(shared_ids))
+        )
+    ).scalars().all()
+    assert set(statuses) == {"imported"}
+
+
+@pytest.mark.asyncio
+async def test_import_job_retries_transient_failures_with_backoff(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    athlete_token: str,
+    monkeypatch,
+):
+    """A Garmin outage requeues the job with backoff instead of failing it."""
+    db_session.add(GarminCredentials(
+        user_id=athlete_user.id,
+        garmin_email_encrypted=encrypt_value("athlete@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    workout = Workout(
+        garmin_workout_id="retry-1",
+        coach_id=coach_user.id,
+        workout_name="Retry Run",
+        workout_type="running",
+        content_hash=await store_workout_payload(db_session, {"workoutId": "retry-1"}),
+    )
+    db_session.add(workout)
+    await db_session.flush()
+    shared = SharedWorkout(
+        workout_id=workout.id, coach_id=coach_user.id, athlete_id=athlete_user.id, status="pending"
+    )
+    db_session.add(shared)
+    await db_session.commit()
+
+    async def garmin_down(*args, **kwargs):
+        raise GarminConnectConnectionError("down")
+
+    monkeypatch.setattr(GarminService, "_authenticate", staticmethod(garmin_down))
+
+    resp = await client.post(
+        "/api/v1/athlete/workouts/import",
+        json={"shared_workout_ids": [shared.id]},
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+    job_id = resp.json()["job_id"]
+
+    worker = ImportJobWorker(session_factory=TestSessionLocal)
+    assert await worker.run_once() is True
+    # Not due again until the backoff has elapsed
+    assert await worker.run_once() is False
+
+    resp = await client.get(
+        f"/api/v1/athlete/import-jobs/{job_id}",
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+    job = resp.json()
+    assert job["status"] == "queued"
+    assert job["attempts"] == 1
+    assert job["next_run_at"] is not None
+    assert job["items"][0]["status"] == "queued"
+
+
+@pytest.mark.asyncio
+async def test_worker_stops_when_its_lease_is_taken(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    athlete_token: str,
+    monkeypatch,
+):
+    """The lease is renewed between uploads; a worker that lost it goes no further."""
+    db_session.add(GarminCredentials(
+        user_id=athlete_user.id,
+        garmin_email_encrypted=encrypt_value("athlete@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    shared_ids = []
+    for i in range(3):
+        workout = Workout(
+            garmin_workout_id=f"lease-{i}",
+            coach_id=coach_user.id,
+            workout_name=f"Lease {i}",
+            workout_type="running",
+            content_hash=await store_workout_payload(db_session, {"workoutId": f"lease-{i}", "workoutName": f"Lease {i}"}),
+        )
+        db_session.add(workout)
+        await db_session.flush()
+        shared = SharedWorkout(
+            workout_id=workout.id, coach_id=coach_user.id, athlete_id=athlete_user.id, status="pending"
+        )
+        db_session.add(shared)
+        await db_session.flush()
+        shared_ids.append(shared.id)
+    await db_session.commit()
+
+    resp = await client.post(
+        "/api/v1/athlete/workouts/import",
+        json={"shared_workout_ids": shared_ids},
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+    job_id = resp.json()["job_id"]
+
+    uploads = []
+
+    async def fake_authenticate(*args, **kwargs):
+        pass
+
+    async def slow_upload(email, password, operation, *args, **kwargs):
+        uploads.append(args[0])
+        # Another worker takes over while this upload runs
+        async with TestSessionLocal() as db:
+            await db.execute(update(ImportJob).values(lease_owner="other-worker"))
+            await db.commit()
+        return {"workoutId": 2000 + len(uploads)}
+
+    monkeypatch.setattr(settings, "GARMIN_IMPORT_CONCURRENCY", 1)
+    monkeypatch.setattr(GarminService, "_authenticate", staticmethod(fake_authenticate))
+    monkeypatch.setattr(GarminService, "_call", staticmethod(slow_upload))
+
+    worker = ImportJobWorker(session_factory=TestSessionLocal, worker_id="w1")
+    assert await worker.run_once() is True
+    assert len(uploads) == 1
+
+    async with TestSessionLocal() as db:
+        job = await db.get(ImportJob, job_id)
+        assert job.lease_owner == "other-worker"
+        statuses = (
+            await db.execute(select(SharedWorkout.status).where(SharedWorkout.id.in_(shared_ids)))
+        ).scalars().all()
+    assert set(statuses) == {"pending"}
+
+
+@pytest.mark.asyncio
+async def test_each_batch_is_stamped_when_it_lands(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    athlete_token: str,
+    monkeypatch,
+):
+    """A share's imported_at is taken after its own upload, not when the job started."""
+    db_session.add(GarminCredentials(
+        user_id=athlete_user.id,
+        garmin_email_encrypted=encrypt_value("athlete@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    shared_ids = []
+    for i in range(2):
+        workout = Workout(
+            garmin_workout_id=f"stamp-{i}",
+            coach_id=coach_user.id,
+            workout_name=f"Stamp {i}",
+            workout_type="running",
+            content_hash=await store_workout_payload(db_session, {"workoutId": f"stamp-{i}", "workoutName": f"Stamp {i}"}),
+        )
+        db_session.add(workout)
+        await db_session.flush()
+        shared = SharedWorkout(
+            workout_id=workout.id, coach_id=coach_user.id, athlete_id=athlete_user.id, status="pending"
+        )
+        db_session.add(shared)
+        await db_session.flush()
+        shared_ids.append(shared.id)
+    await db_session.commit()
+
+    await client.post(
+        "/api/v1/athlete/workouts/import",
+        json={"shared_workout_ids": shared_ids},
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+
+    uploaded_at = []
+
+    async def fake_authenticate(*args, **kwargs):
+        pass
+
+    async def slow_upload(email, password, operation, *args, **kwargs):
+        await asyncio.sleep(0.05)
+        uploaded_at.append(datetime.now(timezone.utc))
+        return {"workoutId": 4000 + len(uploaded_at)}
+
+    monkeypatch.setattr(settings, "GARMIN_IMPORT_CONCURRENCY", 1)
+    monkeypatch.setattr(GarminService, "_authenticate", staticmethod(fake_authenticate))
+    monkeypatch.setattr(GarminService, "_call", staticmethod(slow_upload))
+
+    worker = ImportJobWorker(session_factory=TestSessionLocal, worker_id="w1")
+    assert await worker.run_once() is True
+
+    async with TestSessionLocal() as db:
+        shares = (
+            await db.execute(select(SharedWorkout).where(SharedWorkout.id.in_(shared_ids)))
+        ).scalars().all()
+    stamps = sorted(s.imported_at.replace(tzinfo=timezone.utc) for s in shares)
+    assert len(uploaded_at) == 2
+    assert stamps[1] >= uploaded_at[1]
+
+
+@pytest.mark.asyncio
+async def test_worker_does_not_finish_a_job_taken_during_its_last_batch(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    athlete_token: str,
+    monkeypatch,
+):
+    """A worker that lost its lease during the last batch leaves the job to its new owner."""
+    db_session.add(GarminCredentials(
+        user_id=athlete_user.id,
+        garmin_email_encrypted=encrypt_value("athlete@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    workout = Workout(
+        garmin_workout_id="last-batch",
+        coach_id=coach_user.id,
+        workout_name="Last Batch",
+        workout_type="running",
+        content_hash=await store_workout_payload(db_session, {"workoutId": "last-batch", "workoutName": "Last Batch"}),
+    )
+    db_session.add(workout)
+    await db_session.flush()
+    shared = SharedWorkout(
+        workout_id=workout.id, coach_id=coach_user.id, athlete_id=athlete_user.id, status="pending"
+    )
+    db_session.add(shared)
+    await db_session.commit()
+
+    resp = await client.post(
+        "/api/v1/athlete/workouts/import",
+        json={"shared_workout_ids": [shared.id]},
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+    job_id = resp.json()["job_id"]
+
+    async def fake_authenticate(*args, **kwargs):
+        pass
+
+    async def slow_upload(email, password, operation, *args, **kwargs):
+        # Another worker takes over while the only batch runs
+        async with TestSessionLocal() as db:
+            await db.execute(update(ImportJob).values(lease_owner="other-worker"))
+            await db.commit()
+        return {"workoutId": 3001}
+
+    monkeypatch.setattr(GarminService, "_authenticate", staticmethod(fake_authenticate))
+    monkeypatch.setattr(GarminService, "_call", staticmethod(slow_upload))
+
+    worker = ImportJobWorker(session_factory=TestSessionLocal, worker_id="w1")
+    assert await worker.run_once() is True
+
+    async with TestSessionLocal() as db:
+        job = await db.get(ImportJob, job_id)
+        assert job.lease_owner == "other-worker"
+        assert job.lease_expires_at is not None
+        assert job.status == "running"
+        assert job.finished_at is None
+        status = (
+            await db.execute(select(SharedWorkout.status).where(SharedWorkout.id == shared.id))
+        ).scalar_one()
+    assert status == "pending"
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_reclaimed(db_session: AsyncSession, athlete_user: User):
+    """A job held by a crashed worker is picked up once its lease expires."""
+    now = datetime.now(timezone.utc)
+    held = ImportJob(
+        athlete_id=athlete_user.id,
+        status="running",
+        attempts=1,
+        lease_owner="crashed-worker",
+        lease_expires_at=now + timedelta(minutes=5),
+    )
+    expired = ImportJob(
+        athlete_id=athlete_user.id,
+        status="running",
+        attempts=1,
+        lease_owner="crashed-worker",
+        lease_expires_at=now - timedelta(minutes=5),
+    )
+    db_session.add_all([held, expired])
+    await db_session.commit()
+
+    worker = ImportJobWorker(session_factory=TestSessionLocal, worker_id="w2")
+    assert await worker.claim() == expired.id
+    assert await worker.claim() is None
@@ -0,0 +1,193 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import BadgeCounts, User, Workout
+from app.services.badges import rebuild_badges
+from tests.conftest import TestSessionLocal
+
+
+async def get_badges(client: AsyncClient, token: str) -> dict:
+    resp = await client.get("/api/v1/auth/me/badges", headers={"Authorization": f"Bearer {token}"})
+    assert resp.status_code == 200
+    return resp.json()
+
+
+@pytest.mark.asyncio
+async def test_badges_row_built_on_first_read(
+    client: AsyncClient, db_session: AsyncSession, athlete_user: User, athlete_token: str
+):
+    assert await get_badges(client, athlete_token) == {
+        "unread_messages": 0,
+        "pending_workouts": 0,
+        "unread_contacts": 0,
+    }
+    async with TestSessionLocal() as db:
+        assert await db.get(BadgeCounts, athlete_user.id) is not None
+
+
+@pytest.mark.asyncio
+async def test_first_change_creates_counted_row(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    coach_token: str,
+    athlete_token: str,
+):
+    """A change for a user without counters builds them, including that change."""
+    athlete_user.coach_id = coach_user.id
+    await db_session.commit()
+    for body in ("First", "Second"):
+        await client.post(
+            "/api/v1/messages/send",
+            headers={"Authorization": f"Bearer {coach_token}"},
+            json={"recipient_id": athlete_user.id, "body": body},
+        )
+
+    async with TestSessionLocal() as db:
+        row = await db.get(BadgeCounts, athlete_user.id)
+        assert row is not None
+        assert row.unread_messages == 2
+    assert (await get_badges(client, athlete_token))["unread_messages"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unread_messages_follow_sends_and_reads(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    coach_token: str,
+    athlete_token: str,
+):
+    athlete_user.coach_id = coach_user.id
+    await db_session.commit()
+    await get_badges(client, athlete_token)
+
+    sent = []
+    for body in ("First", "Second"):
+        resp = await client.post(
+            "/api/v1/messages/send",
+            headers={"Authorization": f"Bearer {coach_token}"},
+            json={"recipient_id": athlete_user.id, "body": body},
+        )
+        sent.append(resp.json())
+    assert (await get_badges(client, athlete_token))["unread_messages"] == 2
+
+    # Reading twice only counts once
+    for _ in range(2):
+        await client.put(
+            f"/api/v1/messages/{sent[0]['id']}/read",
+            headers={"Authorization": f"Bearer {athlete_token}"},
+        )
+    assert (await get_badges(client, athlete_token))["unread_messages"] == 1
+
+    resp = await client.get(
+        "/api/v1/messages/conversations", headers={"Authorization": f"Bearer {athlete_token}"}
+    )
+    conversation_id = resp.json()["conversations"][0]["id"]
+    await client.put(
+        f"/api/v1/messages/conversations/{conversation_id}/read",
+        headers={"Authorization": f"Bearer {athlete_token}"},
+    )
+    assert (await get_badges(client, athlete_token))["unread_messages"] == 0
+
+
+@pytest.mark.asyncio
+async def test_pending_workouts_follow_shares(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    coach_token: str,
+    athlete_token: str,
+):
+    for i in range(2):
+        db_session.add(Workout(
+            garmin_workout_id=f"w-{i}",
+            coach_id=coach_user.id,
+            workout_name=f"Tempo {i}",
+            workout_type="running",
+        ))
+    await db_session.commit()
+    await get_badges(client, athlete_token)
+
+    resp = await client.post(
+        "/api/v1/coach/share-workouts",
+        headers={"Authorization": f"Bearer {coach_token}"},
+        json={"athlete_id": athlete_user.id, "garmin_workout_ids": ["w-0", "w-1"]},
+    )
+    assert resp.json()["shared_count"] == 2
+    assert (await get_badges(client, athlete_token))["pending_workouts"] == 2
+
+    resp = await client.get("/api/v1/athlete/workouts", headers={"Authorization": f"Bearer {athlete_token}"})
+    shared_id = resp.json()["workouts"][0]["id"]
+    await client.delete(
+        f"/api/v1/athlete/workouts/{shared_id}", headers={"Authorization": f"Bearer {athlete_token}"}
+    )
+    assert (await get_badges(client, athlete_token))["pending_workouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_contact_requests_counted_for_admins_only(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    admin_user: User,
+    coach_user: User,
+    admin_token: str,
+    coach_token: str,
+):
+    await get_badges(client, admin_token)
+    await get_badges(client, coach_token)
+
+    resp = await client.post(
+        "/api/v1/public/contact",
+        json={"name": "Jane Doe", "email": "jane@example.com", "message": "Looking for a marathon coach."},
+    )
+    assert resp.status_code == 201
+    assert (await get_badges(client, admin_token))["unread_contacts"] == 1
+    assert (await get_badges(client, coach_token))["unread_contacts"] == 0
+
+    resp = await client.get("/api/v1/admin/contacts", headers={"Authorization": f"Bearer {admin_token}"})
+    contact_id = resp.json()[0]["id"]
+    for _ in range(2):
+        await client.put(
+            f"/api/v1/admin/contacts/{contact_id}/read",
+            headers={"Authorization": f"Bearer {admin_token}"},
+        )
+    assert (await get_badges(client, admin_token))["unread_contacts"] == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_corrects_drifted_counters(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    coach_token: str,
+    athlete_token: str,
+):
+    athlete_user.coach_id = coach_user.id
+    await db_session.commit()
+    await get_badges(client, athlete_token)
+    await client.post(
+        "/api/v1/messages/send",
+        headers={"Authorization": f"Bearer {coach_token}"},
+        json={"recipient_id": athlete_user.id, "body": "Hello"},
+    )
+
+    async with TestSessionLocal() as db:
+        await db.execute(update(BadgeCounts).values(unread_messages=7, pending_workouts=3))
+        await db.commit()
+    assert (await get_badges(client, athlete_token))["unread_messages"] == 7
+
+    async with TestSessionLocal() as db:
+        assert await rebuild_badges(db) == 2
+        await db.commit()
+        rows = (await db.execute(select(BadgeCounts).order_by(BadgeCounts.user_id))).scalars().all()
+    assert [(r.user_id, r.unread_messages, r.pending_workouts) for r in rows] == [
+        (coach_user.id, 0, 0),
+        (athlete_user.id, 1, 0),
+    ]
@@ -1,9 +1,35 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from fastapi import status
 from httpx import AsyncClient
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User, UserRole
+from app.core.security import encrypt_value
+from app.models.user import (
+    GarminCredentials,
+    ImportJob,
+    ImportJobItem,
+    SharedWorkout,
+    User,
+    UserRole,
+    Workout,
+    WorkoutPayload,
+)
+from app.services.garmin_service import GarminService
+from app.services.workout_payloads import load_payloads, store_workout_payload
+from app.services.workout_sync import LibraryRefresher, library_refresher
+from tests.conftest import TestSessionLocal, engine as test_engine
+
+
+@pytest.fixture(autouse=True)
+def isolated_library_refresher(monkeypatch):
+    """Background library refreshes use the test database."""
+    monkeypatch.setattr(library_refresher, "session_factory", TestSessionLocal)
+    monkeypatch.setattr(library_refresher, "_errors", {})
 
 
 @pytest.mark.asyncio
@@ -164,3 +190,551 @@ async def test_unauthenticated_cannot_list_users(client: AsyncClient):
     """Unauthenticated users cannot access the coach users endpoint."""
     resp = await client.get("/api/v1/coach/users")
     assert resp.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_coach_push_workouts_to_many_athletes(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, coach_token: str, monkeypatch
+):
+    """Coach pushes workouts to several athletes in one call and gets a results matrix."""
+    connected = User(
+        email="connected@example.com",
+        hashed_password="hash",
+        full_name="Connected Athlete",
+        role=UserRole.ATHLETE,
+        coach_id=coach_user.id,
+    )
+    unconnected = User(
+        email="unconnected@example.com",
+        hashed_password="hash",
+        full_name="Unconnected Athlete",
+        role=UserRole.ATHLETE,
+        coach_id=coach_user.id,
+    )
+    db_session.add_all([connected, unconnected])
+    await db_session.flush()
+    db_session.add(GarminCredentials(
+        user_id=connected.id,
+        garmin_email_encrypted=encrypt_value("connected@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    for i in range(2):
+        db_session.add(Workout(
+            garmin_workout_id=f"push-{i}",
+            coach_id=coach_user.id,
+            workout_name=f"Push {i}",
+            workout_type="running",
+            content_hash=await store_workout_payload(db_session, {"workoutId": f"push-{i}"}),
+        ))
+    await db_session.commit()
+
+    uploads = []
+
+    async def fake_authenticate(*args, **kwargs):
+        pass
+
+    async def fake_call(email, password, operation, *args, **kwargs):
+        uploads.append(args[0])
+        return {"workoutId": 500 + len(uploads)}
+
+    monkeypatch.setattr(GarminService, "_authenticate", staticmethod(fake_authenticate))
+    monkeypatch.setattr(GarminService, "_call", staticmethod(fake_call))
+
+    resp = await client.post(
+        "/api/v1/coach/push-workouts",
+        json={
+            "garmin_workout_ids": ["push-0", "push-1", "missing"],
+            "athlete_ids": [connected.id, unconnected.id],
+        },
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["imported_count"] == 2
+    assert data["pending_count"] == 2
+    assert len(data["errors"]) == 1
+    assert len(uploads) == 2
+    matrix = {a["athlete_id"]: {c["garmin_workout_id"]: c["status"] for c in a["results"]} for a in data["athletes"]}
+    assert matrix[connected.id] == {"push-0": "imported", "push-1": "imported"}
+    assert matrix[unconnected.id] == {"push-0": "pending", "push-1": "pending"}
+
+    rows = (await db_session.execute(select(SharedWorkout))).scalars().all()
+    assert len(rows) == 4
+
+    # Pushing again does not duplicate shares or re-upload imported workouts
+    resp = await client.post(
+        "/api/v1/coach/push-workouts",
+        json={"garmin_workout_ids": ["push-0"], "athlete_ids": [connected.id]},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert resp.json()["athletes"][0]["results"][0]["status"] == "already_imported"
+    assert len(uploads) == 2
+
+
+@pytest.mark.asyncio
+async def test_push_leaves_shares_with_a_queued_import_to_the_job(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, coach_token: str, monkeypatch
+):
+    """A share the athlete has already queued for import is not uploaded by the push as well."""
+    athlete = User(
+        email="queued@example.com",
+        hashed_password="hash",
+        full_name="Queued Athlete",
+        role=UserRole.ATHLETE,
+        coach_id=coach_user.id,
+    )
+    db_session.add(athlete)
+    await db_session.flush()
+    db_session.add(GarminCredentials(
+        user_id=athlete.id,
+        garmin_email_encrypted=encrypt_value("queued@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    workout = Workout(
+        garmin_workout_id="push-queued",
+        coach_id=coach_user.id,
+        workout_name="Push queued",
+        workout_type="running",
+        content_hash=await store_workout_payload(db_session, {"workoutId": "push-queued"}),
+    )
+    db_session.add(workout)
+    await db_session.flush()
+    share = SharedWorkout(
+        workout_id=workout.id, coach_id=coach_user.id, athlete_id=athlete.id, status="pending"
+    )
+    db_session.add(share)
+    await db_session.flush()
+    job = ImportJob(athlete_id=athlete.id, status="queued")
+    db_session.add(job)
+    await db_session.flush()
+    db_session.add(ImportJobItem(job_id=job.id, shared_workout_id=share.id, status="queued"))
+    await db_session.commit()
+
+    uploads = []
+
+    async def fake_call(email, password, operation, *args, **kwargs):
+        uploads.append(args[0])
+        return {"workoutId": 600}
+
+    monkeypatch.setattr(GarminService, "_call", staticmethod(fake_call))
+
+    resp = await client.post(
+        "/api/v1/coach/push-workouts",
+        json={"garmin_workout_ids": ["push-queued"], "athlete_ids": [athlete.id]},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["pending_count"] == 1
+    assert data["athletes"][0]["results"][0]["status"] == "pending"
+    assert uploads == []
+
+
+@pytest.mark.asyncio
+async def test_push_reports_failed_share_of_unconnected_athlete(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, coach_token: str
+):
+    """A failed share stays failed, with its error, while the athlete is disconnected."""
+    athlete = User(
+        email="disconnected@example.com",
+        hashed_password="hash",
+        full_name="Disconnected Athlete",
+        role=UserRole.ATHLETE,
+        coach_id=coach_user.id,
+    )
+    db_session.add(athlete)
+    await db_session.flush()
+    workout = Workout(
+        garmin_workout_id="push-failed",
+        coach_id=coach_user.id,
+        workout_name="Push failed",
+        workout_type="running",
+        content_hash=await store_workout_payload(db_session, {"workoutId": "push-failed"}),
+    )
+    db_session.add(workout)
+    await db_session.flush()
+    db_session.add(SharedWorkout(
+        workout_id=workout.id,
+        coach_id=coach_user.id,
+        athlete_id=athlete.id,
+        status="failed",
+        import_error="Garmin rejected the workout",
+    ))
+    await db_session.commit()
+
+    resp = await client.post(
+        "/api/v1/coach/push-workouts",
+        json={"garmin_workout_ids": ["push-failed"], "athlete_ids": [athlete.id]},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["failed_count"] == 1
+    assert data["pending_count"] == 0
+    cell = data["athletes"][0]["results"][0]
+    assert cell["status"] == "failed"
+    assert cell["message"] == "Garmin rejected the workout"
+
+
+@pytest.mark.asyncio
+async def test_coach_workout_sync_uses_constant_queries(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, coach_token: str, monkeypatch
+):
+    """Syncing the Garmin library costs the same number of queries for any library size."""
+    db_session.add(GarminCredentials(
+        user_id=coach_user.id,
+        garmin_email_encrypted=encrypt_value("coach@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    db_session.add(Workout(
+        garmin_workout_id="w-0",
+        coach_id=coach_user.id,
+        workout_name="Old Name",
+        workout_type="running",
+    ))
+    await db_session.commit()
+
+    library = [
+        {
+            "garmin_workout_id": f"w-{i}",
+            "workout_name": f"Workout {i}",
+            "workout_type": "running",
+            "description": "",
+            "garmin_updated_date": "2026-01-01T00:00:00.0",
+            "workout_data": json.dumps({"workoutId": i}),
+        }
+        for i in range(50)
+    ]
+
+    async def fake_get_workouts(*args, **kwargs):
+        return True, "ok", library
+
+    async def fake_get_workout_details(enc_email, enc_pw, workout_id, token=None):
+        return True, "ok", {"workoutId": workout_id, "workoutSegments": []}
+
+    monkeypatch.setattr(GarminService, "get_workouts", staticmethod(fake_get_workouts))
+    monkeypatch.setattr(GarminService, "get_workout_details", staticmethod(fake_get_workout_details))
+
+    workout_statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "workouts" in statement and "shared_workouts" not in statement:
+            workout_statements.append(statement.split()[0])
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        assert await library_refresher.refresh(coach_user.id)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", count)
+    assert workout_statements == ["SELECT", "INSERT"]
+
+    rows = (
+        await db_session.execute(
+            select(Workout)
+            .where(Workout.coach_id == coach_user.id)
+            .execution_options(populate_existing=True)
+        )
+    ).scalars().all()
+    assert len(rows) == 50
+    assert {r.workout_name for r in rows if r.garmin_workout_id == "w-0"} == {"Workout 0"}
+    assert all(r.created_at is not None for r in rows)
+    # The 50 workouts only differ in their Garmin id, so their content is stored once
+    payload = (await db_session.execute(select(WorkoutPayload))).scalar_one()
+    assert payload.ref_count == 50
+    assert {r.content_hash for r in rows} == {payload.content_hash}
+    assert GarminService.workout_content_hash(payload.payload) == payload.content_hash
+
+
+@pytest.mark.asyncio
+async def test_coach_workout_sync_is_incremental(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    coach_token: str,
+    athlete_user: User,
+    monkeypatch,
+):
+    """Only changed workouts are fetched and written; removed ones are tombstoned."""
+    db_session.add(GarminCredentials(
+        user_id=coach_user.id,
+        garmin_email_encrypted=encrypt_value("coach@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    await db_session.commit()
+
+    def summary(workout_id, updated):
+        return {
+            "garmin_workout_id": workout_id,
+            "workout_name": f"Workout {workout_id}",
+            "workout_type": "running",
+            "description": "",
+            "garmin_updated_date": updated,
+            "workout_data": json.dumps({"workoutId": workout_id}),
+        }
+
+    library = [summary(f"w-{i}", "2026-01-01") for i in range(10)]
+    details = {f"w-{i}": {"workoutId": f"w-{i}", "steps": [i]} for i in range(10)}
+    fetched = []
+
+    async def fake_get_workouts(*args, **kwargs):
+        return True, "ok", library
+
+    async def fake_get_workout_details(enc_email, enc_pw, workout_id, token=None):
+        fetched.append(workout_id)
+        return True, "ok", {**details[workout_id], "updatedDate": "ignored"}
+
+    monkeypatch.setattr(GarminService, "get_workouts", staticmethod(fake_get_workouts))
+    monkeypatch.setattr(GarminService, "get_workout_details", staticmethod(fake_get_workout_details))
+    assert await library_refresher.refresh(coach_user.id)
+    assert len(fetched) == 10
+
+    # Nothing changed: no detail fetches and no writes
+    fetched.clear()
+    workout_statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if "workouts" in statement and "shared_workouts" not in statement:
+            workout_statements.append(statement.split()[0])
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", count)
+    try:
+        assert await library_refresher.refresh(coach_user.id)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", count)
+    assert fetched == []
+    assert workout_statements == ["SELECT"]
+
+    # w-1 edited, w-2 re-saved without changes, w-3 deleted in Garmin
+    library[1] = summary("w-1", "2026-02-01")
+    details["w-1"] = {"workoutId": "w-1", "steps": ["changed"]}
+    library[2] = summary("w-2", "2026-02-01")
+    del library[3]
+    assert await library_refresher.refresh(coach_user.id)
+    assert sorted(fetched) == ["w-1", "w-2"]
+
+    rows = {
+        r.garmin_workout_id: r
+        for r in (
+            await db_session.execute(
+                select(Workout)
+                .where(Workout.coach_id == coach_user.id)
+                .execution_options(populate_existing=True)
+            )
+        ).scalars().all()
+    }
+    payloads = await load_payloads(db_session, [r.content_hash for r in rows.values()])
+    assert json.loads(payloads[rows["w-1"].content_hash])["steps"] == ["changed"]
+    # The replaced content of w-1 is collected; the tombstoned w-3 keeps its content
+    hashes = (await db_session.execute(select(WorkoutPayload.content_hash))).scalars().all()
+    assert sorted(hashes) == sorted(r.content_hash for r in rows.values())
+    assert rows["w-2"].garmin_updated_date == "2026-02-01"
+    assert rows["w-3"].deleted_at is not None
+    assert all(r.deleted_at is None for k, r in rows.items() if k != "w-3")
+
+    # A tombstoned workout can no longer be shared
+    resp = await client.post(
+        "/api/v1/coach/share-workouts",
+        json={"garmin_workout_ids": ["w-3"], "athlete_id": athlete_user.id},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert resp.json()["shared_count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_overlapping_syncs_release_replaced_content_once(
+    db_session: AsyncSession, coach_user: User, monkeypatch
+):
+    """Two syncs of one coach at once count each payload reference once."""
+    db_session.add(GarminCredentials(
+        user_id=coach_user.id,
+        garmin_email_encrypted=encrypt_value("coach@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    await db_session.commit()
+
+    library = [{
+        "garmin_workout_id": "w-0",
+        "workout_name": "Workout w-0",
+        "workout_type": "running",
+        "description": "",
+        "garmin_updated_date": "2026-01-01",
+        "workout_data": json.dumps({"workoutId": "w-0"}),
+    }]
+    detail = {"workoutId": "w-0", "steps": ["old"]}
+
+    async def fake_get_workouts(*args, **kwargs):
+        return True, "ok", [dict(s) for s in library]
+
+    async def fake_get_workout_details(*args, **kwargs):
+        return True, "ok", dict(detail)
+
+    monkeypatch.setattr(GarminService, "get_workouts", staticmethod(fake_get_workouts))
+    monkeypatch.setattr(GarminService, "get_workout_details", staticmethod(fake_get_workout_details))
+    assert await library_refresher.refresh(coach_user.id)
+
+    # Edited in Garmin, then refreshed by two workers at the same time
+    library[0]["garmin_updated_date"] = "2026-02-01"
+    detail["steps"] = ["new"]
+    refreshers = [LibraryRefresher(session_factory=TestSessionLocal) for _ in range(2)]
+    assert all(await asyncio.gather(*(r.refresh(coach_user.id) for r in refreshers)))
+
+    workout = (
+        await db_session.execute(
+            select(Workout).where(Workout.coach_id == coach_user.id).execution_options(populate_existing=True)
+        )
+    ).scalar_one()
+    payloads = (
+        await db_session.execute(select(WorkoutPayload).execution_options(populate_existing=True))
+    ).scalars().all()
+    assert [(p.content_hash, p.ref_count) for p in payloads] == [(workout.content_hash, 1)]
+
+
+@pytest.mark.asyncio
+async def test_coach_workouts_served_from_database(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, coach_token: str, monkeypatch
+):
+    """The library is listed from stored rows; a stale copy refreshes in the background."""
+    creds = GarminCredentials(
+        user_id=coach_user.id,
+        garmin_email_encrypted=encrypt_value("coach@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+        library_synced_at=datetime.now(timezone.utc),
+    )
+    db_session.add(creds)
+    for i, workout_type in enumerate(["running", "running", "cycling", "running"]):
+        db_session.add(Workout(
+            garmin_workout_id=f"w-{i}",
+            coach_id=coach_user.id,
+            workout_name=f"Tempo {i}" if i % 2 else f"Easy {i}",
+            workout_type=workout_type,
+        ))
+    db_session.add(Workout(
+        garmin_workout_id="gone",
+        coach_id=coach_user.id,
+        workout_name="Deleted in Garmin",
+        workout_type="running",
+        deleted_at=datetime.now(timezone.utc),
+    ))
+    await db_session.commit()
+
+    calls = []
+
+    async def fake_get_workouts(*args, **kwargs):
+        calls.append("list")
+        return True, "ok", []
+
+    monkeypatch.setattr(GarminService, "get_workouts", staticmethod(fake_get_workouts))
+    headers = {"Authorization": f"Bearer {coach_token}"}
+
+    resp = await client.get(
+        "/api/v1/coach/workouts",
+        params={"workout_type": "running", "search": "tempo", "limit": 1},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["total"] == 2
+    assert [w["garmin_workout_id"] for w in data["workouts"]] == ["w-1"]
+    assert data["refreshing"] is False
+    assert data["last_synced_at"] is not None
+    assert calls == []
+
+    creds.library_synced_at = datetime.now(timezone.utc) - timedelta(days=1)
+    await db_session.commit()
+    resp = await client.get("/api/v1/coach/workouts", headers=headers)
+    assert resp.json()["total"] == 4
+    assert resp.json()["refreshing"] is True
+    await library_refresher.wait(coach_user.id)
+    assert calls == ["list"]
+
+    resp = await client.get("/api/v1/coach/workouts", headers=headers)
+    assert resp.json()["refreshing"] is False
+    assert resp.json()["total"] == 0
+
+
+@pytest.mark.asyncio
+async def test_coach_workouts_filter_and_sort_by_summary(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, coach_token: str, monkeypatch
+):
+    """Synced workouts can be filtered and sorted by their parsed duration and distance."""
+    db_session.add(GarminCredentials(
+        user_id=coach_user.id,
+        garmin_email_encrypted=encrypt_value("coach@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    await db_session.commit()
+
+    def timed(seconds):
+        return {"endCondition": {"conditionTypeKey": "time"}, "endConditionValue": seconds}
+
+    details = {
+        "short": {"sportType": {"sportTypeKey": "running"}, "workoutSegments": [
+            {"segmentOrder": 1, "workoutSteps": [{"stepOrder": 1, **timed(900)}]},
+        ]},
+        "long": {"sportType": {"sportTypeKey": "trail_running"}, "workoutSegments": [
+            {"segmentOrder": 1, "workoutSteps": [{"stepOrder": 1, **timed(3600)}, {"stepOrder": 2, **timed(600)}]},
+        ]},
+        "intervals": {"sportType": {"sportTypeKey": "running"}, "workoutSegments": [
+            {"segmentOrder": 1, "workoutSteps": [
+                {"stepOrder": 1, **timed(600)},
+                {"type": "RepeatGroupDTO", "stepOrder": 2, "numberOfIterations": 6, "workoutSteps": [
+                    {"stepOrder": 3, "endCondition": {"conditionTypeKey": "distance"}, "endConditionValue": 400,
+                     "zoneNumber": 5},
+                    {"stepOrder": 4, **timed(90)},
+                ]},
+            ]},
+        ]},
+        "strength": {"sportType": {"sportTypeKey": "strength_training"}, "workoutSegments": []},
+    }
+    library = [
+        {
+            "garmin_workout_id": workout_id,
+            "workout_name": workout_id.title(),
+            "workout_type": "running",
+            "description": "",
+            "garmin_updated_date": "2026-01-01",
+            "workout_data": "{}",
+        }
+        for workout_id in details
+    ]
+
+    async def fake_get_workouts(*args, **kwargs):
+        return True, "ok", library
+
+    async def fake_get_workout_details(enc_email, enc_pw, workout_id, token=None):
+        return True, "ok", details[workout_id]
+
+    monkeypatch.setattr(GarminService, "get_workouts", staticmethod(fake_get_workouts))
+    monkeypatch.setattr(GarminService, "get_workout_details", staticmethod(fake_get_workout_details))
+    assert await library_refresher.refresh(coach_user.id)
+
+    headers = {"Authorization": f"Bearer {coach_token}"}
+    resp = await client.get("/api/v1/coach/workouts", params={"sort": "duration"}, headers=headers)
+    workouts = resp.json()["workouts"]
+    assert [w["garmin_workout_id"] for w in workouts] == ["short", "intervals", "long", "strength"]
+    intervals = workouts[1]
+    assert intervals["estimated_duration_seconds"] == 600 + 6 * 90
+    assert intervals["estimated_distance_meters"] == 6 * 400
+    assert intervals["step_count"] == 3
+    assert intervals["max_zone"] == 5
+    assert workouts[3]["workout_type"] == "strength"
+
+    resp = await client.get(
+        "/api/v1/coach/workouts",
+        params={"min_duration_seconds": 1000, "sort": "duration", "descending": True},
+        headers=headers,
+    )
+    assert [w["garmin_workout_id"] for w in resp.json()["workouts"]] == ["long", "intervals"]
+    assert resp.json()["total"] == 2
+
+    resp = await client.get(
+        "/api/v1/coach/workouts", params={"sport_type_key": "trail_running"}, headers=headers
+    )
+    assert [w["garmin_workout_id"] for w in resp.json()["workouts"]] == ["long"]
@@ -0,0 +1,176 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import encrypt_value
+from app.models.user import GarminCredentials, User, UserRole
+from app.services.connection_sweeper import ConnectionSweeper, connection_sweeper
+from app.services.garmin_service import GarminService
+from tests.conftest import TestSessionLocal
+
+
+def fake_checks(monkeypatch, outcomes):
+    """Replace live Garmin checks; ``outcomes`` maps Garmin email to a status."""
+    checked = []
+
+    async def fake_check(enc_email, enc_pw, token=None):
+        email = enc_email.removeprefix("enc:")
+        checked.append(email)
+        status = outcomes.get(email, "connected")
+        return {
+            "is_connected": status == "connected",
+            "status": status,
+            "message": f"{status} for {email}",
+            "recommendations": [],
+        }
+
+    monkeypatch.setattr(GarminService, "check_athlete_connection", staticmethod(fake_check))
+    return checked
+
+
+def add_creds(db: AsyncSession, user: User, email: str, **kwargs) -> GarminCredentials:
+    creds = GarminCredentials(
+        user_id=user.id,
+        garmin_email_encrypted=f"enc:{email}",
+        garmin_password_encrypted=encrypt_value("pw"),
+        **{"is_connected": True, **kwargs},
+    )
+    db.add(creds)
+    return creds
+
+
+@pytest.mark.asyncio
+async def test_sweeper_checks_due_accounts_and_records_results(
+    db_session: AsyncSession, coach_user: User, athlete_user: User, admin_user: User, monkeypatch
+):
+    """Due accounts are checked once; rejected credentials are marked disconnected."""
+    monkeypatch.setattr(settings, "CONNECTION_SWEEP_SPACING_SECONDS", 0)
+    checked = fake_checks(monkeypatch, {"athlete@x.com": "auth_failed", "admin@x.com": "unavailable"})
+    now = datetime.now(timezone.utc)
+    add_creds(db_session, coach_user, "coach@x.com", last_checked_at=now)  # fresh
+    add_creds(db_session, athlete_user, "athlete@x.com")  # never checked
+    add_creds(db_session, admin_user, "admin@x.com", last_checked_at=now - timedelta(days=1))
+    await db_session.commit()
+
+    sweeper = ConnectionSweeper(session_factory=TestSessionLocal)
+    assert await sweeper.run_once() == 2
+    assert sorted(checked) == ["admin@x.com", "athlete@x.com"]
+    assert await sweeper.run_once() == 0
+
+    rows = {
+        r.garmin_email_encrypted: r
+        for r in (
+            await db_session.execute(
+                select(GarminCredentials).execution_options(populate_existing=True)
+            )
+        ).scalars()
+    }
+    athlete = rows["enc:athlete@x.com"]
+    assert athlete.is_connected is False
+    assert athlete.connection_error == "auth_failed for athlete@x.com"
+    assert athlete.last_checked_at is not None
+    # Garmin being unreachable is recorded but does not disconnect the account
+    admin = rows["enc:admin@x.com"]
+    assert admin.is_connected is True
+    assert admin.connection_error == "unavailable for admin@x.com"
+
+
+@pytest.mark.asyncio
+async def test_check_connection_answers_from_cache_unless_live(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    coach_token: str,
+    athlete_user: User,
+    monkeypatch,
+):
+    checked = fake_checks(monkeypatch, {"athlete@x.com": "auth_failed"})
+    add_creds(db_session, athlete_user, "athlete@x.com", last_checked_at=datetime.now(timezone.utc))
+    await db_session.commit()
+    url = f"/api/v1/coach/athletes/{athlete_user.id}/check-connection"
+    headers = {"Authorization": f"Bearer {coach_token}"}
+
+    resp = await client.get(url, headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["is_connected"] is True
+    assert resp.json()["last_checked_at"] is not None
+    assert checked == []
+
+    resp = await client.get(url, params={"live": True}, headers=headers)
+    assert resp.json()["is_connected"] is False
+    assert checked == ["athlete@x.com"]
+
+    # The live result is stored, so the cached answer now reflects it
+    resp = await client.get(url, headers=headers)
+    assert resp.json()["is_connected"] is False
+    assert checked == ["athlete@x.com"]
+
+
+@pytest.mark.asyncio
+async def test_garmin_test_endpoint_uses_cached_state(
+    client: AsyncClient, db_session: AsyncSession, athlete_user: User, athlete_token: str, monkeypatch
+):
+    checked = fake_checks(monkeypatch, {})
+    add_creds(db_session, athlete_user, "athlete@x.com", last_checked_at=datetime.now(timezone.utc))
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {athlete_token}"}
+
+    resp = await client.post("/api/v1/garmin/test", headers=headers)
+    assert resp.json()["is_connected"] is True
+    assert checked == []
+
+    resp = await client.post("/api/v1/garmin/test", params={"live": True}, headers=headers)
+    assert resp.json()["is_connected"] is True
+    assert checked == ["athlete@x.com"]
+
+
+@pytest.mark.asyncio
+async def test_roster_connection_status_streams_ndjson(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, coach_token: str, monkeypatch
+):
+    """Fresh athletes come back from the stored state; stale ones are checked and streamed."""
+    monkeypatch.setattr(connection_sweeper, "session_factory", TestSessionLocal)
+    checked = fake_checks(monkeypatch, {"stale@x.com": "auth_failed"})
+    athletes = {}
+    for name in ["Fresh", "NoGarmin", "Stale", "Other"]:
+        athlete = User(
+            email=f"{name.lower()}@test.com",
+            hashed_password="x",
+            full_name=name,
+            role=UserRole.ATHLETE,
+            coach_id=None if name == "Other" else coach_user.id,
+        )
+        db_session.add(athlete)
+        athletes[name] = athlete
+    await db_session.flush()
+    add_creds(db_session, athletes["Fresh"], "fresh@x.com", last_checked_at=datetime.now(timezone.utc))
+    add_creds(db_session, athletes["Stale"], "stale@x.com", last_checked_at=datetime.now(timezone.utc) - timedelta(days=2))
+    add_creds(db_session, athletes["Other"], "other@x.com")
+    await db_session.commit()
+
+    resp = await client.get(
+        "/api/v1/coach/athletes/connection-status",
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines()]
+    assert [r["athlete_name"] for r in rows] == ["Fresh", "NoGarmin", "Stale"]
+    assert checked == ["stale@x.com"]
+    assert rows[0]["is_connected"] is True
+    assert rows[1]["is_connected"] is False
+    assert rows[2]["is_connected"] is False
+    assert rows[2]["error_message"] == "auth_failed for stale@x.com"
+
+    resp = await client.get(
+        "/api/v1/coach/athletes/connection-status",
+        params={"live": True},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert len(resp.text.splitlines()) == 3
+    assert sorted(checked) == ["fresh@x.com", "stale@x.com", "stale@x.com"]
@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, Header, HTTPException
+from garminconnect import GarminConnectAuthenticationError
+
+from app.core.config import settings
+from app.core.security import encrypt_value
+from app.services import garmin_client
+from app.services.garmin_client import AsyncGarminClient
+from app.services.garmin_service import GarminService
+from app.services.garmin_session import garmin_sessions
+
+VALID_TOKEN = "Bearer good-token"
+
+
+def stand_in_garmin(latency: float = 0.0) -> FastAPI:
+    """Minimal local stand-in for the Garmin Connect workout API."""
+    stand_in = FastAPI()
+    workouts = {"1": {"workoutId": 1, "workoutName": "Easy Run", "sportType": {"sportTypeKey": "running"}}}
+
+    def check(authorization):
+        if authorization != VALID_TOKEN:
+            raise HTTPException(status_code=401)
+
+    @stand_in.get("/workout-service/workouts")
+    async def list_workouts(authorization: str = Header(None)):
+        check(authorization)
+        await asyncio.sleep(latency)
+        return list(workouts.values())
+
+    @stand_in.get("/workout-service/workout/{workout_id}")
+    async def get_workout(workout_id: str, authorization: str = Header(None)):
+        check(authorization)
+        return workouts[workout_id]
+
+    @stand_in.post("/workout-service/workout")
+    async def upload(payload: dict, authorization: str = Header(None)):
+        check(authorization)
+        new_id = str(len(workouts) + 1)
+        workouts[new_id] = {**payload, "workoutId": int(new_id)}
+        return workouts[new_id]
+
+    @stand_in.get("/userprofile-service/socialProfile")
+    async def profile(authorization: str = Header(None)):
+        check(authorization)
+        return {"displayName": "athlete1", "fullName": "Stand In Athlete"}
+
+    return stand_in
+
+
+def make_client(latency: float = 0.0) -> AsyncGarminClient:
+    return AsyncGarminClient(
+        base_url="http://garmin.test",
+        transport=httpx.ASGITransport(app=stand_in_garmin(latency)),
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_client_endpoints():
+    """List, fetch, upload and profile work against the stand-in."""
+    client = make_client()
+    workouts = await client.get_workouts(VALID_TOKEN)
+    assert workouts[0]["workoutName"] == "Easy Run"
+    assert (await client.get_workout_by_id(VALID_TOKEN, "1"))["workoutId"] == 1
+    created = await client.upload_workout(VALID_TOKEN, {"workoutName": "Copy"})
+    assert created["workoutId"] == 2
+    assert await client.get_full_name(VALID_TOKEN) == "Stand In Athlete"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_client_maps_unauthorized():
+    """A 401 surfaces as the same auth error the sync client raises."""
+    client = make_client()
+    with pytest.raises(GarminConnectAuthenticationError):
+        await client.get_workouts("Bearer expired")
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_async_client_handles_many_concurrent_requests():
+    """Hundreds of slow requests overlap instead of running one by one."""
+    client = make_client(latency=0.05)
+    started = time.monotonic()
+    results = await asyncio.gather(*(client.get_workouts(VALID_TOKEN) for _ in range(200)))
+    assert len(results) == 200
+    assert time.monotonic() - started < 5
+    await client.aclose()
+
+
+class FakeSession:
+    def __init__(self, authorization):
+        self.authorization = authorization
+
+
+@pytest.mark.asyncio
+async def test_service_uses_async_client(monkeypatch):
+    """GarminService dispatches through the async client when configured."""
+    client = make_client()
+    monkeypatch.setattr(settings, "GARMIN_CLIENT_MODE", "async")
+    monkeypatch.setattr(garmin_client, "_client", client)
+    sessions = [FakeSession("Bearer expired"), FakeSession(VALID_TOKEN)]
+    monkeypatch.setattr(garmin_sessions, "cached_session", lambda email, password: None)
+    monkeypatch.setattr(garmin_sessions, "get_session", lambda *a, **k: sessions.pop(0))
+
+    success, message, workouts = await GarminService.get_workouts(
+        encrypt_value("coach@x.com"), encrypt_value("pw")
+    )
+    assert success, message
+    assert workouts[0]["workout_type"] == "running"
+    assert sessions == []
+    await client.aclose()
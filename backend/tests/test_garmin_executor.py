@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.garmin_executor import GarminCallTimeout, GarminExecutor
+
+
+@pytest.mark.asyncio
+async def test_blocking_calls_do_not_stall_event_loop():
+    """While a Garmin call blocks a worker thread the loop keeps running."""
+    executor = GarminExecutor(max_workers=2, default_timeout=5)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        for _ in range(5):
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    result, _ = await asyncio.gather(executor.run(time.sleep, 0.2), ticker())
+    assert result is None
+    assert ticks == 5
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pool_size_bounds_concurrency():
+    """No more than max_workers calls run at once; the rest queue."""
+    executor = GarminExecutor(max_workers=2, default_timeout=5)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    await asyncio.gather(*(executor.run(work) for _ in range(6)))
+    assert peak == 2
+    stats = executor.stats()
+    assert stats["completed"] == 6
+    assert stats["queue_depth"] == 0
+    assert stats["max_wait_ms"] > 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_connection_error():
+    """Slow calls time out with an error GarminService already handles."""
+    executor = GarminExecutor(max_workers=1, default_timeout=5)
+    with pytest.raises(GarminCallTimeout):
+        await executor.run(time.sleep, 0.5, timeout=0.05)
+    assert executor.stats()["timeouts"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_call_never_runs():
+    """Cancelling a caller drops its queued call before it starts."""
+    executor = GarminExecutor(max_workers=1, default_timeout=5)
+    ran = []
+    blocker = asyncio.ensure_future(executor.run(time.sleep, 0.1))
+    queued = asyncio.ensure_future(executor.run(ran.append, 1))
+    await asyncio.sleep(0.01)
+    queued.cancel()
+    await blocker
+    await asyncio.sleep(0.05)
+    assert ran == []
+    assert executor.stats()["queue_depth"] == 0
+    assert executor.stats()["cancelled"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_health_reports_executor_metrics(client: AsyncClient):
+    """The health endpoint exposes Garmin executor utilisation."""
+    resp = await client.get("/health")
+    assert resp.status_code == 200
+    assert "queue_depth" in resp.json()["garmin_executor"]
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_cancels_read_request():
+    """A GET whose client disconnects is cancelled instead of running on."""
+    from app.core.middleware import CancelOnDisconnectMiddleware
+
+    cancelled = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    middleware = CancelOnDisconnectMiddleware(slow_app)
+    await asyncio.wait_for(
+        middleware({"type": "http", "method": "GET", "path": "/x"}, receive, send), 1
+    )
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_client_disconnect_leaves_kept_paths_running():
+    """GET paths that record Garmin's answer finish even if the client leaves."""
+    from app.core.middleware import CancelOnDisconnectMiddleware
+
+    finished = asyncio.Event()
+
+    async def slow_app(scope, receive, send):
+        await asyncio.sleep(0.05)
+        finished.set()
+
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        pass
+
+    middleware = CancelOnDisconnectMiddleware(slow_app, keep_running=[r"/athletes/\d+/check-connection"])
+    await asyncio.wait_for(
+        middleware({"type": "http", "method": "GET", "path": "/athletes/7/check-connection"}, receive, send), 1
+    )
+    assert finished.is_set()
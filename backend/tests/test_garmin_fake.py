@@ -0,0 +1,178 @@
+import asyncio
+
+import httpx
+import pytest
+from garminconnect import GarminConnectAuthenticationError
+
+from app.core.config import settings
+from app.core.security import encrypt_value
+from app.services import garmin_client, garmin_fake
+from app.services.garmin_fake import (
+    FAKE_BASE_URL,
+    FakeGarmin,
+    FakeGarminBackend,
+    FakeGarminConfig,
+    create_fake_garmin_app,
+)
+from app.services.garmin_service import GarminService
+from app.services.garmin_session import garmin_sessions
+
+EASY_RUN = {
+    "workoutName": "Easy Run",
+    "sportType": {"sportTypeId": 1, "sportTypeKey": "running"},
+    "workoutSegments": [{"segmentOrder": 1, "workoutSteps": []}],
+}
+
+
+@pytest.fixture
+def fake_backend(monkeypatch):
+    """Route GarminService to a fresh stand-in."""
+    backend = FakeGarminBackend(FakeGarminConfig(seed=1))
+    monkeypatch.setattr(settings, "GARMIN_BACKEND", "fake")
+    monkeypatch.setattr(garmin_client, "_client", None)
+    garmin_fake.set_fake_backend(backend)
+    garmin_sessions.clear()
+    yield backend
+    garmin_fake.set_fake_backend(None)
+    garmin_sessions.clear()
+
+
+def creds(email, password="pw"):
+    return encrypt_value(email), encrypt_value(password)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["sync", "async"])
+async def test_service_round_trip(fake_backend, monkeypatch, mode):
+    """Check, list, fetch and import all work against the stand-in."""
+    monkeypatch.setattr(settings, "GARMIN_CLIENT_MODE", mode)
+    fake_backend.add_account("coach@x.com", "pw", full_name="Coach Carter", workouts=[EASY_RUN])
+
+    status = await GarminService.check_athlete_connection(*creds("coach@x.com"))
+    assert status["status"] == "connected"
+    assert "Coach Carter" in status["message"]
+
+    success, message, workouts = await GarminService.get_workouts(*creds("coach@x.com"))
+    assert success, message
+    assert workouts[0]["workout_type"] == "running"
+    assert "workoutSegments" not in workouts[0]["workout_data"]
+
+    success, _, detail = await GarminService.get_workout_details(
+        *creds("coach@x.com"), workouts[0]["garmin_workout_id"]
+    )
+    assert success and detail["workoutSegments"]
+
+    results = await GarminService.import_workouts(*creds("athlete@x.com"), [detail] * 3)
+    assert all(ok for ok, _, _ in results)
+    assert len(fake_backend.account("athlete@x.com").workouts) == 3
+    assert fake_backend.stats()["logins"] == 2
+
+    if mode == "async":
+        await garmin_client.close_async_client()
+
+
+@pytest.mark.asyncio
+async def test_wrong_password_is_an_auth_failure(fake_backend):
+    fake_backend.add_account("athlete@x.com", "right")
+    status = await GarminService.check_athlete_connection(*creds("athlete@x.com", "wrong"))
+    assert status["status"] == "auth_failed"
+
+
+def test_failed_login_has_no_tokens_to_store(fake_backend):
+    fake_backend.add_account("athlete@x.com", "right")
+    client = FakeGarmin("athlete@x.com", "wrong", fake_backend)
+    with pytest.raises(GarminConnectAuthenticationError):
+        client.login()
+    assert client.garth.dumps() is None
+
+
+@pytest.mark.asyncio
+async def test_throttling_maps_to_rate_limited_import(fake_backend):
+    """A stand-in that always throttles produces the retryable import error."""
+    fake_backend.config.throttle_rate = 1.0
+    ok, message, _ = await GarminService.import_workout(*creds("athlete@x.com"), EASY_RUN)
+    assert not ok
+    assert GarminService.is_retryable_import_error(message)
+    assert fake_backend.stats()["throttled"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_stored_tokens_resume_without_password_login(fake_backend):
+    """Tokens saved from one session resume it after the in-memory cache is gone."""
+    email, password = creds("athlete@x.com")
+    await GarminService.check_athlete_connection(email, password)
+    tokens = garmin_sessions.tokens_for("athlete@x.com")
+    garmin_sessions.clear()
+
+    status = await GarminService.check_athlete_connection(
+        email, password, encrypt_value(tokens)
+    )
+    assert status["status"] == "connected"
+    assert fake_backend.stats()["logins"] == 1
+
+    fake_backend.revoke_tokens("athlete@x.com")
+    garmin_sessions.clear()
+    status = await GarminService.check_athlete_connection(
+        email, password, encrypt_value(tokens)
+    )
+    assert status["status"] == "connected"
+    assert fake_backend.stats()["logins"] == 2
+
+
+@pytest.mark.asyncio
+async def test_http_app_login_exchange_and_errors():
+    """The ASGI app exposes the login flow and maps errors to status codes."""
+    backend = FakeGarminBackend(FakeGarminConfig(seed=1))
+    async with httpx.AsyncClient(
+        base_url=FAKE_BASE_URL, transport=httpx.ASGITransport(app=create_fake_garmin_app(backend))
+    ) as http:
+        resp = await http.post("/sso/login", json={"email": "a@x.com", "password": "pw"})
+        oauth1 = resp.json()["oauth1_token"]
+        resp = await http.post("/oauth-service/oauth/exchange/user/2.0", json={"oauth1_token": oauth1})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        assert (await http.post("/workout-service/workout", json=EASY_RUN, headers=headers)).status_code == 200
+        assert len((await http.get("/workout-service/workouts", headers=headers)).json()) == 1
+        assert (await http.get("/workout-service/workout/999", headers=headers)).status_code == 404
+        assert (await http.get("/userprofile-service/socialProfile")).status_code == 401
+
+        backend.config.error_rate = 1.0
+        assert (await http.get("/workout-service/workouts", headers=headers)).status_code == 503
+        assert (await http.get("/_fake/stats")).json()["errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_many_athlete_imports_offline(fake_backend, monkeypatch):
+    """Hundreds of athletes can be imported into concurrently with latency."""
+    monkeypatch.setattr(settings, "GARMIN_CLIENT_MODE", "async")
+    fake_backend.config.latency_seconds = 0.01
+
+    results = await asyncio.gather(*(
+        GarminService.import_workouts(*creds(f"athlete{i}@x.com"), [EASY_RUN] * 2)
+        for i in range(100)
+    ))
+    assert all(ok for athlete in results for ok, _, _ in athlete)
+    assert fake_backend.stats()["uploads"] == 200
+    await garmin_client.close_async_client()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["sync", "async"])
+async def test_check_contacts_garmin_with_a_live_session(fake_backend, monkeypatch, mode):
+    """A session Garmin no longer accepts is not reported as connected."""
+    monkeypatch.setattr(settings, "GARMIN_CLIENT_MODE", mode)
+    fake_backend.add_account("athlete@x.com", "pw", full_name="Ath Lete")
+    status = await GarminService.check_athlete_connection(*creds("athlete@x.com"))
+    assert status["status"] == "connected"
+
+    # The athlete changes their Garmin password, revoking every token
+    fake_backend.account("athlete@x.com").password = "changed"
+    fake_backend.revoke_tokens("athlete@x.com")
+
+    status = await GarminService.check_athlete_connection(*creds("athlete@x.com"))
+    assert status["status"] == "auth_failed"
+    success, _ = await GarminService.test_connection(*creds("athlete@x.com"))
+    assert not success
+
+    if mode == "async":
+        await garmin_client.close_async_client()
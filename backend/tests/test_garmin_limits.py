@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+from garminconnect import GarminConnectAuthenticationError, GarminConnectTooManyRequestsError
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.security import encrypt_value
+from app.services.garmin_limits import GarminLimiter, GarminUnavailable, garmin_limiter
+from app.services.garmin_service import GarminService
+
+
+async def guarded(limiter, email, fn):
+    async with limiter.limit(email):
+        return fn()
+
+
+def throttled():
+    raise GarminConnectTooManyRequestsError("429")
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_spaces_out_bursts():
+    """Calls beyond the burst wait for tokens at the configured rate."""
+    limiter = GarminLimiter(rate=20, burst=2, max_concurrency=10)
+    started = time.monotonic()
+    await asyncio.gather(*(guarded(limiter, "a@x.com", lambda: None) for _ in range(6)))
+    # 2 immediate, 4 more at 20/s
+    assert time.monotonic() - started >= 0.15
+
+
+def test_limits_are_split_between_workers():
+    """Each worker process takes its share, so together they keep to the configured limits."""
+    limiter = GarminLimiter(rate=2, burst=10, max_concurrency=4, workers=4)
+    assert limiter.rate == 0.5
+    assert limiter.burst == 2
+    assert limiter.max_concurrency == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_capped_per_account():
+    """Only max_concurrency calls for one account run at once; other accounts are unaffected."""
+    limiter = GarminLimiter(rate=1000, burst=100, max_concurrency=2)
+    running = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+
+    async def call(account):
+        async with limiter.limit(f"{account}@x.com"):
+            running[account] += 1
+            peak[account] = max(peak[account], running[account])
+            await asyncio.sleep(0.02)
+            running[account] -= 1
+
+    await asyncio.gather(*(call("a") for _ in range(6)), *(call("b") for _ in range(2)))
+    assert peak == {"a": 2, "b": 2}
+
+
+@pytest.mark.asyncio
+async def test_account_breaker_fails_fast_then_recovers():
+    """Repeated throttling opens the account breaker; a trial call closes it again."""
+    limiter = GarminLimiter(
+        rate=1000, burst=100, failure_threshold=3, global_failure_threshold=100, recovery_seconds=0.1
+    )
+    for _ in range(3):
+        with pytest.raises(GarminConnectTooManyRequestsError):
+            await guarded(limiter, "a@x.com", throttled)
+
+    calls = []
+    with pytest.raises(GarminUnavailable) as exc_info:
+        await guarded(limiter, "a@x.com", lambda: calls.append(1))
+    assert calls == []
+    assert exc_info.value.scope == "account"
+    assert exc_info.value.retry_after >= 1
+    assert not limiter.availability("a@x.com")["available"]
+    # Other accounts keep working
+    await guarded(limiter, "b@x.com", lambda: None)
+
+    await asyncio.sleep(0.15)
+    await guarded(limiter, "a@x.com", lambda: None)
+    assert limiter.availability("a@x.com")["available"]
+
+
+@pytest.mark.asyncio
+async def test_global_breaker_trips_across_accounts():
+    """Failures spread over many accounts open the breaker for Garmin as a whole."""
+    limiter = GarminLimiter(
+        rate=1000, burst=100, failure_threshold=10, global_failure_threshold=3, recovery_seconds=60
+    )
+    for i in range(3):
+        with pytest.raises(GarminConnectTooManyRequestsError):
+            await guarded(limiter, f"user{i}@x.com", throttled)
+    with pytest.raises(GarminUnavailable) as exc_info:
+        await guarded(limiter, "fresh@x.com", lambda: None)
+    assert exc_info.value.scope == "global"
+    assert limiter.stats()["global"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_auth_failures_do_not_trip_breaker():
+    """Rejected credentials mean Garmin is reachable, so they never open a breaker."""
+    limiter = GarminLimiter(rate=1000, burst=100, failure_threshold=2, global_failure_threshold=2)
+
+    def rejected():
+        raise GarminConnectAuthenticationError("bad password")
+
+    for _ in range(5):
+        with pytest.raises(GarminConnectAuthenticationError):
+            await guarded(limiter, "a@x.com", rejected)
+    assert limiter.availability("a@x.com")["available"]
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_is_reported(client: AsyncClient, monkeypatch):
+    """Service calls fail fast with a retry hint and /health reports the breaker."""
+    calls = []
+
+    async def fail(*args, **kwargs):
+        calls.append(1)
+        raise GarminConnectTooManyRequestsError("429")
+
+    monkeypatch.setattr(GarminService, "_call_async", staticmethod(fail))
+    monkeypatch.setattr(settings, "GARMIN_CLIENT_MODE", "async")
+    email = encrypt_value("coach@x.com")
+    for _ in range(garmin_limiter.failure_threshold):
+        await GarminService.test_connection(email, encrypt_value("pw"))
+
+    success, message = await GarminService.test_connection(email, encrypt_value("pw"))
+    assert not success
+    assert "temporarily unavailable" in message
+    assert len(calls) == garmin_limiter.failure_threshold
+    assert GarminService.availability(email)["retry_after"] > 0
+
+    health = (await client.get("/health")).json()
+    assert health["garmin_limiter"]["open_accounts"] == 1
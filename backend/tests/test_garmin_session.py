@@ -0,0 +1,159 @@
+import time
+
+import pytest
+from garminconnect import GarminConnectAuthenticationError
+
+from app.core.security import decrypt_value, encrypt_value
+from app.models.user import GarminCredentials
+from app.services import garmin_session
+from app.services.garmin_service import GarminService
+from app.services.garmin_session import GarminSessionManager, garmin_sessions
+
+
+class FakeOAuth2:
+    def __init__(self, expires_at):
+        self.expires_at = expires_at
+
+
+class FakeGarth:
+    def __init__(self, owner):
+        self.owner = owner
+        self.oauth2_token = None
+
+    def dumps(self):
+        return f"tokens-for-{self.owner.username}-{self.owner.generation}"
+
+    def refresh_oauth2(self):
+        FakeGarmin.refreshes += 1
+        self.oauth2_token = FakeOAuth2(time.time() + 3600)
+
+
+class FakeGarmin:
+    """Stand-in for garminconnect.Garmin that counts logins."""
+
+    password_logins = 0
+    token_logins = 0
+    refreshes = 0
+    rejected_tokens = set()
+    expires_in = 3600
+
+    def __init__(self, email, password):
+        self.username = email
+        self.password = password
+        self.generation = FakeGarmin.password_logins
+        self.garth = FakeGarth(self)
+        self.full_name = "Fake Athlete"
+
+    def login(self, tokenstore=None):
+        if tokenstore:
+            if tokenstore in FakeGarmin.rejected_tokens:
+                raise GarminConnectAuthenticationError("token rejected")
+            FakeGarmin.token_logins += 1
+        else:
+            FakeGarmin.password_logins += 1
+            self.generation = FakeGarmin.password_logins
+        self.garth.oauth2_token = FakeOAuth2(time.time() + FakeGarmin.expires_in)
+
+    def get_full_name(self):
+        return self.full_name
+
+    def connectapi(self, path):
+        return {"fullName": self.full_name}
+
+
+@pytest.fixture(autouse=True)
+def fake_garmin(monkeypatch):
+    FakeGarmin.password_logins = 0
+    FakeGarmin.token_logins = 0
+    FakeGarmin.refreshes = 0
+    FakeGarmin.rejected_tokens = set()
+    FakeGarmin.expires_in = 3600
+    monkeypatch.setattr(garmin_session, "Garmin", FakeGarmin)
+    garmin_sessions.clear()
+    yield FakeGarmin
+    garmin_sessions.clear()
+
+
+def test_session_reused_across_calls():
+    """Repeated calls for one account log in only once."""
+    manager = GarminSessionManager()
+    for _ in range(5):
+        assert manager.call("a@x.com", "pw", lambda c: c.get_full_name()) == "Fake Athlete"
+    assert FakeGarmin.password_logins == 1
+
+
+def test_session_resumes_from_stored_tokens():
+    """A new process resumes from stored tokens without a password login."""
+    manager = GarminSessionManager()
+    manager.get_session("a@x.com", "pw", tokens="stored-tokens")
+    assert FakeGarmin.password_logins == 0
+    assert FakeGarmin.token_logins == 1
+
+
+def test_rejected_tokens_fall_back_to_password_login():
+    """Tokens Garmin no longer accepts trigger a single password login."""
+    FakeGarmin.rejected_tokens = {"stale-tokens"}
+    manager = GarminSessionManager()
+    manager.get_session("a@x.com", "pw", tokens="stale-tokens")
+    assert FakeGarmin.password_logins == 1
+
+
+def test_tokens_refreshed_before_expiry():
+    """OAuth2 tokens close to expiry are refreshed instead of logging in."""
+    FakeGarmin.expires_in = 60
+    manager = GarminSessionManager(refresh_margin_seconds=300)
+    manager.get_session("a@x.com", "pw")
+    manager.get_session("a@x.com", "pw")
+    assert FakeGarmin.password_logins == 1
+    assert FakeGarmin.refreshes >= 1
+
+
+def test_auth_failure_during_call_retries_once():
+    """An operation rejected with 401 is retried after a fresh login."""
+    manager = GarminSessionManager()
+    calls = []
+
+    def operation(client):
+        calls.append(client)
+        if len(calls) == 1:
+            raise GarminConnectAuthenticationError("expired")
+        return "ok"
+
+    assert manager.call("a@x.com", "pw", operation) == "ok"
+    assert len(calls) == 2
+    assert FakeGarmin.password_logins == 2
+
+
+def test_changed_password_discards_session():
+    """Reconnecting with a different password does not reuse the old session."""
+    manager = GarminSessionManager()
+    manager.get_session("a@x.com", "old")
+    manager.get_session("a@x.com", "new")
+    assert FakeGarmin.password_logins == 2
+
+
+@pytest.mark.asyncio
+async def test_service_persists_tokens_only_when_changed():
+    """GarminService stores encrypted tokens and skips unchanged writes."""
+    creds = GarminCredentials(
+        user_id=1,
+        garmin_email_encrypted=encrypt_value("a@x.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+    )
+    success, _ = await GarminService.test_connection(
+        creds.garmin_email_encrypted, creds.garmin_password_encrypted
+    )
+    assert success
+    assert GarminService.persist_session(creds) is True
+    assert decrypt_value(creds.oauth_token_encrypted).startswith("tokens-for-a@x.com")
+    assert GarminService.persist_session(creds) is False
+
+    garmin_sessions.clear()
+    success, _ = await GarminService.test_connection(
+        creds.garmin_email_encrypted,
+        creds.garmin_password_encrypted,
+        creds.oauth_token_encrypted,
+    )
+    assert success
+    assert FakeGarmin.password_logins == 1
+    assert FakeGarmin.token_logins == 1
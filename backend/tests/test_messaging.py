@@ -1,9 +1,13 @@
+from datetime import datetime, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import get_password_hash
-from app.models.user import User, UserRole
+from app.models.user import Message, User, UserRole
+from tests.conftest import engine as test_engine
 
 
 @pytest.mark.asyncio
@@ -147,6 +151,7 @@ async def test_get_inbox(
 
     resp = await client.get(
         "/api/v1/messages/inbox",
+        params={"include_total": True},
         headers={"Authorization": f"Bearer {coach_token}"},
     )
     assert resp.status_code == 200
@@ -177,6 +182,7 @@ async def test_get_sent_messages(
 
     resp = await client.get(
         "/api/v1/messages/sent",
+        params={"include_total": True},
         headers={"Authorization": f"Bearer {token}"},
     )
     assert resp.status_code == 200
@@ -300,3 +306,180 @@ async def test_send_message_nonexistent_recipient(client: AsyncClient, athlete_t
         json={"recipient_id": 99999, "body": "Hello"},
     )
     assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_inbox_cursor_pagination(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, athlete_user: User, coach_token: str
+):
+    """Pages follow each other by cursor, including messages sent at the same instant."""
+    sent_at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    db_session.add_all([
+        Message(
+            sender_id=athlete_user.id,
+            recipient_id=coach_user.id,
+            body=f"Message {i}",
+            created_at=sent_at if i < 3 else datetime(2026, 1, 2, tzinfo=timezone.utc),
+        )
+        for i in range(5)
+    ])
+    await db_session.commit()
+
+    bodies, cursor = [], None
+    for _ in range(3):
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get(
+            "/api/v1/messages/inbox", params=params, headers={"Authorization": f"Bearer {coach_token}"}
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["total"] is None
+        bodies += [m["body"] for m in data["messages"]]
+        cursor = data["next_cursor"]
+    assert cursor is None
+    assert bodies == ["Message 4", "Message 3", "Message 2", "Message 1", "Message 0"]
+
+    resp = await client.get(
+        "/api/v1/messages/inbox",
+        params={"cursor": "not-a-cursor"},
+        headers={"Authorization": f"Bearer {coach_token}"},
+    )
+    assert resp.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_message_lists_load_names_in_one_query(
+    client: AsyncClient, db_session: AsyncSession, coach_user: User, athlete_user: User, coach_token: str
+):
+    """The number of queries does not grow with the number of messages."""
+    headers = {"Authorization": f"Bearer {coach_token}"}
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    counts = []
+    for batch in (1, 10):
+        db_session.add_all([
+            Message(sender_id=athlete_user.id, recipient_id=coach_user.id, body="Hi")
+            for _ in range(batch)
+        ])
+        await db_session.commit()
+        statements.clear()
+        event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            resp = await client.get("/api/v1/messages/inbox", headers=headers)
+        finally:
+            event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
+        assert {m["sender_name"] for m in resp.json()["messages"]} == {athlete_user.full_name}
+        assert {m["recipient_name"] for m in resp.json()["messages"]} == {coach_user.full_name}
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+@pytest.mark.asyncio
+async def test_conversation_tracks_last_message_and_unread_counts(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    coach_token: str,
+    athlete_token: str,
+):
+    """Sending and reading messages keeps the conversation's counters in step."""
+    athlete_user.coach_id = coach_user.id
+    await db_session.commit()
+    coach_headers = {"Authorization": f"Bearer {coach_token}"}
+    athlete_headers = {"Authorization": f"Bearer {athlete_token}"}
+
+    sent = []
+    for body in ("One", "Two", "Three"):
+        resp = await client.post(
+            "/api/v1/messages/send", headers=athlete_headers, json={"recipient_id": coach_user.id, "body": body}
+        )
+        sent.append(resp.json()["id"])
+    await client.post(
+        "/api/v1/messages/send", headers=coach_headers, json={"recipient_id": athlete_user.id, "body": "Reply"}
+    )
+
+    resp = await client.get("/api/v1/messages/conversations", headers=coach_headers)
+    [conversation] = resp.json()["conversations"]
+    assert conversation["other_user_id"] == athlete_user.id
+    assert conversation["other_user_name"] == athlete_user.full_name
+    assert conversation["unread_count"] == 3
+    assert conversation["last_message"]["body"] == "Reply"
+    assert conversation["last_message"]["sender_name"] == coach_user.full_name
+
+    resp = await client.get("/api/v1/messages/conversations", headers=athlete_headers)
+    assert resp.json()["conversations"][0]["unread_count"] == 1
+
+    # Reading a message twice only counts once
+    for _ in range(2):
+        await client.put(f"/api/v1/messages/{sent[0]}/read", headers=coach_headers)
+    resp = await client.get("/api/v1/messages/conversations", headers=coach_headers)
+    assert resp.json()["conversations"][0]["unread_count"] == 2
+
+    resp = await client.put(
+        f"/api/v1/messages/conversations/{conversation['id']}/read", headers=coach_headers
+    )
+    assert resp.json()["marked"] == 2
+    resp = await client.get("/api/v1/messages/conversations", headers=coach_headers)
+    assert resp.json()["conversations"][0]["unread_count"] == 0
+    resp = await client.get(
+        "/api/v1/messages/inbox", params={"unread_only": True}, headers=coach_headers
+    )
+    assert resp.json()["messages"] == []
+
+
+@pytest.mark.asyncio
+async def test_conversation_messages_page_by_cursor(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    coach_token: str,
+    athlete_token: str,
+):
+    """A thread pages newest first and is only visible to its participants."""
+    athlete_user.coach_id = coach_user.id
+    await db_session.commit()
+    athlete_headers = {"Authorization": f"Bearer {athlete_token}"}
+    for i in range(5):
+        await client.post(
+            "/api/v1/messages/send",
+            headers=athlete_headers,
+            json={"recipient_id": coach_user.id, "body": f"Message {i}"},
+        )
+    resp = await client.get("/api/v1/messages/conversations", headers=athlete_headers)
+    conversation_id = resp.json()["conversations"][0]["id"]
+
+    bodies, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        resp = await client.get(
+            f"/api/v1/messages/conversations/{conversation_id}/messages",
+            params=params,
+            headers={"Authorization": f"Bearer {coach_token}"},
+        )
+        bodies += [m["body"] for m in resp.json()["messages"]]
+        cursor = resp.json()["next_cursor"]
+        if cursor is None:
+            break
+    assert bodies == [f"Message {i}" for i in reversed(range(5))]
+
+    outsider = User(
+        email="other@test.com",
+        hashed_password=get_password_hash("otherpass123"),
+        full_name="Other Athlete",
+        role=UserRole.ATHLETE,
+    )
+    db_session.add(outsider)
+    await db_session.commit()
+    resp = await client.post(
+        "/api/v1/auth/login", json={"email": "other@test.com", "password": "otherpass123"}
+    )
+    resp = await client.get(
+        f"/api/v1/messages/conversations/{conversation_id}/messages",
+        headers={"Authorization": f"Bearer {resp.json()['access_token']}"},
+    )
+    assert resp.status_code == 404
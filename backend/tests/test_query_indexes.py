@@ -0,0 +1,182 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.pagination import encode_cursor
+from app.models.user import Conversation, User
+from app.services import badges
+from tests.conftest import engine as test_engine
+
+NEXT_PAGE = encode_cursor([datetime(2026, 1, 1, tzinfo=timezone.utc), 100])
+
+# The hot queries of the API, as (who asks, request path, query parameters,
+# text identifying the statement among those the request runs, the index
+# it should be served by, and whether that index also gives the rows in order)
+HOT_QUERIES = [
+    pytest.param(
+        "athlete", "/api/v1/athlete/workouts", {"cursor": NEXT_PAGE},
+        "ORDER BY shared_workouts.shared_at DESC",
+        "ix_shared_workouts_athlete_id_shared_at_id", True,
+        id="athlete shared workouts next page",
+    ),
+    pytest.param(
+        "coach", "/api/v1/coach/shared-workouts", {"cursor": NEXT_PAGE},
+        "ORDER BY shared_workouts.shared_at DESC",
+        "ix_shared_workouts_coach_id_shared_at_id", True,
+        id="coach shared workouts next page",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/inbox", {},
+        "ORDER BY messages.created_at DESC",
+        "ix_messages_recipient_id_created_at_id", True,
+        id="inbox",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/inbox", {"cursor": NEXT_PAGE},
+        "ORDER BY messages.created_at DESC",
+        "ix_messages_recipient_id_created_at_id", True,
+        id="inbox next page",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/inbox", {"unread_only": True},
+        "ORDER BY messages.created_at DESC",
+        "ix_messages_recipient_id_created_at_id_unread", True,
+        id="unread inbox",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/inbox", {"unread_only": True, "include_total": True},
+        "count(messages.id)",
+        "ix_messages_recipient_id_created_at_id_unread", True,
+        id="unread count",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/sent", {},
+        "ORDER BY messages.created_at DESC",
+        "ix_messages_sender_id_created_at_id", True,
+        id="sent messages",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/sent", {"cursor": NEXT_PAGE},
+        "ORDER BY messages.created_at DESC",
+        "ix_messages_sender_id_created_at_id", True,
+        id="sent messages next page",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/conversations/{conversation_id}/messages", {"cursor": NEXT_PAGE},
+        "ORDER BY messages.created_at DESC",
+        "ix_messages_conversation_id_created_at_id", True,
+        id="conversation next page",
+    ),
+    pytest.param(
+        "athlete", "/api/v1/messages/conversations", {},
+        "ORDER BY conversations.last_message_at DESC",
+        # Either side of the pair, so both indexes are merged and sorted
+        "ix_conversations_user_high_id_last_message_at_id", False,
+        id="conversations",
+    ),
+    pytest.param(
+        "coach", "/api/v1/coach/athletes", {},
+        "ORDER BY users.full_name",
+        "ix_users_coach_id_role_full_name", True,
+        id="coach roster",
+    ),
+    pytest.param(
+        None, "/api/v1/athlete/coaches", {},
+        "ORDER BY users.full_name",
+        "ix_users_role_is_active_full_name", True,
+        id="available coaches",
+    ),
+    pytest.param(
+        "admin", "/api/v1/admin/users", {"cursor": NEXT_PAGE},
+        "ORDER BY users.created_at DESC",
+        "ix_users_created_at_id", True,
+        id="admin users next page",
+    ),
+    pytest.param(
+        "coach", "/api/v1/coach/users", {"cursor": encode_cursor(["Jane Doe", 100])},
+        "ORDER BY users.full_name",
+        "ix_users_full_name_id", True,
+        id="coach users next page",
+    ),
+]
+
+
+@contextmanager
+def captured_statements():
+    """Collect the SQL, with its parameters, sent to the test database."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", capture)
+
+
+async def query_plan(statements, marker: str) -> str:
+    """EXPLAIN the one captured statement containing ``marker``."""
+    [(sql, parameters)] = [(s, p) for s, p in statements if marker in s]
+    async with test_engine.connect() as conn:
+        rows = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters)).all()
+    return "\n".join(row[-1] for row in rows)
+
+
+def assert_uses_index(plan: str, index: str, ordered: bool) -> None:
+    assert f"INDEX {index} " in f"{plan} ", plan
+    if ordered:
+        assert "TEMP B-TREE" not in plan, plan
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("role, path, params, marker, index, ordered", HOT_QUERIES)
+async def test_hot_query_uses_index(
+    client: AsyncClient,
+    db_session: AsyncSession,
+    coach_user: User,
+    athlete_user: User,
+    admin_token: str,
+    coach_token: str,
+    athlete_token: str,
+    role,
+    path,
+    params,
+    marker,
+    index,
+    ordered,
+):
+    """The statement an endpoint actually sends is served by its index."""
+    conversation = Conversation(
+        user_low_id=min(coach_user.id, athlete_user.id),
+        user_high_id=max(coach_user.id, athlete_user.id),
+        last_message_at=datetime.now(timezone.utc),
+    )
+    db_session.add(conversation)
+    await db_session.commit()
+    headers = {}
+    if role is not None:
+        token = {"admin": admin_token, "coach": coach_token, "athlete": athlete_token}[role]
+        headers["Authorization"] = f"Bearer {token}"
+
+    with captured_statements() as statements:
+        resp = await client.get(path.format(conversation_id=conversation.id), params=params, headers=headers)
+    assert resp.status_code == 200, resp.text
+
+    assert_uses_index(await query_plan(statements, marker), index, ordered)
+
+
+@pytest.mark.asyncio
+async def test_pending_workouts_recount_uses_index(db_session: AsyncSession, athlete_user: User):
+    """The pending shares count taken after every status change uses the athlete's index."""
+    with captured_statements() as statements:
+        await badges.refresh_pending_workouts(db_session, [athlete_user.id])
+        await db_session.commit()
+
+    plan = await query_plan(statements, "UPDATE badge_counts SET pending_workouts")
+    assert_uses_index(plan, "ix_shared_workouts_athlete_id_status_shared_at_id", True)
@@ -0,0 +1,182 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import encrypt_value
+from app.models.user import (
+    GarminCredentials,
+    ImportJob,
+    SharedWorkout,
+    User,
+    Workout,
+    WorkoutUpload,
+)
+from app.services import garmin_client, garmin_fake
+from app.services.garmin_fake import FakeGarminBackend, FakeGarminConfig
+from app.services.garmin_service import IMPORT_AUTH_FAILED, IMPORT_RATE_LIMITED
+from app.services.garmin_session import garmin_sessions
+from app.services.import_jobs import ImportJobWorker
+from app.services.share_reconciler import DELETED_IN_GARMIN, ShareReconciler
+from app.services.upload_idempotency import workout_listings
+from tests.conftest import TestSessionLocal
+
+
+@pytest.fixture(autouse=True)
+def fake_garmin(monkeypatch):
+    backend = FakeGarminBackend(FakeGarminConfig(seed=1))
+    monkeypatch.setattr(settings, "GARMIN_BACKEND", "fake")
+    monkeypatch.setattr(settings, "RECONCILE_SPACING_SECONDS", 0)
+    monkeypatch.setattr(garmin_client, "_client", None)
+    garmin_fake.set_fake_backend(backend)
+    garmin_sessions.clear()
+    workout_listings.clear()
+    yield backend
+    garmin_fake.set_fake_backend(None)
+    garmin_sessions.clear()
+    workout_listings.clear()
+
+
+@pytest.fixture
+def reconciler():
+    return ShareReconciler(
+        session_factory=TestSessionLocal,
+        import_queue=ImportJobWorker(session_factory=TestSessionLocal),
+    )
+
+
+async def add_shares(db_session: AsyncSession, coach: User, athlete: User, shares):
+    """Connect the athlete to Garmin and share one workout per ``shares`` entry."""
+    db_session.add(GarminCredentials(
+        user_id=athlete.id,
+        garmin_email_encrypted=encrypt_value("athlete@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    rows = []
+    for i, fields in enumerate(shares):
+        workout = Workout(
+            garmin_workout_id=f"w-{i}",
+            coach_id=coach.id,
+            workout_name=f"Workout {i}",
+            workout_type="running",
+        )
+        db_session.add(workout)
+        await db_session.flush()
+        share = SharedWorkout(workout_id=workout.id, coach_id=coach.id, athlete_id=athlete.id, **fields)
+        db_session.add(share)
+        rows.append(share)
+    await db_session.commit()
+    return rows
+
+
+@pytest.mark.asyncio
+async def test_workouts_deleted_in_garmin_go_back_to_pending(
+    db_session: AsyncSession, coach_user: User, athlete_user: User, fake_garmin, reconciler
+):
+    """Imported shares missing from the athlete's library are reset; the rest are kept."""
+    account = fake_garmin.add_account("athlete@garmin.com", "pw")
+    kept = fake_garmin.store_workout(account, {"workoutName": "Workout 0"})
+    earlier = datetime.now(timezone.utc) - timedelta(days=1)
+    kept_share, deleted_share, recent_share = await add_shares(db_session, coach_user, athlete_user, [
+        {"status": "imported", "garmin_import_id": str(kept["workoutId"]), "imported_at": earlier},
+        {"status": "imported", "garmin_import_id": "999", "imported_at": earlier},
+        # Imported after the listing may have been fetched, so not judged yet
+        {"status": "imported", "garmin_import_id": "998", "imported_at": datetime.now(timezone.utc)},
+    ])
+    db_session.add(WorkoutUpload(
+        shared_workout_id=deleted_share.id,
+        athlete_id=athlete_user.id,
+        payload_hash="h",
+        status="imported",
+        garmin_workout_id="999",
+        attempts=1,
+    ))
+    await db_session.commit()
+
+    assert await reconciler.run_once() == 1
+    shares = {
+        s.id: s
+        for s in (
+            await db_session.execute(select(SharedWorkout).execution_options(populate_existing=True))
+        ).scalars().all()
+    }
+    assert shares[kept_share.id].status == "imported"
+    assert shares[recent_share.id].status == "imported"
+    assert shares[deleted_share.id].status == "pending"
+    assert shares[deleted_share.id].garmin_import_id is None
+    assert shares[deleted_share.id].import_error == DELETED_IN_GARMIN
+    upload = (await db_session.execute(select(WorkoutUpload))).scalar_one()
+    assert upload.status == "removed"
+
+    # Reconciled athletes are not due again until the interval has passed
+    requests = fake_garmin.stats()["requests"]
+    assert await reconciler.run_once() == 0
+    assert fake_garmin.stats()["requests"] == requests
+
+
+@pytest.mark.asyncio
+async def test_imports_without_a_garmin_id_are_not_reset(
+    db_session: AsyncSession, coach_user: User, athlete_user: User, fake_garmin, reconciler
+):
+    """A share saved without Garmin's id can't be looked up, so it is not re-imported."""
+    fake_garmin.add_account("athlete@garmin.com", "pw")
+    earlier = datetime.now(timezone.utc) - timedelta(days=1)
+    (share,) = await add_shares(db_session, coach_user, athlete_user, [
+        {"status": "imported", "garmin_import_id": "", "imported_at": earlier},
+    ])
+
+    # The athlete is still reconciled; the share is just left alone
+    assert await reconciler.run_once() == 1
+    await db_session.refresh(share)
+    assert share.status == "imported"
+    assert share.garmin_import_id == ""
+
+
+@pytest.mark.asyncio
+async def test_transient_failures_are_requeued_with_backoff(
+    db_session: AsyncSession, coach_user: User, athlete_user: User, fake_garmin, reconciler, monkeypatch
+):
+    """Failed imports worth retrying get an import job; others are left alone."""
+    monkeypatch.setattr(settings, "RECONCILE_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(settings, "IMPORT_RETRY_MAX_ATTEMPTS", 2)
+    throttled, rejected = await add_shares(db_session, coach_user, athlete_user, [
+        {"status": "failed", "import_error": IMPORT_RATE_LIMITED},
+        {"status": "failed", "import_error": IMPORT_AUTH_FAILED},
+    ])
+
+    assert await reconciler.run_once() == 1
+    job = (await db_session.execute(select(ImportJob))).scalar_one()
+    await db_session.refresh(job, ["items"])
+    assert [i.shared_workout_id for i in job.items] == [throttled.id]
+    await db_session.refresh(throttled)
+    assert throttled.retry_count == 1
+    assert throttled.next_retry_at is not None
+    # Not re-queued while the job is pending
+    throttled.next_retry_at = None
+    await db_session.commit()
+    await reconciler.run_once()
+    assert len((await db_session.execute(select(ImportJob))).scalars().all()) == 1
+
+    # The job failed again: re-queued once the backoff has passed, up to the limit
+    for item in job.items:
+        item.status = "failed"
+    await db_session.commit()
+    await reconciler.run_once()
+    assert len((await db_session.execute(select(ImportJob))).scalars().all()) == 2
+    await db_session.refresh(throttled)
+    assert throttled.retry_count == 2
+    delay = throttled.next_retry_at.replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)
+    assert delay > timedelta(seconds=settings.IMPORT_RETRY_BACKOFF_SECONDS * 1.5)
+
+    throttled.next_retry_at = None
+    await db_session.commit()
+    for job in (await db_session.execute(select(ImportJob))).scalars().all():
+        await db_session.refresh(job, ["items"])
+        for item in job.items:
+            item.status = "failed"
+    await db_session.commit()
+    await reconciler.run_once()
+    assert len((await db_session.execute(select(ImportJob))).scalars().all()) == 2
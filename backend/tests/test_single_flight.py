@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from app.core.security import encrypt_value
+from app.services.garmin_service import GarminService
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_flight():
+    """Callers with the same key get the result of a single call."""
+    flights = SingleFlight()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return ["w-1"]
+
+    results = await asyncio.gather(*(flights.do("k", fetch) for _ in range(5)))
+    assert results == [["w-1"]] * 5
+    assert calls == [1]
+    assert flights.stats() == {"in_flight": 0, "started": 1, "shared": 4}
+
+    # Once landed, the next call goes out again
+    await flights.do("k", fetch)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_shared_errors_reach_every_caller():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(*(flights.do("k", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_caller_keeps_the_flight_alive():
+    """The shared call survives one caller leaving and stops once all have left."""
+    flights = SingleFlight()
+    finished = []
+
+    async def slow():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return "ok"
+
+    first = asyncio.ensure_future(flights.do("k", slow))
+    second = asyncio.ensure_future(flights.do("k", slow))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    assert await second == "ok"
+    assert finished == [1]
+
+    lone = asyncio.ensure_future(flights.do("k2", slow))
+    await asyncio.sleep(0.01)
+    lone.cancel()
+    await asyncio.sleep(0.06)
+    assert finished == [1]
+
+
+@pytest.mark.asyncio
+async def test_caller_after_an_abandoned_flight_starts_a_new_one():
+    """A caller arriving as the last waiter leaves does not join the cancelled call."""
+    flights = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    lone = asyncio.ensure_future(flights.do("k", slow))
+    await asyncio.sleep(0.01)
+    lone.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await lone
+    # The abandoned task has not unwound yet
+    assert await flights.do("k", slow) == "ok"
+    assert flights.stats()["started"] == 2
+
+
+@pytest.mark.asyncio
+async def test_service_coalesces_reads_but_not_uploads(monkeypatch):
+    """Identical reads for one account share a Garmin call; uploads never do."""
+    dispatched = []
+
+    async def fake_dispatch(email, password, tokens, operation, args):
+        dispatched.append((email, operation, args))
+        await asyncio.sleep(0.02)
+        return "Athlete" if operation == "get_full_name" else {"workoutId": len(dispatched)}
+
+    monkeypatch.setattr(GarminService, "_dispatch", staticmethod(fake_dispatch))
+    email, pw = encrypt_value("athlete@x.com"), encrypt_value("pw")
+    other = encrypt_value("other@x.com")
+
+    await asyncio.gather(
+        GarminService.check_athlete_connection(email, pw),
+        GarminService.check_athlete_connection(email, pw),
+        GarminService.check_athlete_connection(other, pw),
+    )
+    assert sorted(e for e, _, _ in dispatched) == ["athlete@x.com", "other@x.com"]
+
+    dispatched.clear()
+    await asyncio.gather(
+        GarminService.get_workout_details(email, pw, "1"),
+        GarminService.get_workout_details(email, pw, "1"),
+        GarminService.get_workout_details(email, pw, "2"),
+    )
+    assert sorted(args for _, _, args in dispatched) == [("1",), ("2",)]
+
+    dispatched.clear()
+    await asyncio.gather(*(GarminService.import_workout(email, pw, {"workoutName": "Run"}) for _ in range(2)))
+    assert len(dispatched) == 2
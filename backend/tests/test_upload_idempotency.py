@@ -0,0 +1,356 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.security import encrypt_value
+from app.models.user import GarminCredentials, SharedWorkout, User, Workout, WorkoutUpload
+from app.services import garmin_client, garmin_fake
+from app.services.garmin_fake import FakeGarminBackend, FakeGarminConfig
+from app.services.garmin_limits import CircuitBreaker, garmin_limiter
+from app.services.garmin_service import (
+    IMPORT_CONNECTION_FAILED,
+    IMPORT_RATE_LIMITED,
+    IMPORT_UNAVAILABLE,
+    GarminService,
+)
+from app.services.garmin_session import garmin_sessions
+from app.services.upload_idempotency import (
+    IMPORT_SUCCEEDED,
+    UploadRequest,
+    import_shared_workouts,
+    load_upload_payloads,
+    workout_listings,
+)
+from app.services.workout_payloads import release_payloads, store_workout_payload
+from tests.conftest import TestSessionLocal
+
+# As the coach's Garmin account returns it; an athlete's copy gets its own
+# workout and step ids, owner and dates
+TEMPO = {
+    "workoutId": 42,
+    "ownerId": 7,
+    "author": {"userProfilePk": 7, "displayName": "coach"},
+    "createdDate": "2026-01-05T08:00:00.0",
+    "updatedDate": "2026-01-05T08:00:00.0",
+    "workoutName": "Tempo Run",
+    "sportType": {"sportTypeId": 1, "sportTypeKey": "running"},
+    "workoutSegments": [{"segmentOrder": 1, "workoutSteps": [{"stepId": 9001, "stepOrder": 1}]}],
+}
+
+
+@pytest.fixture(autouse=True)
+def fake_garmin(monkeypatch):
+    backend = FakeGarminBackend(FakeGarminConfig(seed=1))
+    monkeypatch.setattr(settings, "GARMIN_BACKEND", "fake")
+    monkeypatch.setattr(garmin_client, "_client", None)
+    garmin_fake.set_fake_backend(backend)
+    garmin_sessions.clear()
+    workout_listings.clear()
+    yield backend
+    garmin_fake.set_fake_backend(None)
+    garmin_sessions.clear()
+    workout_listings.clear()
+
+
+@pytest.fixture
+async def shared(db_session: AsyncSession, coach_user: User, athlete_user: User):
+    db_session.add(GarminCredentials(
+        user_id=athlete_user.id,
+        garmin_email_encrypted=encrypt_value("athlete@garmin.com"),
+        garmin_password_encrypted=encrypt_value("pw"),
+        is_connected=True,
+    ))
+    workout = Workout(
+        garmin_workout_id="42",
+        coach_id=coach_user.id,
+        workout_name="Tempo Run",
+        workout_type="running",
+        content_hash=await store_workout_payload(db_session, TEMPO),
+    )
+    db_session.add(workout)
+    await db_session.flush()
+    share = SharedWorkout(
+        workout_id=workout.id, coach_id=coach_user.id, athlete_id=athlete_user.id, status="pending"
+    )
+    db_session.add(share)
+    await db_session.commit()
+    return share
+
+
+async def attempt(db_session: AsyncSession, share: SharedWorkout):
+    creds = (
+        await db_session.execute(
+            select(GarminCredentials).where(GarminCredentials.user_id == share.athlete_id)
+        )
+    ).scalar_one()
+    workout = await db_session.get(Workout, share.workout_id, populate_existing=True)
+    payloads = await load_upload_payloads(db_session, [workout])
+    request = UploadRequest.for_workout(share.id, share.athlete_id, workout, payloads[workout.id])
+    [outcome] = await import_shared_workouts(db_session, creds, [request])
+    await db_session.commit()
+    return outcome
+
+
+async def store_payload(db_session: AsyncSession, share: SharedWorkout, workout_data):
+    """Replace the workout's content the way a library sync does."""
+    workout = await db_session.get(Workout, share.workout_id)
+    old_hash = workout.content_hash
+    workout.content_hash = await store_workout_payload(db_session, workout_data)
+    await release_payloads(db_session, {old_hash: 1})
+    await db_session.commit()
+
+
+def lose_response(monkeypatch):
+    """Let uploads reach Garmin but report a dropped connection."""
+    real_import = GarminService.import_workouts
+
+    async def import_then_drop(*args, **kwargs):
+        await real_import(*args, **kwargs)
+        return [(False, IMPORT_CONNECTION_FAILED, None)] * len(args[2])
+
+    monkeypatch.setattr(GarminService, "import_workouts", staticmethod(import_then_drop))
+    return lambda: monkeypatch.setattr(GarminService, "import_workouts", staticmethod(real_import))
+
+
+@pytest.mark.asyncio
+async def test_retry_after_lost_response_does_not_duplicate(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """An upload whose response was lost is found in the library on retry."""
+    restore = lose_response(monkeypatch)
+    assert (await attempt(db_session, shared))[0] is False
+    record = (await db_session.execute(select(WorkoutUpload))).scalar_one()
+    assert record.status == "in_flight"
+    restore()
+
+    success, _, garmin_id = await attempt(db_session, shared)
+    assert success
+    account = fake_garmin.account("athlete@garmin.com")
+    assert list(account.workouts) == [int(garmin_id)]
+    assert fake_garmin.stats()["uploads"] == 1
+
+    await db_session.refresh(record)
+    assert record.status == "imported"
+    assert record.garmin_workout_id == garmin_id
+    assert record.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_lost_upload_with_local_created_date_is_found(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """Garmin's createdDate may be local time, behind UTC for athletes west of it."""
+    restore = lose_response(monkeypatch)
+    assert (await attempt(db_session, shared))[0] is False
+    restore()
+    account = fake_garmin.account("athlete@garmin.com")
+    [landed] = account.workouts.values()
+    local = datetime.now(timezone.utc) - timedelta(hours=8)
+    landed["createdDate"] = local.strftime("%Y-%m-%dT%H:%M:%S.0")
+
+    success, _, garmin_id = await attempt(db_session, shared)
+    assert success
+    assert list(account.workouts) == [int(garmin_id)]
+    assert fake_garmin.stats()["uploads"] == 1
+
+
+def drop_request(monkeypatch):
+    """Report a dropped connection for uploads that never reached Garmin."""
+    real_import = GarminService.import_workouts
+
+    async def drop(*args, **kwargs):
+        return [(False, IMPORT_CONNECTION_FAILED, None)] * len(args[2])
+
+    monkeypatch.setattr(GarminService, "import_workouts", staticmethod(drop))
+    return lambda: monkeypatch.setattr(GarminService, "import_workouts", staticmethod(real_import))
+
+
+@pytest.mark.asyncio
+async def test_same_named_workout_in_library_is_not_adopted(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """A workout the athlete already had is not mistaken for the lost upload."""
+    own = {**TEMPO, "workoutSegments": [{"segmentOrder": 1, "workoutSteps": [{"stepOrder": 1}, {"stepOrder": 2}]}]}
+    fake_garmin.add_account("athlete@garmin.com", "pw", workouts=[own])
+    [existing_id] = fake_garmin.account("athlete@garmin.com").workouts
+
+    restore = drop_request(monkeypatch)
+    assert (await attempt(db_session, shared))[0] is False
+    restore()
+
+    success, _, garmin_id = await attempt(db_session, shared)
+    assert success
+    assert int(garmin_id) != existing_id
+    assert fake_garmin.stats()["uploads"] == 1
+    uploaded = fake_garmin.account("athlete@garmin.com").workouts[int(garmin_id)]
+    assert GarminService.workout_fingerprint(uploaded) == GarminService.workout_fingerprint(TEMPO)
+
+
+@pytest.mark.asyncio
+async def test_same_named_workout_with_other_content_is_not_adopted(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """A same-named workout created after the lost attempt must also match its content."""
+    account = fake_garmin.add_account("athlete@garmin.com", "pw")
+    restore = drop_request(monkeypatch)
+    assert (await attempt(db_session, shared))[0] is False
+    restore()
+    fake_garmin.store_workout(account, {**TEMPO, "description": "Athlete's own version"})
+
+    success, _, garmin_id = await attempt(db_session, shared)
+    assert success
+    assert "description" not in account.workouts[int(garmin_id)]
+    assert fake_garmin.stats()["uploads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_callers_transaction_is_left_alone(db_session: AsyncSession, shared, fake_garmin):
+    """Only the in-flight marker is committed early; the caller can still roll back."""
+    creds = (
+        await db_session.execute(
+            select(GarminCredentials).where(GarminCredentials.user_id == shared.athlete_id)
+        )
+    ).scalar_one()
+    workout = await db_session.get(Workout, shared.workout_id)
+    payloads = await load_upload_payloads(db_session, [workout])
+    share_id = shared.id
+    shared.status = "imported"
+    await import_shared_workouts(
+        db_session,
+        creds,
+        [UploadRequest.for_workout(shared.id, shared.athlete_id, workout, payloads[workout.id])],
+    )
+    await db_session.rollback()
+
+    async with TestSessionLocal() as db:
+        assert (await db.get(SharedWorkout, share_id)).status == "pending"
+        record = (await db.execute(select(WorkoutUpload))).scalar_one()
+        assert record.status == "in_flight"
+        assert record.attempts == 1
+
+
+@pytest.mark.asyncio
+async def test_imported_record_is_a_no_op(db_session: AsyncSession, shared, fake_garmin):
+    """Retrying an import that already succeeded makes no Garmin calls."""
+    first = await attempt(db_session, shared)
+    requests_before = fake_garmin.stats()["requests"]
+    assert await attempt(db_session, shared) == first
+    assert fake_garmin.stats()["requests"] == requests_before
+
+
+@pytest.mark.asyncio
+async def test_imported_record_without_garmin_id_is_a_no_op(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """An upload Garmin answered without a workoutId is not sent again."""
+    real_import = GarminService.import_workouts
+
+    async def import_without_id(*args, **kwargs):
+        outcomes = await real_import(*args, **kwargs)
+        return [(success, message, None) for success, message, _ in outcomes]
+
+    monkeypatch.setattr(GarminService, "import_workouts", staticmethod(import_without_id))
+    assert await attempt(db_session, shared) == (True, IMPORT_SUCCEEDED, None)
+    record = (await db_session.execute(select(WorkoutUpload))).scalar_one()
+    assert record.status == "imported"
+    assert record.garmin_workout_id is None
+
+    requests_before = fake_garmin.stats()["requests"]
+    assert await attempt(db_session, shared) == (True, IMPORT_SUCCEEDED, None)
+    assert fake_garmin.stats()["requests"] == requests_before
+    assert fake_garmin.stats()["uploads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_changed_payload_is_uploaded_again(db_session: AsyncSession, shared, fake_garmin):
+    """A new version of the workout gets its own record and upload."""
+    await attempt(db_session, shared)
+    await store_payload(db_session, shared, {**TEMPO, "description": "Now with strides"})
+    await attempt(db_session, shared)
+    assert fake_garmin.stats()["uploads"] == 2
+    records = (await db_session.execute(select(WorkoutUpload))).scalars().all()
+    assert {r.status for r in records} == {"imported"}
+
+
+@pytest.mark.asyncio
+async def test_unverifiable_retry_is_not_uploaded(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """If the library cannot be listed, a retry waits instead of risking a duplicate."""
+    restore = lose_response(monkeypatch)
+    await attempt(db_session, shared)
+    restore()
+
+    fake_garmin.config.error_rate = 1.0
+    success, message, _ = await attempt(db_session, shared)
+    assert not success
+    assert GarminService.is_retryable_import_error(message)
+    assert fake_garmin.stats()["uploads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_upload_retries_without_listing(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """A throttled upload never reached Garmin, so the retry uploads directly."""
+    fake_garmin.config.throttle_rate = 1.0
+    assert (await attempt(db_session, shared))[1] == IMPORT_RATE_LIMITED
+    record = (await db_session.execute(select(WorkoutUpload))).scalar_one()
+    assert record.status == "failed"
+
+    async def no_listing(*args, **kwargs):
+        raise AssertionError("library should not be listed")
+
+    monkeypatch.setattr(GarminService, "get_workouts", staticmethod(no_listing))
+    fake_garmin.config.throttle_rate = 0.0
+    assert (await attempt(db_session, shared))[0] is True
+    assert fake_garmin.stats()["uploads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_is_rejected_without_listing(
+    db_session: AsyncSession, shared, fake_garmin, monkeypatch
+):
+    """An upload refused by an open breaker was never sent, so the retry uploads directly."""
+    closed = garmin_limiter.global_breaker
+    open_breaker = CircuitBreaker(failure_threshold=1, recovery_seconds=60)
+    open_breaker.record_failure()
+    monkeypatch.setattr(garmin_limiter, "global_breaker", open_breaker)
+
+    success, message, _ = await attempt(db_session, shared)
+    assert not success
+    assert message == IMPORT_UNAVAILABLE
+    assert GarminService.is_retryable_import_error(message)
+    record = (await db_session.execute(select(WorkoutUpload))).scalar_one()
+    assert record.status == "failed"
+    assert fake_garmin.stats()["requests"] == 0
+
+    async def no_listing(*args, **kwargs):
+        raise AssertionError("library should not be listed")
+
+    monkeypatch.setattr(GarminService, "get_workouts", staticmethod(no_listing))
+    monkeypatch.setattr(garmin_limiter, "global_breaker", closed)
+    assert (await attempt(db_session, shared))[0] is True
+    assert fake_garmin.stats()["uploads"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stored_payload_is_sent_as_is(db_session: AsyncSession, shared, fake_garmin):
+    """Imports send the payload stored at sync time, without Garmin's ids."""
+    success, _, garmin_id = await attempt(db_session, shared)
+    assert success
+    uploaded = fake_garmin.account("athlete@garmin.com").workouts[int(garmin_id)]
+    assert GarminService.workout_fingerprint(uploaded) == GarminService.workout_fingerprint(TEMPO)
+    assert uploaded["workoutId"] != TEMPO["workoutId"]
+
+
+@pytest.mark.asyncio
+async def test_missing_payload_is_not_uploaded(db_session: AsyncSession, shared):
+    """A workout whose content is gone has no payload to upload."""
+    workout = await db_session.get(Workout, shared.workout_id)
+    workout.content_hash = None
+    await db_session.commit()
+    assert await load_upload_payloads(db_session, [workout]) == {}
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User, Workout, WorkoutPayload
+from app.services.workout_payloads import (
+    load_payloads,
+    recount_payloads,
+    release_payloads,
+    store_workout_payload,
+)
+
+TEMPO = {"workoutName": "Tempo Run", "workoutSegments": [{"segmentOrder": 1}]}
+
+
+async def payload_rows(db_session: AsyncSession):
+    result = await db_session.execute(
+        select(WorkoutPayload).execution_options(populate_existing=True)
+    )
+    return {p.content_hash: p for p in result.scalars().all()}
+
+
+@pytest.mark.asyncio
+async def test_identical_workouts_share_one_payload(db_session: AsyncSession, coach_user: User):
+    """The same workout held by many rows is stored once, ignoring Garmin's ids."""
+    for i in range(5):
+        content_hash = await store_workout_payload(db_session, {**TEMPO, "workoutId": i, "ownerId": i})
+        db_session.add(Workout(
+            garmin_workout_id=f"w-{i}",
+            coach_id=coach_user.id,
+            workout_name="Tempo Run",
+            workout_type="running",
+            content_hash=content_hash,
+        ))
+    await db_session.commit()
+
+    rows = await payload_rows(db_session)
+    assert list(rows) == [content_hash]
+    assert rows[content_hash].ref_count == 5
+    assert await load_payloads(db_session, [content_hash, "missing"]) == {
+        content_hash: rows[content_hash].payload
+    }
+
+
+@pytest.mark.asyncio
+async def test_release_deletes_unreferenced_payloads(db_session: AsyncSession):
+    """A payload is deleted once its last reference is released."""
+    content_hash = await store_workout_payload(db_session, TEMPO)
+    await store_workout_payload(db_session, TEMPO)
+
+    assert await release_payloads(db_session, {content_hash: 1}) == 0
+    assert (await payload_rows(db_session))[content_hash].ref_count == 1
+    assert await release_payloads(db_session, {content_hash: 1}) == 1
+    assert await payload_rows(db_session) == {}
+
+
+@pytest.mark.asyncio
+async def test_recount_repairs_drifted_counts(db_session: AsyncSession, coach_user: User):
+    """Recounting matches the workouts table and drops orphaned payloads."""
+    used = await store_workout_payload(db_session, TEMPO)
+    orphan = await store_workout_payload(db_session, {**TEMPO, "workoutName": "Orphan"})
+    for i in range(2):
+        db_session.add(Workout(
+            garmin_workout_id=f"w-{i}",
+            coach_id=coach_user.id,
+            workout_name="Tempo Run",
+            workout_type="running",
+            content_hash=used,
+        ))
+    await db_session.commit()
+
+    assert await recount_payloads(db_session) == (2, 1)
+    rows = await payload_rows(db_session)
+    assert orphan not in rows
+    assert list(rows) == [used]
+    assert rows[used].ref_count == 2
+
+    await db_session.execute(update(WorkoutPayload).values(ref_count=7))
+    assert await recount_payloads(db_session) == (1, 0)
+    assert await recount_payloads(db_session) == (0, 0)
@@ -0,0 +1,148 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user import User, Workout, WorkoutSegment, WorkoutStep
+from app.services.garmin_service import GarminService
+from app.services.workout_payloads import release_payloads, store_workout_payload
+from app.services.workout_structure import index_structures, parse_workout, reindex_structures
+
+BRICK = {
+    "workoutName": "Brick",
+    "sportType": {"sportTypeId": 10, "sportTypeKey": "multi_sport"},
+    "workoutSegments": [
+        {
+            "segmentOrder": 1,
+            "sportType": {"sportTypeKey": "cycling"},
+            "workoutSteps": [
+                {
+                    "stepOrder": 1,
+                    "stepType": {"stepTypeKey": "interval"},
+                    "endCondition": {"conditionTypeKey": "time"},
+                    "endConditionValue": 3600,
+                    "targetType": {"workoutTargetTypeKey": "power.zone"},
+                    "zoneNumber": 3,
+                },
+            ],
+        },
+        {
+            "segmentOrder": 2,
+            "sportType": {"sportTypeKey": "running"},
+            "estimatedDistanceInMeters": 5000,
+            "workoutSteps": [
+                {
+                    "type": "RepeatGroupDTO",
+                    "stepOrder": 1,
+                    "numberOfIterations": 2,
+                    "workoutSteps": [
+                        {
+                            "stepOrder": 2,
+                            "stepType": {"stepTypeKey": "interval"},
+                            "endCondition": {"conditionTypeKey": "distance"},
+                            "endConditionValue": 1000,
+                        },
+                        {"stepOrder": 3, "stepType": {"stepTypeKey": "rest"}, "endCondition": "lap.button"},
+                    ],
+                },
+            ],
+        },
+    ],
+}
+
+
+def test_parse_workout_flattens_steps_and_sums_them():
+    structure = parse_workout(BRICK)
+    assert structure.workout_type == "other"
+    assert structure.sport_type_key == "multi_sport"
+    assert structure.estimated_duration_seconds == 3600
+    assert structure.estimated_distance_meters == 2000
+    assert structure.step_count == 3
+    assert structure.max_zone == 3
+
+    assert [(s.segment_order, s.sport_type_key, s.step_count) for s in structure.segments] == [
+        (1, "cycling", 1),
+        (2, "running", 2),
+    ]
+    # Garmin's own estimate wins over the sum of the steps
+    assert structure.segments[1].estimated_distance_meters == 5000
+
+    assert [(s.position, s.parent_position, s.step_type) for s in structure.steps] == [
+        (0, None, "interval"),
+        (1, None, "repeat"),
+        (2, 1, "interval"),
+        (3, 1, "rest"),
+    ]
+    assert structure.steps[1].iterations == 2
+    assert structure.steps[3].end_condition == "lap.button"
+
+
+def test_parse_workout_tolerates_missing_structure():
+    structure = parse_workout({"sportType": {"sportTypeId": 4}, "workoutSegments": None})
+    assert structure.workout_type == "swimming"
+    assert structure.estimated_duration_seconds is None
+    assert structure.step_count == 0
+    assert structure.steps == []
+
+
+def test_classification_uses_known_sport_types():
+    assert GarminService.classify_workout_type({"sportType": {"sportTypeKey": "Treadmill_Running"}}) == "running"
+    assert GarminService.classify_workout_type({"sportType": {"sportTypeKey": "indoor_rowing"}}) == "other"
+    assert GarminService.classify_workout_type({"sportType": "cycling"}) == "cycling"
+    assert GarminService.classify_workout_type({}) == "other"
+
+
+@pytest.mark.parametrize(
+    "sport_type_key, workout_type",
+    [
+        ("lap_swimming", "swimming"),
+        ("trail_running", "running"),
+        ("indoor_cycling", "cycling"),
+        # Not in the table; classified by the fragments of the key
+        ("virtual_run", "running"),
+        ("ultra_running", "running"),
+        ("e_bike_mountain", "cycling"),
+        ("pool_swim", "swimming"),
+        ("indoor_cardio", "strength"),
+        ("yoga", "other"),
+    ],
+)
+def test_classification_of_sport_type_variants(sport_type_key, workout_type):
+    workout = {"sportType": {"sportTypeId": 99, "sportTypeKey": sport_type_key}}
+    assert GarminService.classify_workout_type(workout) == workout_type
+
+
+@pytest.mark.asyncio
+async def test_structure_is_stored_once_and_collected_with_its_payload(db_session: AsyncSession):
+    """Content indexed twice keeps one copy of its steps, which go with the payload."""
+    content_hash = await store_workout_payload(db_session, BRICK)
+    await index_structures(db_session, {content_hash: parse_workout(BRICK)})
+    await index_structures(db_session, {content_hash: parse_workout(BRICK)})
+    steps = (await db_session.execute(select(WorkoutStep))).scalars().all()
+    assert len(steps) == 4
+
+    await release_payloads(db_session, {content_hash: 1})
+    assert (await db_session.execute(select(WorkoutStep))).scalars().all() == []
+    assert (await db_session.execute(select(WorkoutSegment))).scalars().all() == []
+
+
+@pytest.mark.asyncio
+async def test_reindex_fills_summaries_of_existing_workouts(db_session: AsyncSession, coach_user: User):
+    """Workouts stored before they were indexed get their summary on reindex."""
+    content_hash = await store_workout_payload(db_session, BRICK)
+    workout = Workout(
+        garmin_workout_id="brick",
+        coach_id=coach_user.id,
+        workout_name="Brick",
+        workout_type="running",
+        content_hash=content_hash,
+    )
+    db_session.add(workout)
+    await db_session.commit()
+
+    assert await reindex_structures(db_session) == 1
+    await db_session.refresh(workout)
+    assert workout.workout_type == "other"
+    assert workout.estimated_duration_seconds == 3600
+    assert workout.step_count == 3
+    segments = (await db_session.execute(select(WorkoutSegment))).scalars().all()
+    assert len(segments) == 2
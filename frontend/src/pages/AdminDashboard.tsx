@@ -27,6 +27,7 @@ const AdminDashboard: React.FC = () => {
   const [stats, setStats] = useState<Stats | null>(null);
   const [users, setUsers] = useState<UserItem[]>([]);
   const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [roleFilter, setRoleFilter] = useState("");
   const [search, setSearch] = useState("");
   const [showCreateModal, setShowCreateModal] = useState(false);
@@ -42,14 +43,18 @@ const AdminDashboard: React.FC = () => {
     }
   };
 
-  const loadUsers = async () => {
+  const loadUsers = async (cursor?: string) => {
     try {
       const resp = await adminAPI.listUsers({
         role: roleFilter || undefined,
         search: search || undefined,
+        cursor,
+        // Only the first page needs counting
+        include_total: !cursor,
       });
-      setUsers(resp.data.users);
-      setTotal(resp.data.total);
+      setUsers((prev) => (cursor ? [...prev, ...resp.data.users] : resp.data.users));
+      if (!cursor) setTotal(resp.data.total);
+      setNextCursor(resp.data.next_cursor);
     } catch {
       toast.error("Failed to load users");
     }
@@ -240,6 +245,13 @@ const AdminDashboard: React.FC = () => {
             </tbody>
           </table>
         </div>
+        {nextCursor && (
+          <div className="text-center mt-4">
+            <button onClick={() => loadUsers(nextCursor)} className="btn-secondary text-sm py-2">
+              Load more
+            </button>
+          </div>
+        )}
       </div>
 
       {/* Create User Modal */}
@@ -35,6 +35,10 @@ const statusColors: Record<string, string> = {
   failed: "bg-red-100 text-red-700",
 };
 
+// Stop waiting on an import job after this long; the worker carries on regardless
+const IMPORT_WAIT_MS = 60_000;
+const IMPORT_POLL_MS = 1500;
+
 const AthleteDashboard: React.FC = () => {
   const { user } = useAuth();
   const [workouts, setWorkouts] = useState<SharedWorkout[]>([]);
@@ -74,8 +78,15 @@ const AthleteDashboard: React.FC = () => {
   const loadWorkouts = async () => {
     setLoading(true);
     try {
-      const resp = await athleteAPI.getWorkouts();
-      setWorkouts(resp.data.workouts);
+      // The dashboard groups every share by status, so follow all pages
+      const all: SharedWorkout[] = [];
+      let cursor: string | undefined;
+      do {
+        const resp = await athleteAPI.getWorkouts(cursor);
+        all.push(...resp.data.workouts);
+        cursor = resp.data.next_cursor || undefined;
+      } while (cursor);
+      setWorkouts(all);
     } catch {
       toast.error("Failed to load workouts");
     } finally {
@@ -95,25 +106,47 @@ const AthleteDashboard: React.FC = () => {
     setSelectedIds(next);
   };
 
+  const waitForImportJob = async (jobId: number) => {
+    // Imports run in the background; poll until the job settles, or give up
+    // waiting (null) when it is backing off or no worker is picking it up
+    const deadline = Date.now() + IMPORT_WAIT_MS;
+    for (;;) {
+      const resp = await athleteAPI.getImportJob(jobId);
+      if (resp.data.status === "completed" || resp.data.status === "failed") {
+        return resp.data;
+      }
+      if (Date.now() + IMPORT_POLL_MS > deadline) {
+        return null;
+      }
+      await new Promise((resolve) => setTimeout(resolve, IMPORT_POLL_MS));
+    }
+  };
+
   const handleImport = async () => {
     if (selectedIds.size === 0) return;
     setImporting(true);
     try {
       const resp = await athleteAPI.importWorkouts(Array.from(selectedIds));
-      const results = resp.data;
+      resp.data.rejected.forEach((r: any) => toast.error(r.message, { duration: 6000 }));
+      const job = await waitForImportJob(resp.data.job_id);
+      if (job === null) {
+        toast("Import continues in the background. Check back in a few minutes.", { duration: 6000 });
+        loadWorkouts();
+        return;
+      }
       let successCount = 0;
-      results.forEach((r: any) => {
-        if (r.success) {
+      job.items.forEach((item: any) => {
+        if (item.status === "imported") {
           successCount++;
-          toast.success(r.message, { duration: 4000 });
+          toast.success(item.message, { duration: 4000 });
         } else {
-          toast.error(r.message, { duration: 6000 });
+          toast.error(item.message, { duration: 6000 });
         }
       });
       if (successCount > 0) {
         setSelectedIds(new Set());
-        loadWorkouts();
       }
+      loadWorkouts();
     } catch (err: any) {
       toast.error(err.response?.data?.detail || "Import failed");
     } finally {
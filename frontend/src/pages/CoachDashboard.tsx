@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { coachAPI } from "../services/api";
+import { coachAPI, messageAPI } from "../services/api";
 import { useAuth } from "../context/AuthContext";
 import toast from "react-hot-toast";
 
@@ -30,8 +30,19 @@ interface GarminWorkout {
   workout_name: string;
   workout_type: string;
   description: string | null;
+  estimated_duration_seconds: number | null;
+  estimated_distance_meters: number | null;
+  step_count: number | null;
 }
 
+const formatWorkoutSummary = (w: GarminWorkout) => {
+  const parts: string[] = [];
+  if (w.estimated_duration_seconds) parts.push(`${Math.round(w.estimated_duration_seconds / 60)} min`);
+  if (w.estimated_distance_meters) parts.push(`${(w.estimated_distance_meters / 1000).toFixed(1)} km`);
+  if (w.step_count) parts.push(`${w.step_count} steps`);
+  return parts.join(" · ");
+};
+
 interface ConnectionCheck {
   athlete_id: number;
   is_connected: boolean;
@@ -39,6 +50,8 @@ interface ConnectionCheck {
   garmin_email: string | null;
   error_message: string | null;
   recommendations: string[];
+  retry_after: number | null;
+  last_checked_at: string | null;
 }
 
 const workoutTypeColors: Record<string, string> = {
@@ -52,17 +65,23 @@ const workoutTypeColors: Record<string, string> = {
 const CoachDashboard: React.FC = () => {
   const { user: currentUser } = useAuth();
   const [athletes, setAthletes] = useState<Athlete[]>([]);
+  // Unread message counts by athlete id, from the coach's conversations
+  const [unreadByAthlete, setUnreadByAthlete] = useState<Record<number, number>>({});
   const [workouts, setWorkouts] = useState<GarminWorkout[]>([]);
   const [selectedWorkouts, setSelectedWorkouts] = useState<Set<string>>(new Set());
   const [selectedAthlete, setSelectedAthlete] = useState<number | null>(null);
   const [connectionCheck, setConnectionCheck] = useState<ConnectionCheck | null>(null);
   const [typeFilter, setTypeFilter] = useState("");
+  const [workoutSort, setWorkoutSort] = useState("name");
   const [loadingWorkouts, setLoadingWorkouts] = useState(false);
+  const [refreshingWorkouts, setRefreshingWorkouts] = useState(false);
+  const [workoutsSyncedAt, setWorkoutsSyncedAt] = useState<string | null>(null);
   const [sharing, setSharing] = useState(false);
   const [checkingConnection, setCheckingConnection] = useState(false);
 
   // Link athletes state
   const [allUsers, setAllUsers] = useState<User[]>([]);
+  const [usersCursor, setUsersCursor] = useState<string | null>(null);
   const [searchTerm, setSearchTerm] = useState("");
   const [roleFilter, setRoleFilter] = useState("all");
   const [onlyUnlinked, setOnlyUnlinked] = useState(false);
@@ -70,18 +89,43 @@ const CoachDashboard: React.FC = () => {
   const [linkingUserId, setLinkingUserId] = useState<number | null>(null);
 
   useEffect(() => {
-    coachAPI.listAthletes().then((r) => setAthletes(r.data)).catch(() => {});
+    messageAPI
+      .listConversations({ limit: 200 })
+      .then((r) =>
+        setUnreadByAthlete(
+          Object.fromEntries(r.data.conversations.map((c: any) => [c.other_user_id, c.unread_count]))
+        )
+      )
+      .catch(() => {});
+  }, []);
+
+  useEffect(() => {
+    coachAPI
+      .listAthletes()
+      .then((r) => {
+        setAthletes(r.data);
+        // Refresh each athlete's Garmin status as the roster check streams in
+        return coachAPI.streamRosterConnectionStatus((result) =>
+          setAthletes((prev) =>
+            prev.map((a) =>
+              a.id === result.athlete_id ? { ...a, garmin_connected: result.is_connected } : a
+            )
+          )
+        );
+      })
+      .catch(() => {});
   }, []);
 
-  const loadUsers = async () => {
-    setLoadingUsers(true);
+  const loadUsers = async (cursor?: string) => {
+    if (!cursor) setLoadingUsers(true);
     try {
-      const params: any = {};
+      const params: any = { cursor };
       if (searchTerm) params.search = searchTerm;
       if (roleFilter !== "all") params.role = roleFilter;
       if (onlyUnlinked) params.only_unlinked = true;
       const resp = await coachAPI.listUsers(params);
-      setAllUsers(resp.data.users);
+      setAllUsers((prev) => (cursor ? [...prev, ...resp.data.users] : resp.data.users));
+      setUsersCursor(resp.data.next_cursor);
     } catch (err: any) {
       toast.error(err.response?.data?.detail || "Failed to load users");
     } finally {
@@ -93,19 +137,34 @@ const CoachDashboard: React.FC = () => {
     loadUsers();
   }, [searchTerm, roleFilter, onlyUnlinked]);
 
-  const loadWorkouts = async () => {
+  const loadWorkouts = async (refresh = false) => {
     setLoadingWorkouts(true);
     try {
-      const resp = await coachAPI.getWorkouts(typeFilter || undefined);
+      // The list comes from the stored library; a Garmin sync may be running
+      // in the background, so poll until it finishes
+      let resp = await coachAPI.getWorkouts(typeFilter || undefined, refresh, workoutSort);
       setWorkouts(resp.data.workouts);
+      setWorkoutsSyncedAt(resp.data.last_synced_at);
+      setRefreshingWorkouts(resp.data.refreshing);
+      while (resp.data.refreshing) {
+        await new Promise((resolve) => setTimeout(resolve, 2000));
+        resp = await coachAPI.getWorkouts(typeFilter || undefined, false, workoutSort);
+        setWorkouts(resp.data.workouts);
+        setWorkoutsSyncedAt(resp.data.last_synced_at);
+        setRefreshingWorkouts(resp.data.refreshing);
+      }
+      if (resp.data.refresh_error) {
+        toast.error(resp.data.refresh_error);
+      }
     } catch (err: any) {
       toast.error(err.response?.data?.detail || "Failed to load workouts from Garmin");
     } finally {
       setLoadingWorkouts(false);
+      setRefreshingWorkouts(false);
     }
   };
 
-  useEffect(() => { loadWorkouts(); }, [typeFilter]);
+  useEffect(() => { loadWorkouts(); }, [typeFilter, workoutSort]);
 
   const toggleWorkout = (id: string) => {
     const next = new Set(selectedWorkouts);
@@ -113,11 +172,11 @@ const CoachDashboard: React.FC = () => {
     setSelectedWorkouts(next);
   };
 
-  const handleCheckConnection = async (athleteId: number) => {
+  const handleCheckConnection = async (athleteId: number, live = false) => {
     setCheckingConnection(true);
     setConnectionCheck(null);
     try {
-      const resp = await coachAPI.checkAthleteConnection(athleteId);
+      const resp = await coachAPI.checkAthleteConnection(athleteId, live);
       setConnectionCheck(resp.data);
     } catch (err: any) {
       toast.error(err.response?.data?.detail || "Failed to check connection");
@@ -226,6 +285,11 @@ const CoachDashboard: React.FC = () => {
                     <span className={`text-xs ${a.garmin_connected ? "text-green-600" : "text-gray-400"}`}>
                       {a.garmin_connected ? "Garmin ✓" : "No Garmin"}
                     </span>
+                    {unreadByAthlete[a.id] > 0 && (
+                      <span className="text-xs text-dragonfly font-medium">
+                        {unreadByAthlete[a.id]} unread
+                      </span>
+                    )}
                   </div>
                 </button>
               ))}
@@ -243,6 +307,9 @@ const CoachDashboard: React.FC = () => {
               {connectionCheck.error_message && (
                 <p className="text-red-600 mt-1">{connectionCheck.error_message}</p>
               )}
+              {connectionCheck.retry_after && (
+                <p className="text-gray-600 mt-1">Garmin Connect is throttled; check again in about {connectionCheck.retry_after} seconds.</p>
+              )}
               {connectionCheck.recommendations.length > 0 && (
                 <ul className="mt-2 space-y-1">
                   {connectionCheck.recommendations.map((r, i) => (
@@ -250,6 +317,19 @@ const CoachDashboard: React.FC = () => {
                   ))}
                 </ul>
               )}
+              <div className="flex items-center justify-between mt-2 text-xs text-gray-500">
+                <span>
+                  {connectionCheck.last_checked_at
+                    ? `Last checked: ${new Date(connectionCheck.last_checked_at).toLocaleString()}`
+                    : "Not checked yet"}
+                </span>
+                <button
+                  onClick={() => handleCheckConnection(connectionCheck.athlete_id, true)}
+                  className="text-brand-600 hover:underline"
+                >
+                  Check now
+                </button>
+              </div>
             </div>
           )}
           {checkingConnection && (
@@ -355,6 +435,11 @@ const CoachDashboard: React.FC = () => {
                   )}
                 </div>
               ))}
+              {usersCursor && (
+                <button onClick={() => loadUsers(usersCursor)} className="btn-secondary text-sm py-1 px-3 w-full">
+                  Load more
+                </button>
+              )}
             </div>
           )}
         </div>
@@ -363,7 +448,14 @@ const CoachDashboard: React.FC = () => {
       {/* Workouts Panel */}
       <div className="card mt-6">
         <div className="flex flex-col sm:flex-row justify-between items-start sm:items-center gap-3 mb-4">
-          <h2 className="text-lg font-semibold">Garmin Workouts</h2>
+          <div>
+            <h2 className="text-lg font-semibold">Garmin Workouts</h2>
+            {workoutsSyncedAt && (
+              <p className="text-xs text-gray-500">
+                {refreshingWorkouts ? "Syncing with Garmin..." : `Last synced: ${new Date(workoutsSyncedAt).toLocaleString()}`}
+              </p>
+            )}
+          </div>
           <div className="flex gap-2">
             <select
               className="input-field text-sm py-2 w-36"
@@ -376,7 +468,16 @@ const CoachDashboard: React.FC = () => {
               <option value="swimming">Swimming</option>
               <option value="strength">Strength</option>
             </select>
-            <button onClick={loadWorkouts} disabled={loadingWorkouts} className="btn-secondary text-sm py-2">
+            <select
+              className="input-field text-sm py-2 w-36"
+              value={workoutSort}
+              onChange={(e) => setWorkoutSort(e.target.value)}
+            >
+              <option value="name">Sort by name</option>
+              <option value="duration">Sort by duration</option>
+              <option value="distance">Sort by distance</option>
+            </select>
+            <button onClick={() => loadWorkouts(true)} disabled={loadingWorkouts} className="btn-secondary text-sm py-2">
               {loadingWorkouts ? "Loading..." : "Refresh"}
             </button>
           </div>
@@ -408,6 +509,9 @@ const CoachDashboard: React.FC = () => {
                   {w.description && (
                     <div className="text-xs text-gray-500 truncate">{w.description}</div>
                   )}
+                  {formatWorkoutSummary(w) && (
+                    <div className="text-xs text-gray-400">{formatWorkoutSummary(w)}</div>
+                  )}
                 </div>
                 <span className={`text-xs px-2 py-0.5 rounded-full font-medium ${
                   workoutTypeColors[w.workout_type] || workoutTypeColors.other
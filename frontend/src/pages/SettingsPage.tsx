@@ -8,6 +8,8 @@ interface GarminStatus {
   last_sync: string | null;
   error_message: string | null;
   garmin_email: string | null;
+  garmin_available: boolean;
+  retry_after: number | null;
 }
 
 const SettingsPage: React.FC = () => {
@@ -90,7 +92,7 @@ const SettingsPage: React.FC = () => {
   const handleTest = async () => {
     setTesting(true);
     try {
-      const resp = await garminAPI.testConnection();
+      const resp = await garminAPI.testConnection(true);
       if (resp.data.is_connected) {
         toast.success(resp.data.message);
       } else {
@@ -260,6 +262,12 @@ const SettingsPage: React.FC = () => {
                   </p>
                 )}
               </div>
+              {!garminStatus.garmin_available && (
+                <div className="bg-yellow-50 border border-yellow-200 rounded-lg p-3 mb-4 text-sm text-yellow-800">
+                  Garmin Connect is temporarily unavailable. Workout syncs and imports will resume
+                  {garminStatus.retry_after ? ` in about ${garminStatus.retry_after} seconds` : " shortly"}.
+                </div>
+              )}
               <div className="flex gap-3">
                 <button onClick={handleTest} disabled={testing} className="btn-secondary text-sm py-2">
                   {testing ? "Testing..." : "Test Connection"}
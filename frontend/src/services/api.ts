@@ -83,6 +83,7 @@ export const authAPI = {
     avatar_url?: string;
     venmo_link?: string;
   }) => api.put("/auth/me", data),
+  getBadges: () => api.get("/auth/me/badges"),
   refresh: (refresh_token: string) =>
     api.post("/auth/refresh", { refresh_token }),
 };
@@ -93,8 +94,9 @@ export const adminAPI = {
   listUsers: (params?: {
     role?: string;
     search?: string;
-    skip?: number;
+    cursor?: string;
     limit?: number;
+    include_total?: boolean;
   }) => api.get("/admin/users", { params }),
   createUser: (data: {
     email: string;
@@ -127,24 +129,56 @@ export const coachAPI = {
     role?: string;
     search?: string;
     only_unlinked?: boolean;
-    skip?: number;
+    cursor?: string;
     limit?: number;
   }) => api.get("/coach/users", { params }),
   linkAthlete: (athleteId: number) =>
     api.post(`/coach/athletes/${athleteId}/link`),
   unlinkAthlete: (athleteId: number) =>
     api.post(`/coach/athletes/${athleteId}/unlink`),
-  checkAthleteConnection: (athleteId: number) =>
-    api.get(`/coach/athletes/${athleteId}/check-connection`),
-  getWorkouts: (workoutType?: string) =>
-    api.get("/coach/workouts", { params: { workout_type: workoutType } }),
+  checkAthleteConnection: (athleteId: number, live?: boolean) =>
+    api.get(`/coach/athletes/${athleteId}/check-connection`, {
+      params: { live: live || undefined },
+    }),
+  // Streams one NDJSON result per athlete as each connection check completes
+  streamRosterConnectionStatus: async (onResult: (result: any) => void, live?: boolean) => {
+    const token = localStorage.getItem("access_token");
+    const resp = await fetch(
+      `${API_URL}/coach/athletes/connection-status${live ? "?live=true" : ""}`,
+      { headers: token ? { Authorization: `Bearer ${token}` } : {} }
+    );
+    if (!resp.ok || !resp.body) {
+      throw new Error(`Connection status request failed (${resp.status})`);
+    }
+    const reader = resp.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    for (;;) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const lines = buffer.split("\n");
+      buffer = lines.pop() || "";
+      lines.filter((line) => line.trim()).forEach((line) => onResult(JSON.parse(line)));
+    }
+    if (buffer.trim()) onResult(JSON.parse(buffer));
+  },
+  getWorkouts: (workoutType?: string, refresh?: boolean, sort?: string) =>
+    api.get("/coach/workouts", {
+      params: { workout_type: workoutType, refresh: refresh || undefined, sort, limit: 500 },
+    }),
   shareWorkouts: (garminWorkoutIds: string[], athleteId: number) =>
     api.post("/coach/share-workouts", {
       garmin_workout_ids: garminWorkoutIds,
       athlete_id: athleteId,
     }),
-  listSharedWorkouts: (athleteId?: number) =>
-    api.get("/coach/shared-workouts", { params: { athlete_id: athleteId } }),
+  pushWorkouts: (garminWorkoutIds: string[], athleteIds: number[]) =>
+    api.post("/coach/push-workouts", {
+      garmin_workout_ids: garminWorkoutIds,
+      athlete_ids: athleteIds,
+    }),
+  listSharedWorkouts: (athleteId?: number, cursor?: string) =>
+    api.get("/coach/shared-workouts", { params: { athlete_id: athleteId, cursor } }),
 };
 
 // --- Athlete ---
@@ -152,11 +186,12 @@ export const athleteAPI = {
   listCoaches: () => api.get("/athlete/coaches"),
   selectCoach: (coachId: number) =>
     api.post(`/athlete/select-coach/${coachId}`),
-  getWorkouts: () => api.get("/athlete/workouts"),
+  getWorkouts: (cursor?: string) => api.get("/athlete/workouts", { params: { cursor } }),
   importWorkouts: (sharedWorkoutIds: number[]) =>
     api.post("/athlete/workouts/import", {
       shared_workout_ids: sharedWorkoutIds,
     }),
+  getImportJob: (jobId: number) => api.get(`/athlete/import-jobs/${jobId}`),
   removeWorkout: (sharedWorkoutId: number) =>
     api.delete(`/athlete/workouts/${sharedWorkoutId}`),
 };
@@ -169,7 +204,8 @@ export const garminAPI = {
       garmin_password: garminPassword,
     }),
   getStatus: () => api.get("/garmin/status"),
-  testConnection: () => api.post("/garmin/test"),
+  testConnection: (live?: boolean) =>
+    api.post("/garmin/test", null, { params: { live: live || undefined } }),
   disconnect: () => api.delete("/garmin/disconnect"),
 };
 
@@ -187,12 +223,19 @@ export const publicAPI = {
 export const messageAPI = {
   send: (data: { recipient_id: number; subject?: string; body: string }) =>
     api.post("/messages/send", data),
-  getInbox: (params?: { unread_only?: boolean; skip?: number; limit?: number }) =>
+  // List endpoints return next_cursor; pass it back as cursor for the next page
+  getInbox: (params?: { unread_only?: boolean; cursor?: string; limit?: number; include_total?: boolean }) =>
     api.get("/messages/inbox", { params }),
-  getSent: (params?: { skip?: number; limit?: number }) =>
+  getSent: (params?: { cursor?: string; limit?: number; include_total?: boolean }) =>
     api.get("/messages/sent", { params }),
   markRead: (messageId: number) =>
     api.put(`/messages/${messageId}/read`),
+  listConversations: (params?: { cursor?: string; limit?: number }) =>
+    api.get("/messages/conversations", { params }),
+  getConversationMessages: (conversationId: number, params?: { cursor?: string; limit?: number }) =>
+    api.get(`/messages/conversations/${conversationId}/messages`, { params }),
+  markConversationRead: (conversationId: number) =>
+    api.put(`/messages/conversations/${conversationId}/read`),
   listRecipients: () => api.get("/messages/coaches"),
 };
 